@@ -1,86 +1,596 @@
-from fastapi import FastAPI
-from pydantic import BaseModel
-from typing import Optional, Dict, Any
+from fastapi import FastAPI, Header, WebSocket, WebSocketDisconnect
+from fastapi.responses import JSONResponse, PlainTextResponse, Response, StreamingResponse
+from pydantic import BaseModel, Field
+from typing import Optional, Dict, Any, List
+from contextlib import asynccontextmanager
 import asyncio
-from async_solver import AsyncGeetestSolver
+import json
+import math
+import os
+import secrets
+from async_solver import API_BASE, STATIC_BASE, AsyncGeetestSolver
+from bg_cache import BackgroundCache
+from cluster import ClusterSolver
+from concurrency import AdaptiveLimiter
+from encoder import dumps
+from hashing import HashExecutor
+from image_index import DEFAULT_INDEX_PATH, reload_index
+from metrics import STAGE_BUCKETS, MetricsRegistry, SolverMetrics
+from profiling import LoopLagMonitor, ProfilerBusy, SamplingProfiler, TaskTracker, collapsed
+from recorder import SessionRecorder
+from results import GeetestResult
+from server_logging import logger, start_queue_logging, stop_queue_logging
+from scheduler import Job, QueueFull, TaskScheduler
+from task_store import TaskNotifier, open_task_store
+from token_pool import TokenPool
+
+hash_options = dict(
+    kind=os.environ.get("GEETEST_HASH_EXECUTOR", "thread"),
+    workers=int(os.environ.get("GEETEST_HASH_WORKERS", "0")) or None,
+    max_pending=int(os.environ.get("GEETEST_HASH_MAX_PENDING", "64"))
+)
+bg_cache_options = dict(
+    max_entries=int(os.environ.get("GEETEST_BG_CACHE_SIZE", "4096")),
+    ttl=float(os.environ.get("GEETEST_BG_CACHE_TTL", "3600")),
+    path=os.environ.get("GEETEST_BG_CACHE_PATH")
+)
+registry = MetricsRegistry()
+solver_metrics = SolverMetrics(registry)
+solver_options = dict(
+    min_confidence=float(os.environ.get("GEETEST_MIN_CONFIDENCE", "0")),
+    max_attempts=int(os.environ.get("GEETEST_MAX_ATTEMPTS", "3")),
+    deadline=float(os.environ.get("GEETEST_SOLVE_DEADLINE", "0")) or None,
+    request_timeout=float(os.environ.get("GEETEST_REQUEST_TIMEOUT", "15")),
+    hedge_percentile=float(os.environ.get("GEETEST_HEDGE_PERCENTILE", "0")) or None,
+    api_base=os.environ.get("GEETEST_API_BASE", API_BASE),
+    static_base=os.environ.get("GEETEST_STATIC_BASE", STATIC_BASE),
+    # Also return the raw verify body as ``response`` (off: parsed fields only).
+    keep_raw=os.environ.get("GEETEST_KEEP_RAW", "0") != "0"
+)
+# One AIMD limit on upstream /load and /verify calls, shared by the solver
+# and the scheduler; GEETEST_WORKERS is its starting point.
+limiter_options = dict(
+    initial=int(os.environ.get("GEETEST_WORKERS", "16")),
+    max_limit=int(os.environ.get("GEETEST_CONCURRENCY_MAX", "128"))
+) if os.environ.get("GEETEST_ADAPTIVE_CONCURRENCY", "1") != "0" else None
+cluster_processes = int(os.environ.get("GEETEST_CLUSTER_PROCESSES", "0"))
+# Opt-in JSONL trace of every upstream exchange, for ``recorder.py`` replays.
+record_path = os.environ.get("GEETEST_RECORD_PATH")
+recorder = SessionRecorder(record_path) if record_path and not cluster_processes else None
+
+if cluster_processes:
+    # Solves run in separate processes, each with its own session, hash
+    # workers, background cache and limiter; this one only dispatches.
+    hash_executor = bg_cache = limiter = None
+    solver = ClusterSolver(
+        cluster_processes,
+        options={
+            "solver": solver_options,
+            "hashing": hash_options,
+            "bg_cache": bg_cache_options,
+            "limiter": limiter_options,
+            "record_path": record_path,
+            "log_level": os.environ.get("GEETEST_LOG_LEVEL", "INFO").upper()
+        },
+        hooks=[solver_metrics]
+    )
+else:
+    hash_executor = HashExecutor(**hash_options)
+    bg_cache = BackgroundCache(**bg_cache_options)
+    limiter = AdaptiveLimiter(**limiter_options) if limiter_options is not None else None
+    solver = AsyncGeetestSolver(
+        debug=False,
+        hash_executor=hash_executor,
+        bg_cache=bg_cache,
+        limiter=limiter,
+        hooks=[solver_metrics],
+        recorder=recorder,
+        quiet=os.environ.get("GEETEST_QUIET", "1") != "0",
+        **solver_options
+    )
+
+queue_wait_seconds = registry.histogram("geetest_queue_wait_seconds", "Time tasks spent queued before a worker picked them up")
+tasks_rejected = registry.counter("geetest_tasks_rejected", "Task creations refused because the queue was full")
+loop_lag_seconds = registry.histogram(
+    "geetest_event_loop_lag_seconds", "How late the event loop ran a periodic timer", buckets=STAGE_BUCKETS
+)
+
+# Admin diagnostics, see /admin/*. Those endpoints (and the other
+# state-changing ones: index reload, token pool) require GEETEST_ADMIN_TOKEN
+# in the X-Admin-Token header, and stay closed while it is unset.
+ADMIN_TOKEN = os.environ.get("GEETEST_ADMIN_TOKEN")
+# /index/reload only loads files from this directory.
+INDEX_DIR = os.path.realpath(os.environ.get("GEETEST_INDEX_DIR", os.path.dirname(DEFAULT_INDEX_PATH)))
+profiler = SamplingProfiler()
+lag_monitor = LoopLagMonitor(on_sample=loop_lag_seconds.observe)
+task_tracker = TaskTracker()
+
+async def run_job(job: Job):
+    """Scheduler handler: solve one queued task"""
+    queue_wait_seconds.observe(job.queue_wait)
+    await solve_captcha(job.task_id, job.sitekey, queued=job.queue_wait, timeout=job.options.get("timeout"))
+
+# Pre-solved results for registered sitekeys, so /task/create can answer
+# "ready" at once. GEETEST_POOL_TTL should match how long a token stays
+# valid upstream; results within GEETEST_POOL_MARGIN of that are dropped.
+token_pool = TokenPool(
+    solver.solve,
+    depth=int(os.environ.get("GEETEST_POOL_DEPTH", "4")),
+    ttl=float(os.environ.get("GEETEST_POOL_TTL", "60")),
+    margin=float(os.environ.get("GEETEST_POOL_MARGIN", "10")),
+    refill_concurrency=int(os.environ.get("GEETEST_POOL_REFILL_CONCURRENCY", "4")),
+    max_sitekeys=int(os.environ.get("GEETEST_POOL_MAX_SITEKEYS", "64"))
+)
+MAX_POOL_DEPTH = int(os.environ.get("GEETEST_POOL_MAX_DEPTH", "32"))
+for pool_sitekey in filter(None, (key.strip() for key in os.environ.get("GEETEST_POOL_SITEKEYS", "").split(","))):
+    token_pool.register(pool_sitekey)
+
+# An upper bound on running jobs, not a pool: the scheduler starts a task per
+# job it runs. The limiter keeps it lower; in cluster mode the per-process
+# limiters do, each admitting up to its maximum.
+scheduler_workers = limiter_options["max_limit"] if limiter_options is not None else int(os.environ.get("GEETEST_WORKERS", "16"))
+scheduler = TaskScheduler(
+    run_job,
+    workers=scheduler_workers * max(cluster_processes, 1),
+    max_queue=int(os.environ.get("GEETEST_MAX_QUEUE", "1000")),
+    limiter=limiter
+)
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Keep one pooled solver session and its workers up for the lifetime of the app."""
+    start_queue_logging(os.environ.get("GEETEST_LOG_LEVEL", "INFO").upper())
+    if bg_cache is not None:
+        bg_cache.load()
+    if os.environ.get("GEETEST_WARMUP", "1") != "0":
+        # Imports, index pages, hash workers and the session before the
+        # first request rather than during it.
+        await solver.warm_up()
+    else:
+        await solver.start()
+    await scheduler.start()
+    await token_pool.start()
+    await lag_monitor.start()
+    try:
+        yield
+    finally:
+        await lag_monitor.stop()
+        await token_pool.stop()
+        await scheduler.stop()
+        await solver.close()
+        if hash_executor is not None:
+            hash_executor.shutdown()
+            bg_cache.save()
+        if recorder is not None:
+            recorder.close()
+        tasks.close()
+        stop_queue_logging()
+
+# Bounds on a task's ``timeout``, and the least time a solve gets once it
+# leaves the queue.
+MAX_TASK_TIMEOUT = float(os.environ.get("GEETEST_MAX_TASK_TIMEOUT", "300"))
+MIN_SOLVE_DEADLINE = float(os.environ.get("GEETEST_MIN_SOLVE_DEADLINE", "2"))
 
 app = FastAPI(
     title="Geetest Solver API",
     description="API for solving Geetest v4 captchas",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan
 )
 
 class TaskRequest(BaseModel):
     sitekey: str
     url: Optional[str] = None
+    priority: int = 0
+    # Seconds from creation until the task must be finished, queueing included
+    timeout: Optional[float] = Field(None, gt=0, le=MAX_TASK_TIMEOUT)
 
 class TaskResponse(BaseModel):
     taskId: str
     status: str = "processing"
 
+class BatchRequest(BaseModel):
+    sitekeys: List[str] = []
+    sitekey: Optional[str] = None
+    count: int = 1
+    concurrency: int = 8
+    priority: int = 0
+    # Per item, as for TaskRequest
+    timeout: Optional[float] = Field(None, gt=0, le=MAX_TASK_TIMEOUT)
+
+class PoolRequest(BaseModel):
+    sitekey: str
+    depth: Optional[int] = Field(None, ge=1, le=MAX_POOL_DEPTH)
+
+class IndexReloadRequest(BaseModel):
+    path: Optional[str] = None
+
 class ResultResponse(BaseModel):
     status: str
     solution: Optional[Dict[str, Any]] = None
     error: Optional[str] = None
 
+tasks = open_task_store(
+    os.environ.get("GEETEST_TASK_STORE", "memory"),
+    ttl=float(os.environ.get("GEETEST_TASK_TTL", "600")),
+    max_size=int(os.environ.get("GEETEST_TASK_MAX", "100000"))
+)
+notifier = TaskNotifier(tasks)
+
+registry.gauge("geetest_tasks_in_flight", "Tasks being solved right now", function=lambda: scheduler.in_flight)
+registry.gauge("geetest_queue_depth", "Tasks waiting for a worker", function=lambda: scheduler.depth)
+registry.gauge("geetest_concurrency_limit", "Tasks allowed to run at once, adapted to upstream latency and errors", function=lambda: scheduler.concurrency)
+registry.gauge("geetest_task_store_size", "Tasks held in the task store", function=lambda: len(tasks))
+registry.gauge("geetest_index_hit_ratio", "Share of image index lookups that found a match", function=solver_metrics.index_hit_rate)
+if bg_cache is not None:
+    # Cluster workers report their own caches under /stats.
+    registry.gauge("geetest_bg_cache_entries", "Entries in the background cache", function=lambda: len(bg_cache))
+registry.gauge("geetest_pool_tokens", "Pre-solved results ready in the token pool", function=lambda: len(token_pool))
+registry.gauge("geetest_pool_hit_ratio", "Share of task creations for pooled sitekeys answered from the pool", function=token_pool.hit_rate)
+registry.counter("geetest_pool_hits", "Task creations answered from the token pool", function=lambda: token_pool.hits)
+registry.counter("geetest_pool_misses", "Task creations for pooled sitekeys that found the pool empty", function=lambda: token_pool.misses)
+registry.counter("geetest_pool_refills", "Solves that refilled the token pool", function=lambda: token_pool.refilled)
+registry.counter("geetest_pool_refill_failures", "Refill solves that failed", function=lambda: token_pool.refill_failures)
+registry.counter("geetest_pool_expired", "Pooled results discarded unused as they neared expiry", function=lambda: token_pool.expired)
 
-tasks = {}
+MAX_WAIT = 60.0
+MAX_BATCH_SIZE = int(os.environ.get("GEETEST_BATCH_MAX", "1000"))
+MAX_BATCH_CONCURRENCY = int(os.environ.get("GEETEST_BATCH_MAX_CONCURRENCY", "32"))
+KEEPALIVE_INTERVAL = 15.0
 
-@app.post("/task/create")
-async def create_task(request: TaskRequest):
+def solution_payload(result: GeetestResult, **extra: Any) -> Dict[str, Any]:
+    """Stored solution of a successful result: its seccode fields, timings and, with GEETEST_KEEP_RAW, the verify body"""
+    solution = result.solution()
+    solution.update(
+        elapsed=result.elapsed_time_seconds,
+        stages=result.stages,
+        attempts=result.attempts,
+        misses=result.misses,
+        **extra
+    )
+    if result.response is not None:
+        solution["response"] = result.response
+    return solution
+
+def start_task(sitekey: str, priority: int = 0, timeout: Optional[float] = None) -> TaskResponse:
+    """
+    Create a task, answered at once from the token pool or queued for a worker.
+
+    Raises:
+        QueueFull: The scheduler queue is full; nothing is stored
+    """
     import uuid
     task_id = str(uuid.uuid4())
 
-    tasks[task_id] = {
-        "status": "processing",
-        "solution": None,
-        "error": None
-    }
+    tasks.create(task_id)
+
+    pooled = token_pool.take(sitekey)
+    if pooled is not None:
+        result, age = pooled
+        tasks.update(
+            task_id,
+            status="ready",
+            solution=solution_payload(result, queued=0.0, pooled=True, age=round(age, 3))
+        )
+        return TaskResponse(taskId=task_id, status="ready")
+
+    notifier.register(task_id)
+
+    try:
+        scheduler.submit(task_id, sitekey, priority=priority, timeout=timeout)
+    except QueueFull:
+        tasks_rejected.inc()
+        tasks.delete(task_id)
+        notifier.discard(task_id)
+        raise
 
-    asyncio.create_task(solve_captcha(task_id, request.sitekey))
     return TaskResponse(taskId=task_id)
 
-@app.get("/task/{task_id}")
-async def get_task_result(task_id: str):
+def queue_full_response(error: QueueFull) -> JSONResponse:
+    return JSONResponse(
+        status_code=429,
+        headers={"Retry-After": str(math.ceil(error.retry_after))},
+        content={"status": "error", "error": str(error)}
+    )
 
-    task = tasks.get(task_id)
-    if not task:
-        return ResultResponse(
-            status="error",
-            error="Task not found"
+@app.post("/task/create")
+async def create_task(request: TaskRequest):
+    try:
+        return start_task(request.sitekey, priority=request.priority, timeout=request.timeout)
+    except QueueFull as e:
+        return queue_full_response(e)
+
+async def wait_finished(task_id: str) -> Optional[Dict[str, Any]]:
+    """The task once it has left ``processing``, or None if it is gone"""
+    while True:
+        task = await notifier.wait(task_id, MAX_WAIT)
+        if task is None or task["status"] != "processing":
+            return task
+
+@app.post("/task/batch")
+async def create_batch(request: BatchRequest):
+    """Solve many sitekeys in one request and stream each result as NDJSON as it completes"""
+    import uuid
+    batch_id = str(uuid.uuid4())
+    sitekeys = list(request.sitekeys)
+    if request.sitekey:
+        sitekeys.extend([request.sitekey] * max(request.count, 0))
+
+    if not sitekeys or len(sitekeys) > MAX_BATCH_SIZE:
+        return JSONResponse(
+            status_code=400,
+            content={"status": "error", "error": f"A batch needs between 1 and {MAX_BATCH_SIZE} sitekeys"}
         )
 
-    return ResultResponse(
-        status=task["status"],
-        solution=task["solution"],
-        error=task["error"]
+    concurrency = max(1, min(request.concurrency, MAX_BATCH_CONCURRENCY, scheduler.max_queue))
+
+    # Items go through the scheduler like single tasks, at most
+    # ``concurrency`` queued or running at a time. A batch whose first wave
+    # would not fit in the queue is refused outright.
+    if scheduler.depth + min(concurrency, len(sitekeys)) > scheduler.max_queue:
+        tasks_rejected.inc()
+        return queue_full_response(QueueFull(scheduler.retry_after()))
+
+    def line(sitekey: str, task_id: Optional[str], payload: Dict[str, Any]) -> str:
+        return json.dumps({"batchId": batch_id, "sitekey": sitekey, "taskId": task_id, **payload}) + "\n"
+
+    async def results():
+        yield json.dumps({"batchId": batch_id, "size": len(sitekeys)}) + "\n"
+        remaining = iter(sitekeys)
+        waiting: Dict[asyncio.Future, Any] = {}
+        try:
+            while True:
+                while len(waiting) < concurrency:
+                    sitekey = next(remaining, None)
+                    if sitekey is None:
+                        break
+                    try:
+                        task_id = start_task(sitekey, priority=request.priority, timeout=request.timeout).taskId
+                    except QueueFull as e:
+                        yield line(sitekey, None, {"status": "failed", "solution": None, "error": str(e)})
+                        continue
+                    waiting[asyncio.ensure_future(wait_finished(task_id))] = (sitekey, task_id)
+
+                if not waiting:
+                    break
+                done, _ = await asyncio.wait(waiting, return_when=asyncio.FIRST_COMPLETED)
+                for future in done:
+                    sitekey, task_id = waiting.pop(future)
+                    yield line(sitekey, task_id, task_payload(future.result()))
+        finally:
+            # Queued items still finish and stay readable by taskId.
+            for future in waiting:
+                future.cancel()
+
+    return StreamingResponse(results(), media_type="application/x-ndjson")
+
+def task_payload(task: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+    """Response body for a stored task"""
+    if not task:
+        return {"status": "error", "solution": None, "error": "Task not found"}
+    return {"status": task["status"], "solution": task["solution"], "error": task["error"]}
+
+TASK_NOT_FOUND = dumps(task_payload(None))
+
+@app.get("/task/{task_id}", response_model=ResultResponse)
+async def get_task_result(task_id: str, wait: float = 0.0):
+    """Fetch a task result; with ?wait=N, hold the request up to N seconds until it finishes"""
+    if wait > 0 and await notifier.wait(task_id, min(wait, MAX_WAIT)) is None:
+        body = None
+    else:
+        # Stored pre-serialized, so there is nothing to validate or encode.
+        body = tasks.get_body(task_id)
+
+    return Response(content=body or TASK_NOT_FOUND, media_type="application/json")
+
+@app.get("/task/{task_id}/stream")
+async def stream_task_result(task_id: str):
+    """Server-Sent Events: the current state now, then the result the moment it is ready"""
+    async def events():
+        task = tasks.get(task_id)
+        yield f"event: status\ndata: {json.dumps(task_payload(task))}\n\n"
+
+        while task is not None and task["status"] == "processing":
+            task = await notifier.wait(task_id, KEEPALIVE_INTERVAL)
+            if task is not None and task["status"] == "processing":
+                yield ": keepalive\n\n"
+
+        if task is not None:
+            yield f"event: result\ndata: {json.dumps(task_payload(task))}\n\n"
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
     )
 
-async def solve_captcha(task_id: str, sitekey: str):
+@app.websocket("/task/{task_id}/ws")
+async def websocket_task_result(websocket: WebSocket, task_id: str):
+    """WebSocket: sends the current state, then the result the moment it is ready, then closes"""
+    await websocket.accept()
+    try:
+        task = tasks.get(task_id)
+        await websocket.send_json(task_payload(task))
+
+        while task is not None and task["status"] == "processing":
+            task = await notifier.wait(task_id, KEEPALIVE_INTERVAL)
+            if task is None or task["status"] != "processing":
+                await websocket.send_json(task_payload(task))
+
+        await websocket.close()
+    except WebSocketDisconnect:
+        pass
+
+async def solve_captcha(task_id: str, sitekey: str, queued: float = 0.0, timeout: Optional[float] = None):
     """Background task to solve the captcha"""
+    task_tracker.start(task_id, sitekey, queued)
+    status, stages, reason = "failed", None, None
     try:
-        solver = AsyncGeetestSolver(debug=False)
-        result = await solver.solve(sitekey=sitekey)
+        deadline = None
+        if timeout is not None:
+            # However long it queued, a task gets a real attempt rather than
+            # a deadline that has already passed.
+            deadline = max(timeout - queued, MIN_SOLVE_DEADLINE)
+
+        result = await solver.solve(sitekey=sitekey, deadline=deadline)
+        stages = result.stages
 
         if result.status == "success":
-            tasks[task_id].update({
-                "status": "ready",
-                "solution": {
-                    "response": result.response,
-                    "elapsed": result.elapsed_time_seconds
-                }
-            })
+            status = "ready"
+            tasks.update(
+                task_id,
+                status="ready",
+                solution=solution_payload(result, queued=round(queued, 3))
+            )
         else:
-            tasks[task_id].update({
-                "status": "failed",
-                "error": result.reason
-            })
+            reason = result.reason
+            tasks.update(task_id, status="failed", error=reason)
 
     except Exception as e:
-        tasks[task_id].update({
-            "status": "failed",
-            "error": str(e)
-        })
+        reason = str(e)
+        tasks.update(task_id, status="failed", error=reason)
+
+    finally:
+        task_tracker.finish(task_id, status, stages, reason)
+        notifier.notify(task_id)
+
+@app.post("/pool/register")
+async def register_pool_sitekey(request: PoolRequest, x_admin_token: Optional[str] = Header(None)):
+    """Keep pre-solved results ready for a sitekey, refilled in the background"""
+    denied = admin_denied(x_admin_token)
+    if denied is not None:
+        return denied
+    if not token_pool.register(request.sitekey, request.depth):
+        return JSONResponse(
+            status_code=409,
+            content={"status": "error", "error": f"At most {token_pool.max_sitekeys} sitekeys can be pooled"}
+        )
+    return {"status": "ready", "pool": token_pool.stats()["sitekeys"][request.sitekey]}
+
+@app.post("/pool/unregister")
+async def unregister_pool_sitekey(request: PoolRequest, x_admin_token: Optional[str] = Header(None)):
+    """Stop pre-solving a sitekey and drop its pooled results"""
+    denied = admin_denied(x_admin_token)
+    if denied is not None:
+        return denied
+    if not token_pool.unregister(request.sitekey):
+        return {"status": "failed", "error": "Sitekey is not pooled"}
+    return {"status": "ready"}
+
+def resolve_index_path(path: Optional[str]) -> Optional[str]:
+    """Absolute path of an index file inside INDEX_DIR, or None if it points elsewhere"""
+    resolved = os.path.realpath(os.path.join(INDEX_DIR, path or DEFAULT_INDEX_PATH))
+    if os.path.commonpath([resolved, INDEX_DIR]) != INDEX_DIR:
+        return None
+    return resolved
+
+@app.post("/index/reload")
+async def reload_image_index(request: IndexReloadRequest, x_admin_token: Optional[str] = Header(None)):
+    """Swap in a new image index file without restarting the server"""
+    denied = admin_denied(x_admin_token)
+    if denied is not None:
+        return denied
+
+    path = resolve_index_path(request.path)
+    if path is None:
+        return JSONResponse(status_code=400, content={"status": "error", "error": "Index path is outside the index directory"})
+
+    # The details stay in the server log: they would tell a client which
+    # files exist and which are readable.
+    if cluster_processes:
+        reply = await solver.reload_index(path)
+        if "error" in reply:
+            logger.warning("index reload failed", extra={"path": path, "error": reply["error"]})
+            return {"status": "failed", "error": "Could not load the index file"}
+        return {"status": "ready", **reply}
+
+    try:
+        index = reload_index(path)
+    except (OSError, ValueError) as e:
+        logger.warning("index reload failed", extra={"path": path, "error": str(e)})
+        return {"status": "failed", "error": "Could not load the index file"}
+
+    bg_cache.clear()
+    return {"status": "ready", "entries": len(index), "path": index.path}
+
+@app.get("/stats")
+async def get_stats():
+    """Runtime counters for the shared solver"""
+    return {
+        "hashing": hash_executor.stats() if hash_executor is not None else None,
+        "bg_cache": bg_cache.stats() if bg_cache is not None else None,
+        "scheduler": scheduler.stats(),
+        "pool": token_pool.stats(),
+        "concurrency": limiter.stats() if limiter is not None else None,
+        "cluster": {**solver.stats(), "solvers": await solver.worker_stats()} if cluster_processes else None,
+        "tasks": len(tasks)
+    }
+
+def admin_denied(token: Optional[str]) -> Optional[JSONResponse]:
+    """403 response unless an admin token is configured and matches"""
+    if not ADMIN_TOKEN:
+        return JSONResponse(status_code=403, content={"status": "error", "error": "Admin endpoints are disabled; set GEETEST_ADMIN_TOKEN"})
+    if not (token and secrets.compare_digest(token.encode(), ADMIN_TOKEN.encode())):
+        return JSONResponse(status_code=403, content={"status": "error", "error": "Invalid admin token"})
+    return None
+
+@app.get("/admin/profile")
+async def admin_profile(
+    seconds: float = 5.0,
+    interval: float = 0.01,
+    idle: bool = False,
+    format: str = "collapsed",
+    x_admin_token: Optional[str] = Header(None)
+):
+    """Sample every thread's stack for a few seconds; collapsed stacks (flamegraph.pl, speedscope) or JSON"""
+    denied = admin_denied(x_admin_token)
+    if denied is not None:
+        return denied
+
+    try:
+        profile = await profiler.sample(seconds, interval, idle)
+    except ProfilerBusy as e:
+        return JSONResponse(status_code=409, content={"status": "error", "error": str(e)})
+
+    if format == "json":
+        return profile
+    return PlainTextResponse(
+        collapsed(profile),
+        headers={"X-Profile-Samples": str(profile["samples"]), "X-Profile-Seconds": str(profile["seconds"])}
+    )
+
+@app.get("/admin/loop")
+async def admin_loop(x_admin_token: Optional[str] = Header(None)):
+    """Event-loop lag, plus how many asyncio tasks exist and how many solves are running"""
+    denied = admin_denied(x_admin_token)
+    if denied is not None:
+        return denied
+
+    return {
+        "lag": lag_monitor.stats(),
+        "asyncio_tasks": len(asyncio.all_tasks()),
+        "solves_in_flight": task_tracker.in_flight
+    }
+
+@app.get("/admin/tasks")
+async def admin_tasks(limit: int = 10, stage: Optional[str] = None, x_admin_token: Optional[str] = Header(None)):
+    """Longest-running solves and the slowest recent ones, by total time or by ``stage``"""
+    denied = admin_denied(x_admin_token)
+    if denied is not None:
+        return denied
+
+    limit = max(1, min(limit, 100))
+    return {
+        "in_flight": task_tracker.in_flight,
+        "running": task_tracker.oldest(limit),
+        "slowest": task_tracker.slowest(limit, stage),
+        "stages": task_tracker.stage_summary()
+    }
+
+@app.get("/metrics")
+async def get_metrics():
+    """Prometheus metrics: solve and stage latency, outcomes, index hit rate, in-flight tasks and queue depth"""
+    return PlainTextResponse(registry.render(), media_type="text/plain; version=0.0.4")
 
 @app.get("/")
 async def read_root():
@@ -1,104 +1,338 @@
+import asyncio
 import hashlib
 import random
-import secrets
 import time
 import uuid
-import json
-from typing import Dict, Optional
-from dataclasses import dataclass
-from io import BytesIO
-
-import aiohttp
-import rsa
-from Crypto.Cipher import AES
-from Crypto.Util.Padding import pad
-from Crypto.PublicKey.RSA import construct
-from PIL import Image
-from imagehash import phash
-from logmagix import Logger, Loader
-
-@dataclass
-class GeetestResult:
-    """Data class to store Geetest solving results."""
-    response: Optional[str]
-    elapsed_time_seconds: float
-    status: str
-    reason: Optional[str] = None
+from typing import TYPE_CHECKING, Any, AsyncIterator, Awaitable, Dict, Iterable, Optional, Tuple
+
+from bg_cache import BackgroundCache
+from concurrency import AdaptiveLimiter
+from deadlines import DEFAULT_REQUEST_TIMEOUT, Deadline, DeadlineExceeded
+from encoder import extract_jsonp, get_encoder
+from hedging import LatencyTracker, hedged
+from results import GeetestResult
+from server_logging import NULL_LOADER, StructuredLogger, console_loader, console_logger
+from tracing import SolveHooks, SolveTrace
+
+# aiohttp and the image index and hashing (NumPy, Pillow) are imported on
+# first use, or by ``warm_up``, so importing this module stays cheap.
+if TYPE_CHECKING:
+    import aiohttp
+    from hashing import HashExecutor
+    from image_index import ImageIndex
+    from recorder import SessionRecorder
+
+API_BASE = "https://gcaptcha4.geetest.com"
+STATIC_BASE = "https://static.geetest.com/"
 
 class AsyncGeetestSolver:
-    """Async solver for Geetest v4 captcha challenges."""
+    """
+    Async solver for Geetest v4 captcha challenges.
+
+    Pass ``quiet=True`` to run without the spinner and console output, e.g.
+    inside a server.
+
+    Every request has a timeout: its share of the solve ``deadline`` if one
+    is set, capped at ``request_timeout``. With ``hedge_percentile`` set, a
+    ``/load`` or background download slower than that percentile of recent
+    ones is duplicated and the first answer wins. Pass an ``AdaptiveLimiter``
+    as ``limiter`` to cap concurrent ``/load`` and ``/verify`` requests at a
+    limit tuned by their latency and failures. Pass a ``SessionRecorder``
+    as ``recorder`` to write every upstream exchange to a replayable trace.
+    Results hold the parsed solution fields; pass ``keep_raw=True`` to also
+    keep the verify body.
+    """
     
-    def __init__(self, debug: bool = False):
+    def __init__(
+        self,
+        debug: bool = False,
+        pool_size: int = 100,
+        pool_size_per_host: int = 32,
+        keepalive_timeout: float = 30.0,
+        dns_cache_ttl: int = 300,
+        max_distance: Optional[int] = None,
+        hash_executor: Optional["HashExecutor"] = None,
+        bg_cache: Optional[BackgroundCache] = None,
+        min_confidence: float = 0.0,
+        max_attempts: int = 3,
+        deadline: Optional[float] = None,
+        request_timeout: float = DEFAULT_REQUEST_TIMEOUT,
+        hedge_percentile: Optional[float] = None,
+        hedge_min_delay: float = 0.05,
+        limiter: Optional[AdaptiveLimiter] = None,
+        api_base: str = API_BASE,
+        static_base: str = STATIC_BASE,
+        hooks: Iterable[SolveHooks] = (),
+        recorder: Optional["SessionRecorder"] = None,
+        session: Optional["aiohttp.ClientSession"] = None,
+        keep_raw: bool = False,
+        quiet: bool = False
+    ):
         self.debug = debug
-        self.log = Logger()
-        self.loader = Loader(desc="Solving Captcha...", timeout=0.05)
-        self.e = int("10001", 16)
-        self.n = int("00C1E3934D1614465B33053E7F48EE4EC87B14B95EF88947713D25EECBFF7E74C7977D02DC1D9451F79DD5D1C10C29ACB6A9B4D6FB7D0A0279B6719E1772565F09AF627715919221AEF91899CAE08C0D686D748B20A3603BE2318CA6BC2B59706592A9219D0BF05C9F65023A21D2330807252AE0066D59CEEFA5F2748EA80BAB81".lower(), 16)
-        self.pubkey = construct((self.n, self.e))
-        self.image_index = self._load_image_index()
-
-    def _load_image_index(self) -> Dict[str, int]:
-        """Load the image hash to position index mapping."""
+        # None means the index's DEFAULT_MAX_DISTANCE.
+        self.max_distance = max_distance
+        self.min_confidence = min_confidence
+        self.max_attempts = max(1, max_attempts)
+        self.deadline = deadline
+        self.request_timeout = request_timeout
+        self.hedge_percentile = hedge_percentile
+        self.hedge_min_delay = hedge_min_delay
+        # Recent latencies of the idempotent GETs that may be hedged.
+        self._latency = {"load": LatencyTracker(), "download": LatencyTracker()}
+        self.limiter = limiter
+        self.api_base = api_base.rstrip("/")
+        self.static_base = static_base.rstrip("/") + "/"
+        self.recorder = recorder
+        self.hooks = tuple(hooks) + ((recorder,) if recorder is not None else ())
+        # Results carry the parsed solution; the verify body only on request.
+        self.keep_raw = keep_raw
+        self.quiet = quiet
+        self._hash_executor = hash_executor
+        self._owns_hash_executor = hash_executor is None
+        self.bg_cache = bg_cache if bg_cache is not None else BackgroundCache()
+        self.pool_size = pool_size
+        self.pool_size_per_host = pool_size_per_host
+        self.keepalive_timeout = keepalive_timeout
+        self.dns_cache_ttl = dns_cache_ttl
+        # A session passed in (e.g. a replay session) is used as is and
+        # left open by ``close``.
+        self._session = session
+        self._owns_session = session is None
+        # Quiet (server) mode: no spinner or console lines, just records on
+        # the ``geetest`` logger, see server_logging.start_queue_logging.
+        self.log = StructuredLogger() if quiet else console_logger()
+        self.encoder = get_encoder()
+
+    @property
+    def hash_executor(self) -> "HashExecutor":
+        """Executor for background hashing; the default one is created on first use."""
+        if self._hash_executor is None:
+            from hashing import HashExecutor
+            self._hash_executor = HashExecutor()
+        return self._hash_executor
+
+    async def start(self) -> None:
+        """Open the pooled HTTP session shared by every solve on this instance."""
+        if self._session is not None and not self._session.closed:
+            return
+
+        import aiohttp
+
         if self.debug:
-            self.log.debug("Loading image index mapping...")
+            self.log.debug("Opening pooled HTTP session...")
+
+        connector = aiohttp.TCPConnector(
+            limit=self.pool_size,
+            limit_per_host=self.pool_size_per_host,
+            keepalive_timeout=self.keepalive_timeout,
+            ttl_dns_cache=self.dns_cache_ttl,
+            use_dns_cache=True
+        )
+        self._session = aiohttp.ClientSession(connector=connector)
 
-        from sync_solver import GeetestSolver
-        return GeetestSolver()._load_image_index()
+    async def close(self) -> None:
+        """Close the pooled HTTP session and release its connections."""
+        if self._owns_session:
+            if self._session is not None and not self._session.closed:
+                await self._session.close()
+            self._session = None
 
-    def _aes_encrypt(self, text: str, sec_key: str, iv: bytes, style: str = 'pkcs7') -> bytes:
-        """Encrypt text using AES encryption."""
-        encryptor = AES.new(sec_key.encode('utf-8'), AES.MODE_CBC, iv)
-        pad_pkcs7 = pad(text.encode('utf-8'), AES.block_size, style=style)
-        return encryptor.encrypt(pad_pkcs7)
+        if self._owns_hash_executor and self._hash_executor is not None:
+            self._hash_executor.shutdown()
+            self._hash_executor = None
 
-    def _get_guid(self) -> str:
-        """Generate a GUID for the request."""
-        return ''.join(secrets.token_hex(2) for _ in range(4))
+    async def __aenter__(self) -> "AsyncGeetestSolver":
+        await self.start()
+        return self
 
-    def _encrypt_payload(self, data: str) -> str:
-        """Encrypt the payload using RSA and AES encryption."""
-        if self.debug:
-            self.log.debug("Encrypting payload...")
-            
-        guid = self._get_guid()
-        ciphertext = rsa.encrypt(guid.encode(), rsa.PublicKey(self.n, self.e)).hex()
-        encrypted = self._aes_encrypt(data, guid, b"0000000000000000").hex()
-        return encrypted + ciphertext
+    async def __aexit__(self, exc_type, exc, tb) -> None:
+        await self.close()
+
+    async def warm_up(self) -> float:
+        """
+        Pay the one-off startup costs before the first solve: heavy imports,
+        mapping the image index, the hashing tables and workers, the payload
+        encoder and the HTTP session. Call it at app startup.
+
+        Returns:
+            Seconds taken
+        """
+        started = time.perf_counter()
+        await self.start()
+        self.image_index.nearest(0, self.max_distance)
+        self.encoder.encode_w({"warm_up": True})
+        await self.hash_executor.warm_up()
+        return time.perf_counter() - started
+
+    async def _get_session(self) -> "aiohttp.ClientSession":
+        """Return the pooled session, opening it on first use."""
+        if self._session is None or self._session.closed:
+            await self.start()
+        return self._session
+
+    @property
+    def image_index(self) -> "ImageIndex":
+        """Process-wide image index; follows hot reloads."""
+        from image_index import get_index
+        return get_index()
 
     def _get_random(self) -> int:
         """Generate a random number for the callback."""
         return round(random.uniform(0, 1) * 10000) + round(time.time() * 1000)
 
-    async def solve(self, sitekey: str) -> GeetestResult:
+    async def solve(self, sitekey: str, deadline: Optional[float] = None) -> GeetestResult:
         """
         Solve the Geetest captcha challenge asynchronously.
         
         Args:
             sitekey: The Geetest site key (required)
+            deadline: Seconds the whole solve may take; defaults to the
+                solver's ``deadline``. Running out fails the solve with a
+                timeout reason naming the stage.
             
         Returns:
-            GeetestResult object containing the solution details
+            GeetestResult object containing the solution details, with
+            per-stage durations in ``stages``. Challenges whose background
+            has no confident index match are abandoned before verify and
+            retried, up to ``max_attempts`` and within the deadline;
+            ``attempts`` and ``misses`` report how many were used.
         """
-        self.loader.start()
+        trace = SolveTrace(sitekey, self.hooks)
+        budget = Deadline(deadline if deadline is not None else self.deadline, self.request_timeout)
+        result = trace.finish(await self._solve(sitekey, trace, budget))
+        if self.quiet:
+            self.log.result(sitekey, result)
+        return result
+
+    async def _fetch(
+        self,
+        session: "aiohttp.ClientSession",
+        url: str,
+        params: Optional[Dict[str, Any]],
+        timeout: float,
+        binary: bool
+    ) -> Tuple[int, Any]:
+        import aiohttp
+
+        async with session.get(url, params=params, timeout=aiohttp.ClientTimeout(total=timeout)) as response:
+            body = await response.read() if binary else await response.text()
+            return response.status, body
+
+    async def _limited_fetch(
+        self,
+        limiter: AdaptiveLimiter,
+        stage: str,
+        session: "aiohttp.ClientSession",
+        url: str,
+        params: Optional[Dict[str, Any]],
+        timeout: float,
+        binary: bool
+    ) -> Tuple[int, Any]:
+        """``_fetch`` holding a limiter slot of its own, for hedged requests."""
+        await limiter.acquire()
+        started = time.perf_counter()
+        try:
+            status, body = await self._fetch(session, url, params, timeout, binary)
+        except Exception:
+            limiter.release(time.perf_counter() - started, failed=True)
+            raise
+        except BaseException:
+            limiter.release()
+            raise
+        limiter.release(time.perf_counter() - started, failed=status >= 500 or status == 429, kind=stage)
+        return status, body
+
+    async def _get(
+        self,
+        session: "aiohttp.ClientSession",
+        trace: SolveTrace,
+        deadline: Deadline,
+        stage: str,
+        url: str,
+        params: Optional[Dict[str, Any]] = None,
+        binary: bool = False
+    ) -> Tuple[int, Any]:
+        """GET ``url`` as ``stage`` within its share of the deadline, hedged if enabled."""
+        timeout = deadline.timeout(stage)
+        tracker = self._latency.get(stage)
+        delay = None
+        if self.hedge_percentile is not None and tracker is not None:
+            delay = tracker.percentile(self.hedge_percentile)
+            if delay is not None:
+                delay = max(delay, self.hedge_min_delay)
+                if delay >= timeout:
+                    delay = None
+
+        # Only requests to the captcha API count against the limiter; the
+        # static host serving backgrounds has capacity of its own.
+        limiter = self.limiter if stage in ("load", "verify") else None
+
+        with trace.stage(stage):
+            if limiter is not None:
+                queued = time.perf_counter()
+                await asyncio.wait_for(limiter.acquire(), timeout)
+                timeout = max(timeout - (time.perf_counter() - queued), 0.001)
+            started = time.perf_counter()
+            calls = 0
+
+            def attempt() -> Awaitable[Tuple[int, Any]]:
+                # The first request runs on the slot taken above; a hedge is
+                # one more upstream request and must get a slot of its own.
+                nonlocal calls
+                calls += 1
+                if calls == 1 or limiter is None:
+                    return self._fetch(session, url, params, timeout, binary)
+                return self._limited_fetch(limiter, stage, session, url, params, timeout, binary)
+
+            try:
+                status, body = await asyncio.wait_for(
+                    hedged(attempt, delay, lambda: trace.event(f"hedge_{stage}")),
+                    timeout
+                )
+            except Exception:
+                if limiter is not None:
+                    limiter.release(time.perf_counter() - started, failed=True)
+                raise
+            except BaseException:
+                if limiter is not None:
+                    limiter.release()
+                raise
+
+        latency = time.perf_counter() - started
+        if limiter is not None:
+            limiter.release(latency, failed=status >= 500 or status == 429, kind=stage)
+        if tracker is not None:
+            tracker.observe(latency)
+        if self.recorder is not None:
+            self.recorder.exchange(trace, stage, url, params, status, body, latency)
+        return status, body
+
+    async def _solve(self, sitekey: str, trace: SolveTrace, deadline: Deadline) -> GeetestResult:
+        # Loader threads are single-use, so every solve gets its own spinner.
+        loader = NULL_LOADER if self.quiet else console_loader("Solving Captcha...")
+        loader.start()
         start_time = time.time()
 
         try:
 
-            challenge_id = uuid.uuid4()
-            callback_name = f"geetest_{self._get_random()}"
+            session = await self._get_session()
 
-            if self.debug:
-                self.log.debug(f"Starting captcha solve with sitekey: {sitekey}")
-                self.log.debug(f"Challenge ID: {challenge_id}")
-                self.log.debug(f"Callback name: {callback_name}")
+            while True:
+                trace.attempts += 1
+                challenge_id = uuid.uuid4()
+                callback_name = f"geetest_{self._get_random()}"
 
-            async with aiohttp.ClientSession() as session:
+                if self.debug:
+                    self.log.debug(f"Starting captcha solve with sitekey: {sitekey}")
+                    self.log.debug(f"Challenge ID: {challenge_id}")
+                    self.log.debug(f"Callback name: {callback_name}")
 
                 if self.debug:
                     self.log.debug("Making initial load request...")
-                    
-                async with session.get(
-                    "https://gcaptcha4.geetest.com/load",
+
+                load_status, response_text = await self._get(
+                    session, trace, deadline, "load",
+                    f"{self.api_base}/load",
                     params={
                         "captcha_id": sitekey,
                         "challenge": challenge_id,
@@ -106,138 +340,230 @@ class AsyncGeetestSolver:
                         "lang": "pl",
                         "callback": callback_name
                     }
-                ) as first_response:
-                    if first_response.status != 200:
+                )
+                if load_status != 200:
+                    trace.error = "load_status"
+                    return GeetestResult(
+                        response=None,
+                        elapsed_time_seconds=time.time() - start_time,
+                        status="failure",
+                        reason=f"Load request failed with status {load_status}"
+                    )
+
+                json_data = extract_jsonp(response_text, callback_name)
+                lot_num = json_data['data']['lot_number']
+            
+                if self.debug:
+                    self.log.debug(f"Lot number: {lot_num}")
+                    self.log.debug(f"Process token: {json_data['data']['process_token']}")
+
+                guid = self.encoder.guid()
+                pow_msg = f"1|0|md5|{json_data['data']['pow_detail']['datetime']}|{sitekey}|{lot_num}||{guid}"
+                pow_sign = hashlib.md5(pow_msg.encode()).hexdigest()
+                device_id = hashlib.md5(str(random.uniform(0, 1)).encode()).hexdigest()
+
+                if self.debug:
+                    self.log.debug(f"Generated GUID: {guid}")
+                    self.log.debug(f"POW message: {pow_msg}")
+                    self.log.debug(f"POW sign: {pow_sign}")
+                    self.log.debug(f"Device ID: {device_id}")
+
+                if self.debug:
+                    self.log.debug("Downloading and processing challenge image...")
+                
+                bg = json_data['data']['bg']
+                set_left = self.bg_cache.get_path(bg)
+
+                if set_left is None:
+                    download_status, image_data = await self._get(
+                        session, trace, deadline, "download", self.static_base + bg, binary=True
+                    )
+                    if not 200 <= download_status < 300:
+                        # An error page is not a background: never hash or
+                        # cache it. Try a fresh challenge while there is room.
+                        trace.event("download_failed")
+                        if self.limiter is not None:
+                            self.limiter.record_failure()
+                        if self.debug:
+                            self.log.debug(f"Background download failed with status {download_status}")
+                        if trace.attempts < self.max_attempts and not deadline.expired():
+                            continue
+                        trace.error = "download_status"
                         return GeetestResult(
                             response=None,
-                            elapsed_time_seconds=time.time() - start_time,
+                            elapsed_time_seconds=round(time.time() - start_time, 3),
                             status="failure",
-                            reason=f"Load request failed with status {first_response.status}"
+                            reason=f"Background download failed (HTTP {download_status})"
                         )
 
+                    digest = self.bg_cache.digest(image_data)
+                    set_left = self.bg_cache.get_digest(digest)
 
-                    response_text = await first_response.text()
-                    json_data = json.loads(response_text.split(f"{callback_name}(")[1][:-1])
-                    lot_num = json_data['data']['lot_number']
-                    
+                    if set_left is None:
+                        with trace.stage("hash"):
+                            image_hash = await asyncio.wait_for(
+                                self.hash_executor.hash(image_data), deadline.timeout("hash")
+                            )
+                        match = await self.hash_executor.nearest(self.image_index, image_hash, self.max_distance)
+                        if match is not None and match.confidence >= self.min_confidence:
+                            set_left = match.offset - 41
+                            trace.event("index_hit")
+                            self.bg_cache.put(bg, digest, set_left)
+                        else:
+                            trace.event("index_miss" if match is None else "index_low_confidence")
+
+                        if self.debug:
+                            self.log.debug(f"Image hash: {image_hash}")
+                            self.log.debug(f"Index match: {match}")
+                    else:
+                        trace.event("bg_digest_hit")
+                        if self.debug:
+                            self.log.debug(f"Background bytes cached: {digest}")
+                else:
+                    trace.event("bg_path_hit")
                     if self.debug:
-                        self.log.debug(f"Lot number: {lot_num}")
-                        self.log.debug(f"Process token: {json_data['data']['process_token']}")
-
-                    guid = self._get_guid()
-                    pow_msg = f"1|0|md5|{json_data['data']['pow_detail']['datetime']}|{sitekey}|{lot_num}||{guid}"
-                    pow_sign = hashlib.md5(pow_msg.encode()).hexdigest()
-                    device_id = hashlib.md5(str(random.uniform(0, 1)).encode()).hexdigest()
+                        self.log.debug(f"Background path cached: {bg}")
 
+                if set_left is None:
+                    # A verify with a guessed offset can only fail; spend the
+                    # round-trip on a fresh challenge instead.
+                    trace.misses += 1
                     if self.debug:
-                        self.log.debug(f"Generated GUID: {guid}")
-                        self.log.debug(f"POW message: {pow_msg}")
-                        self.log.debug(f"POW sign: {pow_sign}")
-                        self.log.debug(f"Device ID: {device_id}")
+                        self.log.debug("No confident index match, skipping verify")
+                    if trace.attempts >= self.max_attempts or deadline.expired():
+                        break
+                    continue
 
-                    if self.debug:
-                        self.log.debug("Downloading and processing challenge image...")
-                        
-                    async with session.get("https://static.geetest.com/" + json_data['data']['bg']) as image_response:
-                        image_data = await image_response.read()
-                        image_hash = str(phash(Image.open(BytesIO(image_data))))
-                        set_left = self.image_index.get(image_hash, 0) - 41
+                if self.debug:
+                    self.log.debug(f"Calculated set_left: {set_left}")
 
-                    if self.debug:
-                        self.log.debug(f"Image hash: {image_hash}")
-                        self.log.debug(f"Calculated set_left: {set_left}")
 
+                passtime = random.randint(500, 700)
+                userresponse = set_left + random.uniform(0, 1)
+            
+                if self.debug:
+                    self.log.debug(f"Generated passtime: {passtime}")
+                    self.log.debug(f"Generated userresponse: {userresponse}")
+
+                w_data = {
+                    "device_id": device_id,
+                    "em": {"ph": 0, "cp": 0, "ek": "11", "wd": 1, "nt": 0, "si": 0, "sc": 0},
+                    "ep": "123",
+                    "gee_guard": None,
+                    "geetest": "captcha",
+                    "lang": "zh",
+                    "lot_number": lot_num,
+                    "passtime": passtime,
+                    "pow_msg": pow_msg,
+                    "pow_sign": pow_sign,
+                    "setLeft": set_left,
+                    "userresponse": userresponse,
+                    "yeg6": "d6w9"
+                }
 
-                    passtime = random.randint(500, 700)
-                    userresponse = set_left + random.uniform(0, 1)
-                    
-                    if self.debug:
-                        self.log.debug(f"Generated passtime: {passtime}")
-                        self.log.debug(f"Generated userresponse: {userresponse}")
-
-                    w_data = {
-                        "device_id": device_id,
-                        "em": {"ph": 0, "cp": 0, "ek": "11", "wd": 1, "nt": 0, "si": 0, "sc": 0},
-                        "ep": "123",
-                        "gee_guard": None,
-                        "geetest": "captcha",
-                        "lang": "zh",
+                if self.debug:
+                    self.log.debug("Encrypting payload...")
+                
+                with trace.stage("encrypt"):
+                    encrypted_w = self.encoder.encode_w(w_data)
+
+                if self.debug:
+                    self.log.debug("Making verification request...")
+
+                # Never hedged: a verify consumes the challenge.
+                verify_status, verify_text = await self._get(
+                    session, trace, deadline, "verify",
+                    f"{self.api_base}/verify",
+                    params={
+                        "callback": callback_name,
+                        "captcha_id": sitekey,
+                        "client_type": "web",
                         "lot_number": lot_num,
-                        "passtime": passtime,
-                        "pow_msg": pow_msg,
-                        "pow_sign": pow_sign,
-                        "setLeft": set_left,
-                        "userresponse": userresponse,
-                        "yeg6": "d6w9"
+                        "payload": json_data['data']['payload'],
+                        "process_token": json_data['data']['process_token'],
+                        "payload_protocol": "1",
+                        "pt": "1",
+                        "w": encrypted_w
                     }
+                )
+                elapsed_time = round(time.time() - start_time, 3)
+
+                if verify_status == 200:
+                    verify_data = extract_jsonp(verify_text, callback_name)
+                    loader.stop()
+                    result = GeetestResult.from_verify(verify_data, elapsed_time, verify_text if self.keep_raw else None)
+
+                    if result is None:
+                        trace.error = "verify_rejected"
+                        verdict = (verify_data.get('data') or {}).get('result') or verify_data.get('status')
+                        if verdict == "success":
+                            verdict = "no pass_token"
+                        if self.debug:
+                            self.log.debug(f"Verification rejected: {verify_text}")
+                        return GeetestResult(
+                            response=None,
+                            elapsed_time_seconds=elapsed_time,
+                            status="failure",
+                            reason=f"Verification rejected ({verdict})"
+                        )
 
                     if self.debug:
-                        self.log.debug("Encrypting payload...")
-                        
-                    encrypted_w = self._encrypt_payload(json.dumps(w_data))
+                        self.log.debug(f"Verification successful")
+                        self.log.debug(f"Full response: {verify_text}")
+                
+               
+                    if not self.quiet:
+                        self.log.message(
+                            "Geetest",
+                            f"Successfully solved captcha: {result.pass_token[:65]}...",
+                            start=start_time,
+                            end=time.time()
+                        )
 
+                    return result
+                else:
+                    trace.error = "verify_status"
+                    loader.stop()
                     if self.debug:
-                        self.log.debug("Making verification request...")
-
-
-                    async with session.get(
-                        "https://gcaptcha4.geetest.com/verify",
-                        params={
-                            "callback": callback_name,
-                            "captcha_id": sitekey,
-                            "client_type": "web",
-                            "lot_number": lot_num,
-                            "payload": json_data['data']['payload'],
-                            "process_token": json_data['data']['process_token'],
-                            "payload_protocol": "1",
-                            "pt": "1",
-                            "w": encrypted_w
-                        }
-                    ) as verify_response:
-                        elapsed_time = round(time.time() - start_time, 3)
-
-                        if verify_response.status == 200:
-                            verify_text = await verify_response.text()
-                            verify_data = json.loads(verify_text.split(f"{callback_name}(")[1][:-1])
-                            payload = verify_data.get('data', {}).get('payload', '')
-                            self.loader.stop()
-
-                            if self.debug:
-                                self.log.debug(f"Verification successful")
-                                self.log.debug(f"Full response: {verify_text}")
-                            
-                           
-                            self.log.message(
-                                "Geetest",
-                                f"Successfully solved captcha: {payload[:65]}...",
-                                start=start_time,
-                                end=time.time()
-                            )
-                            
-                            return GeetestResult(
-                                response=verify_text,
-                                elapsed_time_seconds=elapsed_time,
-                                status="success"
-                            )
-                        else:
-                            self.loader.stop()
-                            if self.debug:
-                                self.log.debug(f"Verification failed with status {verify_response.status}")
-                                verify_text = await verify_response.text()
-                                self.log.debug(f"Response: {verify_text}")
-                                
-                            return GeetestResult(
-                                response=None,
-                                elapsed_time_seconds=elapsed_time,
-                                status="failure",
-                                reason=f"Verification failed with status {verify_response.status}"
-                            )
+                        self.log.debug(f"Verification failed with status {verify_status}")
+                        self.log.debug(f"Response: {verify_text}")
+                    
+                    return GeetestResult(
+                        response=None,
+                        elapsed_time_seconds=elapsed_time,
+                        status="failure",
+                        reason=f"Verification failed with status {verify_status}"
+                    )
+
+            elapsed_time = round(time.time() - start_time, 3)
+            trace.error = "index_miss"
+            return GeetestResult(
+                response=None,
+                elapsed_time_seconds=elapsed_time,
+                status="failure",
+                reason=f"No confident image index match after {trace.attempts} challenge(s)"
+            )
+
+        except (asyncio.TimeoutError, DeadlineExceeded) as e:
+            elapsed_time = round(time.time() - start_time, 3)
+            stage = getattr(e, "stage", None) or trace.active
+            trace.error = "timeout"
+            if not self.quiet:
+                self.log.failure(f"Timed out in {stage} stage")
+            return GeetestResult(
+                response=None,
+                elapsed_time_seconds=elapsed_time,
+                status="failure",
+                reason=f"Timed out in {stage} stage after {elapsed_time}s"
+            )
 
         except Exception as e:
             elapsed_time = round(time.time() - start_time, 3)
+            trace.error = type(e).__name__
             if self.debug:
                 self.log.debug(f"Error during solve: {str(e)}")
-            self.log.failure(f"Failed to solve captcha: {str(e)}")
+            if not self.quiet:
+                self.log.failure(f"Failed to solve captcha: {str(e)}")
             return GeetestResult(
                 response=None,
                 elapsed_time_seconds=elapsed_time,
@@ -246,9 +572,46 @@ class AsyncGeetestSolver:
             )
 
         finally:
-            self.loader.stop()
+            loader.stop()
             if self.debug:
-                self.log.debug(f"Solve attempt completed in {elapsed_time} seconds")
+                self.log.debug(f"Solve attempt completed in {round(time.time() - start_time, 3)} seconds")
+
+    async def solve_many(self, sitekeys: Iterable[str], concurrency: int = 8) -> AsyncIterator[GeetestResult]:
+        """
+        Solve many challenges over this solver's shared session and index.
+
+        Args:
+            sitekeys: Site keys to solve; repeat a key to get several tokens for it
+            concurrency: Maximum number of solves in flight at once
+
+        Yields:
+            GeetestResult objects in completion order, each tagged with its sitekey
+        """
+        sitekeys = iter(sitekeys)
+        pending = {}
+
+        def launch() -> bool:
+            sitekey = next(sitekeys, None)
+            if sitekey is None:
+                return False
+            pending[asyncio.ensure_future(self.solve(sitekey))] = sitekey
+            return True
+
+        try:
+            while len(pending) < concurrency and launch():
+                pass
+
+            while pending:
+                done, _ = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for future in done:
+                    sitekey = pending.pop(future)
+                    result = future.result()
+                    result.sitekey = sitekey
+                    yield result
+                    launch()
+        finally:
+            for future in pending:
+                future.cancel()
 
 async def solve_geetest(sitekey: str, debug: bool = False) -> Dict:
     """
@@ -258,13 +621,12 @@ async def solve_geetest(sitekey: str, debug: bool = False) -> Dict:
         sitekey: The Geetest site key (required)
         debug: Enable debug logging (optional)
     """
-    solver = AsyncGeetestSolver(debug=debug)
-    result = await solver.solve(sitekey=sitekey)
-    return result.__dict__
+    # keep_raw: callers of this wrapper have always had the verify body as ``response``.
+    async with AsyncGeetestSolver(debug=debug, keep_raw=True) as solver:
+        result = await solver.solve(sitekey=sitekey)
+    return result.to_dict()
 
 if __name__ == "__main__":
-    import asyncio
-    
     async def main():
         result = await solve_geetest(
             sitekey="e392e1d7fd421dc63325744d5a2b9c73"
@@ -0,0 +1,133 @@
+"""
+Throughput of cluster mode as the number of solver processes grows.
+
+Starts the mock Geetest server in a child process, then for each process
+count runs a ``ClusterSolver`` at a fixed number of solves in flight and
+reports solves/sec, p50/p95 latency and the speedup over one process.
+``--processes 0`` adds the single-process ``AsyncGeetestSolver`` as a
+reference. The background cache is off by default so every solve hashes its
+background, which is the CPU-bound work that cluster mode spreads out.
+
+On a machine with fewer cores than processes, or where the mock server
+competes for the same cores, the curve flattens early; compare runs on the
+same host only.
+
+Usage:
+    python benchmarks/bench_cluster.py [--processes 1,2,4] [--concurrency 64] [--solves 1000] [--json out.json]
+"""
+import argparse
+import asyncio
+import json
+import os
+import sys
+import time
+from typing import Any, Dict, List, Tuple
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(BENCH_DIR))
+sys.path.insert(0, BENCH_DIR)
+
+from bench_e2e import SITEKEY, mock_server, summarize
+
+def default_processes() -> str:
+    """1, 2, 4, ... up to the core count, always ending at the core count."""
+    cores = os.cpu_count() or 1
+    counts = []
+    count = 1
+    while count < cores:
+        counts.append(count)
+        count *= 2
+    counts.append(cores)
+    return ",".join(str(count) for count in counts)
+
+async def run_level(solver: Any, concurrency: int, count: int) -> Tuple[List[float], int]:
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def timed() -> Tuple[float, bool]:
+        async with semaphore:
+            start = time.perf_counter()
+            result = await solver.solve(SITEKEY)
+            return time.perf_counter() - start, result.status == "success"
+
+    outcomes = await asyncio.gather(*[timed() for _ in range(count)])
+    return [t for t, _ in outcomes], sum(1 for _, ok in outcomes if not ok)
+
+async def bench(args: argparse.Namespace, processes: int) -> Dict[str, Any]:
+    from async_solver import AsyncGeetestSolver
+    from bg_cache import BackgroundCache
+    from cluster import ClusterSolver
+
+    max_entries = 4096 if args.bg_cache else 0
+    if processes:
+        solver = ClusterSolver(processes, options={
+            "solver": {"api_base": args.api_base, "static_base": args.static_base},
+            "bg_cache": {"max_entries": max_entries}
+        })
+    else:
+        solver = AsyncGeetestSolver(
+            bg_cache=BackgroundCache(max_entries=max_entries),
+            quiet=True,
+            api_base=args.api_base,
+            static_base=args.static_base
+        )
+
+    await solver.warm_up()
+    try:
+        await run_level(solver, args.concurrency, args.warmup)
+        wall, cpu = time.perf_counter(), time.process_time()
+        latencies, failures = await run_level(solver, args.concurrency, args.solves)
+        # CPU of the dispatcher only; the solver processes are not counted.
+        result = summarize("cluster" if processes else "async", args.concurrency, latencies, failures,
+                           time.perf_counter() - wall, time.process_time() - cpu)
+    finally:
+        await solver.close()
+    result["processes"] = processes
+    return result
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--processes", default=default_processes(),
+                        help="Comma-separated solver process counts (0: single-process AsyncGeetestSolver)")
+    parser.add_argument("--concurrency", type=int, default=64, help="Solves in flight")
+    parser.add_argument("--solves", type=int, default=1000, help="Solves per process count")
+    parser.add_argument("--warmup", type=int, default=50, help="Unmeasured solves before each run")
+    parser.add_argument("--port", type=int, default=18080)
+    parser.add_argument("--latency", type=float, default=0.02, help="Mock server mean response delay (s)")
+    parser.add_argument("--jitter", type=float, default=0.005, help="Mock server delay standard deviation (s)")
+    parser.add_argument("--backgrounds", type=int, default=64, help="Distinct backgrounds the mock serves")
+    parser.add_argument("--bg-cache", action=argparse.BooleanOptionalAction, default=False,
+                        help="Use the background cache in every process (off: hash every background)")
+    parser.add_argument("--json", help="Write results as JSON to this file ('-' for stdout)")
+    args = parser.parse_args()
+
+    counts = [int(count) for count in args.processes.split(",") if count.strip()]
+    args.api_base = f"http://127.0.0.1:{args.port}"
+    args.static_base = f"http://127.0.0.1:{args.port}/static/"
+    mock_args = argparse.Namespace(
+        port=args.port, latency=args.latency, jitter=args.jitter, error_rate=0.0, miss_rate=0.0,
+        backgrounds=args.backgrounds
+    )
+
+    results = []
+    with mock_server(mock_args):
+        for processes in counts:
+            result = asyncio.run(bench(args, processes))
+            results.append(result)
+            base = next((r for r in results if r["processes"] == 1), None)
+            result["speedup"] = round(result["solves_per_sec"] / base["solves_per_sec"], 2) if base else None
+            label = f"{processes} proc" if processes else "in-process"
+            speedup = f"x{result['speedup']:.2f}" if result["speedup"] is not None else "-"
+            print(f"{label:<10} {result['solves_per_sec']:>8.1f} solves/s  {speedup:>6}  "
+                  f"p50 {result['p50_ms']:>7.1f} ms  p95 {result['p95_ms']:>7.1f} ms  "
+                  f"failures {result['failures']}", flush=True)
+
+    report = {"cpus": os.cpu_count(), "concurrency": args.concurrency, "bg_cache": args.bg_cache, "results": results}
+    if args.json == "-":
+        print(json.dumps(report, indent=2))
+    elif args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,181 @@
+"""
+Cold-start cost of the solvers and the API: import time and time-to-first-solve.
+
+Every run is a fresh interpreter, timed against the local mock Geetest
+server, reporting:
+
+- ``import``: importing the solver module (or ``api_solver``)
+- ``startup``: constructing the solver, plus ``warm_up()`` when enabled;
+  for the API, the app lifespan startup
+- ``first`` / ``second``: the first and second solve, each a full solve
+  (background cache disabled), so their difference is the one-off cost
+  left on the first request
+- ``ttfs``: process start to first solution, interpreter startup included
+
+Usage:
+    python benchmarks/bench_cold_start.py [--modes async,sync,api] [--runs 5] [--json out.json]
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+ROOT = os.path.dirname(BENCH_DIR)
+
+SITEKEY = "e392e1d7fd421dc63325744d5a2b9c73"
+
+def child(mode: str, warm: bool, api_base: str, static_base: str, sitekey: str) -> dict:
+    """One cold start, run inside a fresh interpreter."""
+    sys.path.insert(0, ROOT)
+    timings = {}
+    started = time.perf_counter()
+
+    if mode == "sync":
+        import sync_solver
+        timings["import"] = time.perf_counter() - started
+
+        from bg_cache import BackgroundCache
+        mark = time.perf_counter()
+        solver = sync_solver.GeetestSolver(
+            api_base=api_base, static_base=static_base, bg_cache=BackgroundCache(max_entries=0), quiet=True
+        )
+        if warm:
+            solver.warm_up()
+        timings["startup"] = time.perf_counter() - mark
+
+        for label in ("first", "second"):
+            mark = time.perf_counter()
+            ok = solver.solve(sitekey).status == "success"
+            timings[label] = time.perf_counter() - mark
+            if label == "first":
+                timings["first_done_at"] = time.time()
+        solver.close()
+        return {"ok": ok, **timings}
+
+    import asyncio
+
+    if mode == "async":
+        import async_solver
+        timings["import"] = time.perf_counter() - started
+
+        async def run() -> bool:
+            from bg_cache import BackgroundCache
+            mark = time.perf_counter()
+            solver = async_solver.AsyncGeetestSolver(
+                api_base=api_base, static_base=static_base, bg_cache=BackgroundCache(max_entries=0), quiet=True
+            )
+            if warm:
+                await solver.warm_up()
+            timings["startup"] = time.perf_counter() - mark
+
+            async with solver:
+                for label in ("first", "second"):
+                    mark = time.perf_counter()
+                    ok = (await solver.solve(sitekey)).status == "success"
+                    timings[label] = time.perf_counter() - mark
+                    if label == "first":
+                        timings["first_done_at"] = time.time()
+            return ok
+
+        return {"ok": asyncio.run(run()), **timings}
+
+    os.environ.update({
+        "GEETEST_API_BASE": api_base,
+        "GEETEST_STATIC_BASE": static_base,
+        "GEETEST_BG_CACHE_SIZE": "0",
+        "GEETEST_WARMUP": "1" if warm else "0",
+        "GEETEST_LOG_LEVEL": "WARNING"
+    })
+    import api_solver
+    timings["import"] = time.perf_counter() - started
+    sys.path.insert(0, BENCH_DIR)
+    from bench_e2e import asgi_request
+
+    async def run_api() -> bool:
+        app = api_solver.app
+        mark = time.perf_counter()
+        async with app.router.lifespan_context(app):
+            timings["startup"] = time.perf_counter() - mark
+            for label in ("first", "second"):
+                mark = time.perf_counter()
+                _, body = await asgi_request(app, "POST", "/task/create", {"sitekey": sitekey})
+                task_id = json.loads(body)["taskId"]
+                _, body = await asgi_request(app, "GET", f"/task/{task_id}?wait=30")
+                ok = json.loads(body)["status"] == "ready"
+                timings[label] = time.perf_counter() - mark
+                if label == "first":
+                    timings["first_done_at"] = time.time()
+        return ok
+
+    return {"ok": asyncio.run(run_api()), **timings}
+
+def run_child(mode: str, warm: bool, args: argparse.Namespace) -> dict:
+    command = [
+        sys.executable, os.path.abspath(__file__), "--child", mode,
+        "--api-base", args.api_base, "--static-base", args.static_base
+    ]
+    if warm:
+        command.append("--warm")
+    spawned_at = time.time()
+    output = subprocess.run(command, check=True, capture_output=True, text=True).stdout
+    result = json.loads(output.strip().splitlines()[-1])
+    # Wall clock, so interpreter startup, which the child cannot time, counts.
+    result["ttfs"] = result.pop("first_done_at") - spawned_at
+    return result
+
+def median(values: list) -> float:
+    ordered = sorted(values)
+    middle = len(ordered) // 2
+    return ordered[middle] if len(ordered) % 2 else (ordered[middle - 1] + ordered[middle]) / 2
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--modes", default="async,sync,api", help="Comma-separated subset of async, sync, api")
+    parser.add_argument("--runs", type=int, default=5, help="Fresh interpreters per mode and warm-up setting")
+    parser.add_argument("--port", type=int, default=18080)
+    parser.add_argument("--json", help="Write results as JSON to this file ('-' for stdout)")
+    parser.add_argument("--child", help=argparse.SUPPRESS)
+    parser.add_argument("--warm", action="store_true", help=argparse.SUPPRESS)
+    parser.add_argument("--api-base", help=argparse.SUPPRESS)
+    parser.add_argument("--static-base", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        print(json.dumps(child(args.child, args.warm, args.api_base, args.static_base, SITEKEY)))
+        return 0
+
+    sys.path.insert(0, BENCH_DIR)
+    from bench_e2e import mock_server
+
+    args.api_base = f"http://127.0.0.1:{args.port}"
+    args.static_base = f"http://127.0.0.1:{args.port}/static/"
+    mock_args = argparse.Namespace(
+        port=args.port, latency=0.05, jitter=0.0, error_rate=0.0, miss_rate=0.0, backgrounds=64
+    )
+
+    results = []
+    with mock_server(mock_args):
+        for mode in [mode.strip() for mode in args.modes.split(",") if mode.strip()]:
+            for warm in (False, True):
+                runs = [run_child(mode, warm, args) for _ in range(args.runs)]
+                summary = {"mode": mode, "warm_up": warm, "runs": len(runs), "failures": sum(1 for r in runs if not r["ok"])}
+                for key in ("import", "startup", "first", "second", "ttfs"):
+                    summary[f"{key}_ms"] = round(median([r[key] for r in runs]) * 1000, 1)
+                results.append(summary)
+                print(f"{mode:<6} warm-up {'on ' if warm else 'off'}  import {summary['import_ms']:>7.1f} ms  "
+                      f"startup {summary['startup_ms']:>7.1f} ms  first {summary['first_ms']:>7.1f} ms  "
+                      f"second {summary['second_ms']:>7.1f} ms  ttfs {summary['ttfs_ms']:>7.1f} ms  "
+                      f"failures {summary['failures']}", flush=True)
+
+    if args.json == "-":
+        print(json.dumps(results, indent=2))
+    elif args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
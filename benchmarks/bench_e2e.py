@@ -0,0 +1,328 @@
+"""
+End-to-end throughput and latency of the solvers against the local mock Geetest server.
+
+Starts ``mock_geetest.py`` in a child process (so its CPU is not counted),
+then drives ``GeetestSolver``, ``AsyncGeetestSolver`` and the FastAPI app
+(in-process over ASGI, create + long-poll) at each concurrency level and
+reports solves/sec, p50/p95/p99 latency, CPU% and RSS of this process.
+
+``--json`` writes the results for CI; ``--baseline`` compares against an
+earlier ``--json`` file and exits non-zero on a regression.
+
+Usage:
+    python benchmarks/bench_e2e.py [--modes sync,async,api] [--concurrency 1,8,32] [--solves 200]
+    python benchmarks/bench_e2e.py --json bench.json --baseline main.json --tolerance 0.15
+"""
+import argparse
+import asyncio
+import contextlib
+import json
+import os
+import platform
+import resource
+import subprocess
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(BENCH_DIR))
+
+from bg_cache import BackgroundCache
+
+SITEKEY = "e392e1d7fd421dc63325744d5a2b9c73"
+
+def rss_mb() -> float:
+    """Current resident set size, falling back to the peak where /proc is missing."""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 2 ** 20
+    except (OSError, ValueError):
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak / 2 ** 20 if sys.platform == "darwin" else peak / 1024
+
+def summarize(mode: str, concurrency: int, latencies: List[float], failures: int, wall: float, cpu: float) -> Dict[str, Any]:
+    solves = len(latencies)
+    p50, p95, p99 = np.percentile(latencies, [50, 95, 99]) * 1000 if solves else (0.0, 0.0, 0.0)
+    return {
+        "mode": mode,
+        "concurrency": concurrency,
+        "solves": solves,
+        "failures": failures,
+        "solves_per_sec": round((solves - failures) / wall, 2) if wall else 0.0,
+        "p50_ms": round(float(p50), 1),
+        "p95_ms": round(float(p95), 1),
+        "p99_ms": round(float(p99), 1),
+        "cpu_percent": round(100 * cpu / wall, 1) if wall else 0.0,
+        "rss_mb": round(rss_mb(), 1)
+    }
+
+def measure(run: Callable[[], Tuple[List[float], int]]) -> Tuple[List[float], int, float, float]:
+    wall, cpu = time.perf_counter(), time.process_time()
+    latencies, failures = run()
+    return latencies, failures, time.perf_counter() - wall, time.process_time() - cpu
+
+def make_cache(args: argparse.Namespace) -> BackgroundCache:
+    return BackgroundCache() if args.bg_cache else BackgroundCache(max_entries=0)
+
+def bench_sync(args: argparse.Namespace, levels: List[int]) -> List[Dict[str, Any]]:
+    from sync_solver import GeetestSolver
+
+    solver = GeetestSolver(
+        bg_cache=make_cache(args),
+        pool_maxsize=max(levels),
+        quiet=True,
+        api_base=args.api_base,
+        static_base=args.static_base
+    )
+
+    def timed(_: int) -> Tuple[float, bool]:
+        start = time.perf_counter()
+        result = solver.solve(SITEKEY)
+        return time.perf_counter() - start, result.status == "success"
+
+    def run_level(concurrency: int, count: int) -> Tuple[List[float], int]:
+        with ThreadPoolExecutor(max_workers=concurrency) as pool:
+            outcomes = list(pool.map(timed, range(count)))
+        return [t for t, _ in outcomes], sum(1 for _, ok in outcomes if not ok)
+
+    results = []
+    with solver:
+        run_level(min(levels), args.warmup)
+        for concurrency in levels:
+            results.append(summarize("sync", concurrency, *measure(lambda: run_level(concurrency, args.solves))))
+    return results
+
+def bench_async(args: argparse.Namespace, levels: List[int]) -> List[Dict[str, Any]]:
+    from async_solver import AsyncGeetestSolver
+
+    async def main() -> List[Dict[str, Any]]:
+        async with AsyncGeetestSolver(
+            bg_cache=make_cache(args),
+            quiet=True,
+            api_base=args.api_base,
+            static_base=args.static_base
+        ) as solver:
+            async def run_level(concurrency: int, count: int) -> Tuple[List[float], int]:
+                semaphore = asyncio.Semaphore(concurrency)
+
+                async def timed() -> Tuple[float, bool]:
+                    async with semaphore:
+                        start = time.perf_counter()
+                        result = await solver.solve(SITEKEY)
+                        return time.perf_counter() - start, result.status == "success"
+
+                outcomes = await asyncio.gather(*[timed() for _ in range(count)])
+                return [t for t, _ in outcomes], sum(1 for _, ok in outcomes if not ok)
+
+            await run_level(min(levels), args.warmup)
+            results = []
+            for concurrency in levels:
+                wall, cpu = time.perf_counter(), time.process_time()
+                latencies, failures = await run_level(concurrency, args.solves)
+                results.append(summarize(
+                    "async", concurrency, latencies, failures,
+                    time.perf_counter() - wall, time.process_time() - cpu
+                ))
+            return results
+
+    return asyncio.run(main())
+
+async def asgi_request(app: Any, method: str, path: str, body: Optional[dict] = None) -> Tuple[int, bytes]:
+    """Call an ASGI app directly, without a server or an HTTP client library."""
+    path, _, query = path.partition("?")
+    data = json.dumps(body).encode() if body is not None else b""
+    scope = {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": method,
+        "scheme": "http",
+        "path": path,
+        "raw_path": path.encode(),
+        "root_path": "",
+        "query_string": query.encode(),
+        "headers": [(b"host", b"bench"), (b"content-type", b"application/json")],
+        "client": ("127.0.0.1", 0),
+        "server": ("bench", 80)
+    }
+    received = False
+    status, chunks = 0, []
+
+    async def receive() -> dict:
+        nonlocal received
+        if not received:
+            received = True
+            return {"type": "http.request", "body": data, "more_body": False}
+        await asyncio.Future()
+
+    async def send(message: dict) -> None:
+        nonlocal status
+        if message["type"] == "http.response.start":
+            status = message["status"]
+        elif message["type"] == "http.response.body":
+            chunks.append(message.get("body", b""))
+
+    await app(scope, receive, send)
+    return status, b"".join(chunks)
+
+def bench_api(args: argparse.Namespace, levels: List[int]) -> List[Dict[str, Any]]:
+    os.environ["GEETEST_API_BASE"] = args.api_base
+    os.environ["GEETEST_STATIC_BASE"] = args.static_base
+    os.environ.setdefault("GEETEST_WORKERS", str(max(levels)))
+    os.environ.setdefault("GEETEST_LOG_LEVEL", "WARNING")
+    if not args.bg_cache:
+        os.environ["GEETEST_BG_CACHE_SIZE"] = "0"
+    import api_solver
+
+    app = api_solver.app
+
+    async def solve_one() -> Tuple[float, bool]:
+        start = time.perf_counter()
+        status, body = await asgi_request(app, "POST", "/task/create", {"sitekey": SITEKEY})
+        if status != 200:
+            return time.perf_counter() - start, False
+        task_id = json.loads(body)["taskId"]
+        _, body = await asgi_request(app, "GET", f"/task/{task_id}?wait=60")
+        return time.perf_counter() - start, json.loads(body)["status"] == "ready"
+
+    async def main() -> List[Dict[str, Any]]:
+        async with app.router.lifespan_context(app):
+            async def run_level(concurrency: int, count: int) -> Tuple[List[float], int]:
+                semaphore = asyncio.Semaphore(concurrency)
+
+                async def timed() -> Tuple[float, bool]:
+                    async with semaphore:
+                        return await solve_one()
+
+                outcomes = await asyncio.gather(*[timed() for _ in range(count)])
+                return [t for t, _ in outcomes], sum(1 for _, ok in outcomes if not ok)
+
+            await run_level(min(levels), args.warmup)
+            results = []
+            for concurrency in levels:
+                wall, cpu = time.perf_counter(), time.process_time()
+                latencies, failures = await run_level(concurrency, args.solves)
+                results.append(summarize(
+                    "api", concurrency, latencies, failures,
+                    time.perf_counter() - wall, time.process_time() - cpu
+                ))
+            return results
+
+    return asyncio.run(main())
+
+BENCHES = {"sync": bench_sync, "async": bench_async, "api": bench_api}
+
+@contextlib.contextmanager
+def mock_server(args: argparse.Namespace):
+    """Run the mock Geetest server in a child process for the duration of the block."""
+    command = [
+        sys.executable, os.path.join(BENCH_DIR, "mock_geetest.py"),
+        "--port", str(args.port),
+        "--latency", str(args.latency),
+        "--jitter", str(args.jitter),
+        "--error-rate", str(args.error_rate),
+        "--miss-rate", str(args.miss_rate),
+        "--backgrounds", str(args.backgrounds)
+    ]
+    process = subprocess.Popen(command, stdout=subprocess.PIPE, text=True)
+    try:
+        line = process.stdout.readline()
+        if "listening" not in line:
+            raise RuntimeError(f"Mock server failed to start: {line.strip() or process.wait()}")
+        yield
+    finally:
+        process.terminate()
+        process.wait()
+
+def compare(results: List[Dict[str, Any]], baseline_path: str, tolerance: float) -> List[str]:
+    """Regressions against a previous ``--json`` file: lower throughput or higher p95."""
+    with open(baseline_path, "r", encoding="utf-8") as f:
+        baseline = {(r["mode"], r["concurrency"]): r for r in json.load(f)["results"]}
+
+    regressions = []
+    for result in results:
+        old = baseline.get((result["mode"], result["concurrency"]))
+        if old is None:
+            continue
+        label = f"{result['mode']} x{result['concurrency']}"
+        if result["solves_per_sec"] < old["solves_per_sec"] * (1 - tolerance):
+            regressions.append(f"{label}: {result['solves_per_sec']} solves/s < baseline {old['solves_per_sec']}")
+        if result["p95_ms"] > old["p95_ms"] * (1 + tolerance):
+            regressions.append(f"{label}: p95 {result['p95_ms']} ms > baseline {old['p95_ms']}")
+    return regressions
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--modes", default="sync,async,api", help="Comma-separated subset of sync, async, api")
+    parser.add_argument("--concurrency", default="1,8,32", help="Comma-separated concurrency levels")
+    parser.add_argument("--solves", type=int, default=200, help="Solves per mode and level")
+    parser.add_argument("--warmup", type=int, default=10, help="Unmeasured solves before each mode")
+    parser.add_argument("--port", type=int, default=18080)
+    parser.add_argument("--latency", type=float, default=0.05, help="Mock server mean response delay (s)")
+    parser.add_argument("--jitter", type=float, default=0.02, help="Mock server delay standard deviation (s)")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Mock server HTTP 500 rate")
+    parser.add_argument("--miss-rate", type=float, default=0.0, help="Mock server share of backgrounds missing from the index")
+    parser.add_argument("--backgrounds", type=int, default=64, help="Distinct backgrounds the mock serves")
+    parser.add_argument("--bg-cache", action=argparse.BooleanOptionalAction, default=True,
+                        help="Use the background cache (disable to hash every background)")
+    parser.add_argument("--json", help="Write results as JSON to this file ('-' for stdout)")
+    parser.add_argument("--baseline", help="Earlier --json output to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.15, help="Allowed relative regression vs. the baseline")
+    args = parser.parse_args()
+
+    modes = [mode.strip() for mode in args.modes.split(",") if mode.strip()]
+    levels = sorted(int(level) for level in args.concurrency.split(","))
+    unknown = set(modes) - set(BENCHES)
+    if unknown:
+        parser.error(f"unknown modes: {', '.join(sorted(unknown))}")
+
+    args.api_base = f"http://127.0.0.1:{args.port}"
+    args.static_base = f"http://127.0.0.1:{args.port}/static/"
+
+    results: List[Dict[str, Any]] = []
+    with mock_server(args):
+        for mode in modes:
+            # Solvers run quiet, but keep stray console output out of the report.
+            with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+                mode_results = BENCHES[mode](args, levels)
+            for r in mode_results:
+                print(f"{r['mode']:<6} x{r['concurrency']:<4} {r['solves_per_sec']:>8.1f} solves/s  "
+                      f"p50 {r['p50_ms']:>7.1f} ms  p95 {r['p95_ms']:>7.1f} ms  p99 {r['p99_ms']:>7.1f} ms  "
+                      f"cpu {r['cpu_percent']:>5.1f}%  rss {r['rss_mb']:>6.1f} MB  failures {r['failures']}", flush=True)
+            results.extend(mode_results)
+
+    report = {
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpus": os.cpu_count(),
+        "config": {
+            "solves": args.solves,
+            "latency": args.latency,
+            "jitter": args.jitter,
+            "error_rate": args.error_rate,
+            "miss_rate": args.miss_rate,
+            "backgrounds": args.backgrounds,
+            "bg_cache": args.bg_cache
+        },
+        "results": results
+    }
+    if args.json == "-":
+        print(json.dumps(report, indent=2))
+    elif args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+
+    if args.baseline:
+        regressions = compare(results, args.baseline, args.tolerance)
+        for regression in regressions:
+            print(f"REGRESSION {regression}", file=sys.stderr)
+        return 1 if regressions else 0
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,108 @@
+"""
+Per-solve CPU cost of payload encoding: the previous inline code path versus encoder.PayloadEncoder.
+
+Covers GUID generation, JSONP parsing of the load and verify bodies,
+serializing ``w_data`` and the AES + RSA encryption of ``w``.
+
+Usage:
+    python benchmarks/bench_encoder.py [--iterations 2000]
+"""
+import argparse
+import hashlib
+import json
+import os
+import secrets
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from Crypto.Cipher import AES
+from Crypto.Util.Padding import pad
+
+from encoder import GEETEST_RSA_E, GEETEST_RSA_N, extract_jsonp, get_encoder, orjson
+
+CALLBACK = "geetest_1731500000000"
+LOAD_BODY = CALLBACK + "(" + json.dumps({
+    "status": "success",
+    "data": {
+        "lot_number": "a" * 32,
+        "process_token": "b" * 64,
+        "payload": "c" * 1200,
+        "pow_detail": {"datetime": "2024-11-13T12:00:00.000000+08:00"},
+        "bg": "captcha_v4/e70fbf1d77/slide/0af8d91d43/2022-04-21T09/bg/5b2a1a22ae2e4b2c97d6bd1ee6d6b2a1.png"
+    }
+}) + ")"
+VERIFY_BODY = CALLBACK + "(" + json.dumps({
+    "status": "success",
+    "data": {
+        "result": "success",
+        "seccode": {"lot_number": "a" * 32, "pass_token": "d" * 64, "gen_time": "1731500000", "captcha_output": "e" * 400},
+        "payload": "f" * 800
+    }
+}) + ")"
+
+def w_data(guid: str) -> dict:
+    pow_msg = f"1|0|md5|2024-11-13T12:00:00.000000+08:00|sitekey|lot||{guid}"
+    return {
+        "device_id": hashlib.md5(b"0.5").hexdigest(),
+        "em": {"ph": 0, "cp": 0, "ek": "11", "wd": 1, "nt": 0, "si": 0, "sc": 0},
+        "ep": "123",
+        "gee_guard": None,
+        "geetest": "captcha",
+        "lang": "zh",
+        "lot_number": "a" * 32,
+        "passtime": 600,
+        "pow_msg": pow_msg,
+        "pow_sign": hashlib.md5(pow_msg.encode()).hexdigest(),
+        "setLeft": 200,
+        "userresponse": 200.5,
+        "yeg6": "d6w9"
+    }
+
+def legacy_solve_cpu(rsa) -> None:
+    """The encoding work GeetestSolver.solve did before PayloadEncoder."""
+    json.loads(LOAD_BODY.split(f"{CALLBACK}(")[1][:-1])
+    guid = "".join(secrets.token_hex(2) for _ in range(4))
+    data = json.dumps(w_data(guid))
+    key = "".join(secrets.token_hex(2) for _ in range(4))
+    ciphertext = rsa.encrypt(key.encode(), rsa.PublicKey(GEETEST_RSA_N, GEETEST_RSA_E)).hex()
+    encryptor = AES.new(key.encode("utf-8"), AES.MODE_CBC, b"0000000000000000")
+    encrypted = encryptor.encrypt(pad(data.encode("utf-8"), AES.block_size, style="pkcs7")).hex()
+    encrypted + ciphertext
+    json.loads(VERIFY_BODY.split(f"{CALLBACK}(")[1][:-1])
+
+def encoder_solve_cpu() -> None:
+    encoder = get_encoder()
+    extract_jsonp(LOAD_BODY, CALLBACK)
+    encoder.encode_w(w_data(encoder.guid()))
+    extract_jsonp(VERIFY_BODY, CALLBACK)
+
+def bench(label: str, func, iterations: int) -> float:
+    func()
+    start = time.process_time()
+    for _ in range(iterations):
+        func()
+    per_solve = (time.process_time() - start) / iterations
+    print(f"{label:<22} {per_solve * 1e6:9.1f} us CPU/solve")
+    return per_solve
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--iterations", type=int, default=2000)
+    args = parser.parse_args()
+
+    print(f"orjson: {'yes' if orjson is not None else 'no (stdlib json)'}")
+    new = bench("PayloadEncoder", encoder_solve_cpu, args.iterations)
+
+    try:
+        import rsa
+    except ImportError:
+        print("rsa package not installed; skipping the legacy comparison")
+        return
+
+    old = bench("legacy inline path", lambda: legacy_solve_cpu(rsa), args.iterations)
+    print(f"speedup: {old / new:.2f}x")
+
+if __name__ == "__main__":
+    main()
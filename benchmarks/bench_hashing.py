@@ -0,0 +1,88 @@
+"""
+Compare the vectorized phash engine against imagehash.phash.
+
+Usage:
+    python benchmarks/bench_hashing.py [--images 200] [--width 300] [--height 200]
+"""
+import argparse
+import os
+import subprocess
+import sys
+import time
+from io import BytesIO
+
+import numpy as np
+from PIL import Image
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from hashing import hash_image, hash_images, phash_int
+
+SAMPLE_PATH = os.path.join(os.environ.get("TMPDIR", "/tmp"), "geetest_bench_background.jpg")
+
+def make_backgrounds(count: int, width: int, height: int) -> list:
+    """Smooth random JPEGs roughly shaped like Geetest backgrounds."""
+    rng = np.random.RandomState(0)
+    images = []
+    for _ in range(count):
+        coarse = rng.randint(0, 255, (height // 10, width // 10, 3)).astype(np.uint8)
+        image = Image.fromarray(coarse).resize((width, height), Image.BILINEAR)
+        buffer = BytesIO()
+        image.save(buffer, "JPEG", quality=85)
+        images.append(buffer.getvalue())
+    return images
+
+def timed(label: str, func, images: list, repeat: int = 5) -> float:
+    """Best-of-``repeat`` wall time per image, to keep noisy boxes honest."""
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func(images)
+        best = min(best, time.perf_counter() - start)
+    print(f"{label:<28} {best / len(images) * 1e6:10.1f} us/image")
+    return best
+
+def cold_first_hash(snippet: str) -> float:
+    """Wall time of imports plus one hash in a fresh interpreter."""
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    setup = "from io import BytesIO; from PIL import Image; data = open(%r, 'rb').read(); " % SAMPLE_PATH
+    start = time.perf_counter()
+    subprocess.run([sys.executable, "-c", setup + snippet], cwd=root, check=True)
+    return time.perf_counter() - start
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--images", type=int, default=200)
+    parser.add_argument("--width", type=int, default=300)
+    parser.add_argument("--height", type=int, default=200)
+    args = parser.parse_args()
+
+    images = make_backgrounds(args.images, args.width, args.height)
+    hash_image(images[0])
+
+    try:
+        import imagehash
+    except ImportError:
+        imagehash = None
+
+    if imagehash is not None:
+        reference = [str(imagehash.phash(Image.open(BytesIO(data)))) for data in images]
+        identical = sum(ref == hash_image(data) for ref, data in zip(reference, images))
+        print(f"bit-identical to imagehash: {identical}/{len(images)}")
+        timed("imagehash.phash", lambda batch: [str(imagehash.phash(Image.open(BytesIO(d)))) for d in batch], images)
+
+    timed("hashing.hash_image", lambda batch: [hash_image(d) for d in batch], images)
+    timed("hashing.hash_images (batch)", hash_images, images)
+    timed("hashing.phash_int (draft)", lambda batch: [phash_int(d, draft=True) for d in batch], images)
+
+    with open(SAMPLE_PATH, "wb") as f:
+        f.write(images[0])
+    cold = cold_first_hash("import hashing; hashing.hash_image(data)")
+    print(f"{'cold import + hash: hashing':<28} {cold * 1e3:10.1f} ms")
+    if imagehash is not None:
+        cold = cold_first_hash("import imagehash; str(imagehash.phash(Image.open(BytesIO(data))))")
+        print(f"{'cold import + hash: imagehash':<28} {cold * 1e3:10.1f} ms")
+    os.remove(SAMPLE_PATH)
+
+if __name__ == "__main__":
+    main()
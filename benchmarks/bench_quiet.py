@@ -0,0 +1,87 @@
+"""
+Throughput of console mode (logmagix spinner + coloured lines) versus quiet
+server mode (queued structured logging) against the local mock server.
+
+Console output goes to /dev/null so the terminal itself is not measured; a
+real TTY only makes console mode slower.
+
+Usage:
+    python benchmarks/bench_quiet.py [--solves 300] [--concurrency 32]
+"""
+import argparse
+import asyncio
+import contextlib
+import logging
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Tuple
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(BENCH_DIR))
+
+from async_solver import AsyncGeetestSolver
+from bench_e2e import SITEKEY, mock_server
+from server_logging import start_queue_logging, stop_queue_logging
+from sync_solver import GeetestSolver
+
+def run_async(args: argparse.Namespace, quiet: bool) -> Tuple[float, float]:
+    async def main() -> Tuple[float, float]:
+        async with AsyncGeetestSolver(quiet=quiet, api_base=args.api_base, static_base=args.static_base) as solver:
+            semaphore = asyncio.Semaphore(args.concurrency)
+
+            async def one() -> None:
+                async with semaphore:
+                    await solver.solve(SITEKEY)
+
+            await asyncio.gather(*[one() for _ in range(args.warmup)])
+            wall, cpu = time.perf_counter(), time.process_time()
+            await asyncio.gather(*[one() for _ in range(args.solves)])
+            return time.perf_counter() - wall, time.process_time() - cpu
+
+    return asyncio.run(main())
+
+def run_sync(args: argparse.Namespace, quiet: bool) -> Tuple[float, float]:
+    with GeetestSolver(quiet=quiet, pool_maxsize=args.concurrency, api_base=args.api_base, static_base=args.static_base) as solver:
+        with ThreadPoolExecutor(max_workers=args.concurrency) as pool:
+            list(pool.map(solver.solve, [SITEKEY] * args.warmup))
+            wall, cpu = time.perf_counter(), time.process_time()
+            list(pool.map(solver.solve, [SITEKEY] * args.solves))
+            return time.perf_counter() - wall, time.process_time() - cpu
+
+def measure(label: str, run, args: argparse.Namespace, quiet: bool) -> float:
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        if quiet:
+            start_queue_logging(logging.INFO, stream=devnull)
+        try:
+            wall, cpu = run(args, quiet)
+        finally:
+            if quiet:
+                stop_queue_logging()
+    print(f"{label:<14} {args.solves / wall:>8.1f} solves/s  {cpu / args.solves * 1000:>7.2f} ms CPU/solve")
+    return cpu
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--solves", type=int, default=300)
+    parser.add_argument("--warmup", type=int, default=20)
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--port", type=int, default=18080)
+    parser.add_argument("--latency", type=float, default=0.01, help="Mock server mean response delay (s)")
+    parser.add_argument("--jitter", type=float, default=0.0)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--miss-rate", type=float, default=0.0)
+    parser.add_argument("--backgrounds", type=int, default=64)
+    args = parser.parse_args()
+    args.api_base = f"http://127.0.0.1:{args.port}"
+    args.static_base = f"http://127.0.0.1:{args.port}/static/"
+
+    with mock_server(args):
+        for name, run in (("async", run_async), ("sync", run_sync)):
+            console = measure(f"{name} console", run, args, quiet=False)
+            quiet = measure(f"{name} quiet", run, args, quiet=True)
+            print(f"{name} quiet mode: {console / quiet:.2f}x less CPU per solve")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+"""
+Create and lookup throughput of the task store backends.
+
+``lookup`` decodes a task into a dict; ``body`` fetches the pre-serialized
+response body that ``/task/{id}`` sends. For the memory store, ``memory``
+is the Python heap held per finished task.
+
+Usage:
+    python benchmarks/bench_task_store.py [--tasks 50000] [--sqlite /tmp/geetest_tasks.db]
+"""
+import argparse
+import os
+import sys
+import time
+import tracemalloc
+import uuid
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from task_store import MemoryTaskStore, SQLiteTaskStore, TaskStore
+
+SOLUTION = {
+    "captcha_id": "e392e1d7fd421dc63325744d5a2b9c73",
+    "lot_number": "a" * 32,
+    "pass_token": "d" * 64,
+    "gen_time": "1731500000",
+    "captcha_output": "e" * 400,
+    "elapsed": 3.21,
+    "queued": 0.05,
+    "stages": {"load": 0.4, "download": 0.3, "hash": 0.01, "encrypt": 0.002, "verify": 0.5},
+    "attempts": 1,
+    "misses": 0
+}
+
+def bench(label: str, store: TaskStore, count: int) -> None:
+    ids = [str(uuid.uuid4()) for _ in range(count)]
+
+    start = time.perf_counter()
+    for task_id in ids:
+        store.create(task_id)
+    create = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for task_id in ids:
+        store.update(task_id, "ready", solution=SOLUTION)
+    update = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for task_id in ids:
+        store.get(task_id)
+    lookup = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for task_id in ids:
+        store.get_body(task_id)
+    body = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for _ in range(count):
+        store.get("missing")
+    miss = time.perf_counter() - start
+
+    print(f"{label:<8} create {count / create:>10.0f}/s  update {count / update:>10.0f}/s  "
+          f"lookup {count / lookup:>10.0f}/s  body {count / body:>10.0f}/s  miss {count / miss:>10.0f}/s  "
+          f"size {len(store)}")
+
+def memory_per_task(count: int) -> float:
+    """Bytes of Python heap a ``MemoryTaskStore`` holds per finished task."""
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    store = MemoryTaskStore(max_size=count)
+    for _ in range(count):
+        task_id = str(uuid.uuid4())
+        store.create(task_id)
+        store.update(task_id, "ready", solution=dict(SOLUTION, pass_token=uuid.uuid4().hex * 2))
+    held = tracemalloc.get_traced_memory()[0] - before
+    tracemalloc.stop()
+    return held / count
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--tasks", type=int, default=50000)
+    parser.add_argument("--sqlite", default=os.path.join(os.environ.get("TMPDIR", "/tmp"), "geetest_bench_tasks.db"))
+    args = parser.parse_args()
+
+    bench("memory", MemoryTaskStore(max_size=args.tasks), args.tasks)
+    print(f"memory   {memory_per_task(min(args.tasks, 10000)):.0f} bytes per finished task")
+
+    for suffix in ("", "-wal", "-shm"):
+        if os.path.exists(args.sqlite + suffix):
+            os.remove(args.sqlite + suffix)
+    store = SQLiteTaskStore(args.sqlite, max_size=args.tasks)
+    try:
+        bench("sqlite", store, args.tasks)
+    finally:
+        store.close()
+
+if __name__ == "__main__":
+    main()
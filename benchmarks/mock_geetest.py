@@ -0,0 +1,334 @@
+"""
+Local stand-in for the Geetest v4 endpoints, for load tests and benchmarks.
+
+Serves ``/load``, ``/verify`` and ``/static/...`` with configurable latency,
+jitter and error rates. Backgrounds are synthesized so that their phash is a
+real entry of the image index: a grayscale pattern is built by inverting the
+8x8 DCT the hash is computed from, upscaled to Geetest's background size and
+checked with ``hashing.hash_image`` before it is served.
+
+Usage:
+    python benchmarks/mock_geetest.py [--port 18080] [--latency 0.05] [--jitter 0.02] [--error-rate 0.01] [--miss-rate 0.1]
+
+Point a solver at it with ``api_base=server.url`` and
+``static_base=server.static_url``, or the API with ``GEETEST_API_BASE`` and
+``GEETEST_STATIC_BASE``.
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import sys
+import threading
+import uuid
+from io import BytesIO
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+from aiohttp import web
+from PIL import Image
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from hashing import DCT_BASIS, IMAGE_SIZE, hash_image
+from image_index import DEFAULT_MAX_DISTANCE, ImageIndex, get_index
+
+BACKGROUND_SIZE = (300, 160)
+
+# Pseudo-inverse of the DCT rows: the basis rows are orthogonal, so scaling
+# each by its squared norm inverts ``DCT_BASIS @ pixels @ DCT_BASIS.T``.
+_DCT_PINV = DCT_BASIS.T / (DCT_BASIS ** 2).sum(axis=1)
+
+def synthesize_background(
+    image_hash: str,
+    size: Tuple[int, int] = BACKGROUND_SIZE,
+    image_format: str = "JPEG",
+    amplitude: float = 3000.0
+) -> bytes:
+    """
+    Build an image whose phash is ``image_hash``.
+
+    Works for hashes with exactly 32 set bits and the DC bit set, which is
+    every hash of a natural image (the median splits the 64 coefficients in
+    half and the mean brightness dominates).
+    """
+    bits = np.unpackbits(np.frombuffer(int(image_hash, 16).to_bytes(8, "big"), dtype=np.uint8))
+    coefficients = np.where(bits.reshape(8, 8) == 1, amplitude, -amplitude)
+    coefficients[0, 0] = 4 * IMAGE_SIZE * IMAGE_SIZE * 128.0
+    pixels = _DCT_PINV @ coefficients @ _DCT_PINV.T
+
+    image = Image.fromarray(np.clip(np.round(pixels), 0, 255).astype(np.uint8), "L")
+    image = image.resize(size, Image.BICUBIC).convert("RGB")
+    buffer = BytesIO()
+    image.save(buffer, image_format, **({"quality": 85} if image_format == "JPEG" else {}))
+    return buffer.getvalue()
+
+def build_backgrounds(
+    count: int,
+    index: Optional[ImageIndex] = None,
+    seed: int = 0,
+    image_format: str = "JPEG"
+) -> List[Tuple[str, int, bytes]]:
+    """
+    Pick ``count`` index entries and synthesize a background for each.
+
+    Returns:
+        ``(hash, offset, image bytes)`` tuples whose image hashes back to ``hash``
+    """
+    index = index or get_index()
+    entries = [
+        (image_hash, offset) for image_hash, offset in index.items()
+        if bin(int(image_hash, 16)).count("1") == 32 and int(image_hash, 16) >> 63
+    ]
+    random.Random(seed).shuffle(entries)
+
+    backgrounds = []
+    for image_hash, offset in entries:
+        data = synthesize_background(image_hash, image_format=image_format)
+        if hash_image(data) == image_hash:
+            backgrounds.append((image_hash, offset, data))
+            if len(backgrounds) >= count:
+                break
+    return backgrounds
+
+def build_unknown_backgrounds(count: int, index: Optional[ImageIndex] = None, seed: int = 0, image_format: str = "JPEG") -> List[bytes]:
+    """Random backgrounds with no index entry within ``DEFAULT_MAX_DISTANCE`` bits."""
+    index = index or get_index()
+    rng = np.random.RandomState(seed + 1)
+    backgrounds = []
+    while len(backgrounds) < count:
+        coarse = rng.randint(0, 255, (16, 30, 3)).astype(np.uint8)
+        image = Image.fromarray(coarse).resize(BACKGROUND_SIZE, Image.BILINEAR)
+        buffer = BytesIO()
+        image.save(buffer, image_format, **({"quality": 85} if image_format == "JPEG" else {}))
+        if index.nearest(hash_image(buffer.getvalue()), DEFAULT_MAX_DISTANCE) is None:
+            backgrounds.append(buffer.getvalue())
+    return backgrounds
+
+class MockGeetestServer:
+    """
+    aiohttp app imitating the Geetest endpoints the solvers call.
+
+    Every response is delayed by ``latency`` seconds plus normally distributed
+    ``jitter``. ``error_rate`` of requests (any endpoint) get an HTTP 500 and
+    ``fail_rate`` of verifications answer ``"result": "fail"``. ``miss_rate``
+    of challenges use a background that is not in the image index. Can run on the
+    caller's loop (``start``/``stop``) or in a daemon thread (``start_in_thread``)
+    for synchronous clients.
+    """
+
+    def __init__(
+        self,
+        host: str = "127.0.0.1",
+        port: int = 18080,
+        latency: float = 0.05,
+        jitter: float = 0.02,
+        error_rate: float = 0.0,
+        fail_rate: float = 0.0,
+        miss_rate: float = 0.0,
+        backgrounds: int = 64,
+        image_format: str = "JPEG",
+        seed: int = 0
+    ):
+        self.host = host
+        self.port = port
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.fail_rate = fail_rate
+        self.miss_rate = miss_rate
+        self.backgrounds = build_backgrounds(backgrounds, seed=seed, image_format=image_format)
+        if not self.backgrounds:
+            raise ValueError("No index entry could be turned into a background")
+        self.extension = "jpg" if image_format == "JPEG" else image_format.lower()
+        self._images: Dict[str, bytes] = {
+            f"pictures/mock/{i}.{self.extension}": data for i, (_, _, data) in enumerate(self.backgrounds)
+        }
+        if miss_rate:
+            for i, data in enumerate(build_unknown_backgrounds(8, seed=seed, image_format=image_format)):
+                self._images[f"pictures/mock/unknown/{i}.{self.extension}"] = data
+        self._random = random.Random(seed)
+        self._runner: Optional[web.AppRunner] = None
+        self._thread: Optional[threading.Thread] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self.requests = {"load": 0, "verify": 0, "static": 0, "errors": 0}
+
+    @property
+    def url(self) -> str:
+        """Base URL to pass as ``api_base``."""
+        return f"http://{self.host}:{self.port}"
+
+    @property
+    def static_url(self) -> str:
+        """Base URL to pass as ``static_base``."""
+        return f"http://{self.host}:{self.port}/static/"
+
+    def make_app(self) -> web.Application:
+        app = web.Application()
+        app.router.add_get("/load", self._load)
+        app.router.add_get("/verify", self._verify)
+        app.router.add_get("/static/{path:.*}", self._static)
+        return app
+
+    async def _delay(self) -> None:
+        delay = self.latency + (self._random.gauss(0.0, self.jitter) if self.jitter else 0.0)
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+    def _error(self) -> Optional[web.Response]:
+        if self.error_rate and self._random.random() < self.error_rate:
+            self.requests["errors"] += 1
+            return web.Response(status=500, text="mock error")
+        return None
+
+    @staticmethod
+    def _jsonp(callback: str, body: dict) -> web.Response:
+        return web.Response(text=f"{callback}({json.dumps(body)})", content_type="application/javascript")
+
+    async def _load(self, request: web.Request) -> web.Response:
+        self.requests["load"] += 1
+        await self._delay()
+        error = self._error()
+        if error is not None:
+            return error
+
+        if self.miss_rate and self._random.random() < self.miss_rate:
+            bg = f"pictures/mock/unknown/{self._random.randrange(8)}.{self.extension}"
+        else:
+            bg = f"pictures/mock/{self._random.randrange(len(self.backgrounds))}.{self.extension}"
+        return self._jsonp(request.query.get("callback", "geetest"), {
+            "status": "success",
+            "data": {
+                "lot_number": uuid.uuid4().hex,
+                "process_token": uuid.uuid4().hex * 2,
+                "payload": "p" * 256,
+                "pow_detail": {"hashfunc": "md5", "version": "1", "bits": 0, "datetime": "2024-11-13T12:00:00.000000+08:00"},
+                "bg": bg
+            }
+        })
+
+    async def _verify(self, request: web.Request) -> web.Response:
+        self.requests["verify"] += 1
+        await self._delay()
+        error = self._error()
+        if error is not None:
+            return error
+
+        if not request.query.get("w"):
+            return web.Response(status=400, text="missing w")
+
+        result = "fail" if self.fail_rate and self._random.random() < self.fail_rate else "success"
+        lot_number = request.query.get("lot_number", "")
+        return self._jsonp(request.query.get("callback", "geetest"), {
+            "status": "success",
+            "data": {
+                "lot_number": lot_number,
+                "result": result,
+                "seccode": {
+                    "captcha_id": request.query.get("captcha_id", ""),
+                    "lot_number": lot_number,
+                    "pass_token": uuid.uuid4().hex * 2,
+                    "gen_time": "1731499200",
+                    "captcha_output": "o" * 160
+                } if result == "success" else None,
+                "payload": "p" * 128
+            }
+        })
+
+    async def _static(self, request: web.Request) -> web.Response:
+        self.requests["static"] += 1
+        await self._delay()
+        error = self._error()
+        if error is not None:
+            return error
+
+        data = self._images.get(request.match_info["path"])
+        if data is None:
+            return web.Response(status=404)
+        return web.Response(body=data, content_type=f"image/{'jpeg' if self.extension == 'jpg' else self.extension}")
+
+    async def start(self) -> None:
+        """Serve on the running loop."""
+        self._runner = web.AppRunner(self.make_app(), access_log=None)
+        await self._runner.setup()
+        await web.TCPSite(self._runner, self.host, self.port).start()
+
+    async def stop(self) -> None:
+        if self._runner is not None:
+            await self._runner.cleanup()
+            self._runner = None
+
+    def start_in_thread(self) -> "MockGeetestServer":
+        """Serve from a daemon thread with its own event loop; returns once listening."""
+        started = threading.Event()
+        failure: List[BaseException] = []
+
+        def run() -> None:
+            self._loop = asyncio.new_event_loop()
+            asyncio.set_event_loop(self._loop)
+            try:
+                self._loop.run_until_complete(self.start())
+            except BaseException as e:
+                failure.append(e)
+                started.set()
+                return
+            started.set()
+            self._loop.run_forever()
+            self._loop.run_until_complete(self.stop())
+            self._loop.close()
+
+        self._thread = threading.Thread(target=run, name="mock-geetest", daemon=True)
+        self._thread.start()
+        started.wait()
+        if failure:
+            raise failure[0]
+        return self
+
+    def stop_thread(self) -> None:
+        if self._thread is not None and self._loop is not None:
+            self._loop.call_soon_threadsafe(self._loop.stop)
+            self._thread.join()
+            self._thread = None
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=18080)
+    parser.add_argument("--latency", type=float, default=0.05, help="Mean seconds added to every response")
+    parser.add_argument("--jitter", type=float, default=0.02, help="Standard deviation of the added delay")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Fraction of requests answered with HTTP 500")
+    parser.add_argument("--fail-rate", type=float, default=0.0, help="Fraction of verifications answered with result=fail")
+    parser.add_argument("--miss-rate", type=float, default=0.0, help="Fraction of challenges whose background is not in the index")
+    parser.add_argument("--backgrounds", type=int, default=64, help="Distinct backgrounds to serve")
+    parser.add_argument("--format", default="JPEG", choices=("JPEG", "PNG", "WEBP"))
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    server = MockGeetestServer(
+        args.host, args.port,
+        latency=args.latency,
+        jitter=args.jitter,
+        error_rate=args.error_rate,
+        fail_rate=args.fail_rate,
+        miss_rate=args.miss_rate,
+        backgrounds=args.backgrounds,
+        image_format=args.format,
+        seed=args.seed
+    )
+
+    async def serve() -> None:
+        await server.start()
+        print(f"Mock Geetest listening on {server.url} ({len(server.backgrounds)} backgrounds)", flush=True)
+        try:
+            await asyncio.Event().wait()
+        finally:
+            await server.stop()
+
+    try:
+        asyncio.run(serve())
+    except KeyboardInterrupt:
+        pass
+
+if __name__ == "__main__":
+    main()
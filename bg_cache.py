@@ -0,0 +1,172 @@
+import hashlib
+import json
+import os
+import sys
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+
+# Rough per-entry cost of the OrderedDict slot and the (set_left, expires)
+# tuple, on top of the key string itself.
+ENTRY_OVERHEAD = 160
+
+class BackgroundCache:
+    """
+    Content-addressed cache of background image -> resolved ``set_left``.
+
+    Entries are keyed both by the ``bg`` path from the load response and by
+    a digest of the image bytes: a path hit skips the download, a digest hit
+    skips decode and hashing. Eviction is LRU, bounded by entry count and an
+    approximate memory cap, with a TTL on every entry.
+    """
+
+    def __init__(
+        self,
+        max_entries: int = 4096,
+        ttl: float = 3600.0,
+        max_bytes: int = 4 * 1024 * 1024,
+        path: Optional[str] = None
+    ):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self.path = path
+        self._entries: "OrderedDict[str, Tuple[int, float]]" = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.path_hits = 0
+        self.digest_hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @staticmethod
+    def digest(image_data: bytes) -> str:
+        """Content digest used as the image-bytes cache key."""
+        return hashlib.blake2b(image_data, digest_size=16).hexdigest()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def _get(self, key: str) -> Optional[int]:
+        # Caller holds the lock.
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        if entry[1] < time.time():
+            self._remove(key)
+            return None
+        self._entries.move_to_end(key)
+        return entry[0]
+
+    def get_path(self, bg: str) -> Optional[int]:
+        """Look up a background by its ``bg`` path."""
+        with self._lock:
+            set_left = self._get("bg:" + bg)
+            if set_left is not None:
+                self.path_hits += 1
+        return set_left
+
+    def get_digest(self, digest: str) -> Optional[int]:
+        """Look up a background by the digest of its bytes."""
+        with self._lock:
+            set_left = self._get("b2:" + digest)
+            if set_left is None:
+                self.misses += 1
+            else:
+                self.digest_hits += 1
+        return set_left
+
+    def put(self, bg: Optional[str], digest: Optional[str], set_left: int) -> None:
+        """Remember the resolved ``set_left`` under the path and digest keys."""
+        if self.max_entries <= 0:
+            return
+
+        expires = time.time() + self.ttl
+        with self._lock:
+            for key in (f"bg:{bg}" if bg else None, f"b2:{digest}" if digest else None):
+                if key is None:
+                    continue
+                if key in self._entries:
+                    self._entries.move_to_end(key)
+                else:
+                    self._bytes += sys.getsizeof(key) + ENTRY_OVERHEAD
+                self._entries[key] = (set_left, expires)
+            self._evict()
+
+    def _remove(self, key: str) -> None:
+        del self._entries[key]
+        self._bytes -= sys.getsizeof(key) + ENTRY_OVERHEAD
+
+    def _evict(self) -> None:
+        while self._entries and (len(self._entries) > self.max_entries or self._bytes > self.max_bytes):
+            key = next(iter(self._entries))
+            self._remove(key)
+            self.evictions += 1
+
+    def clear(self) -> None:
+        """Drop every entry, e.g. after the image index changes."""
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self) -> Dict[str, Any]:
+        """Hit/miss counters and current size."""
+        lookups = self.path_hits + self.digest_hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "approx_bytes": self._bytes,
+            "path_hits": self.path_hits,
+            "digest_hits": self.digest_hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": round((self.path_hits + self.digest_hits) / lookups, 4) if lookups else 0.0
+        }
+
+    def load(self, path: Optional[str] = None) -> int:
+        """
+        Restore unexpired entries from a file written by ``save``.
+
+        Returns:
+            Number of entries loaded
+        """
+        path = path or self.path
+        if not path or not os.path.exists(path):
+            return 0
+
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+
+        now = time.time()
+        with self._lock:
+            for key, (set_left, expires) in data.items():
+                if expires < now:
+                    continue
+                if key.startswith("sha:"):
+                    # Files saved before digest keys were renamed.
+                    key = "b2:" + key[4:]
+                if key not in self._entries:
+                    self._bytes += sys.getsizeof(key) + ENTRY_OVERHEAD
+                self._entries[key] = (int(set_left), float(expires))
+            self._evict()
+            return len(self._entries)
+
+    def save(self, path: Optional[str] = None) -> int:
+        """
+        Persist the cache to a local file so warm state survives restarts.
+
+        Returns:
+            Number of entries written
+        """
+        path = path or self.path
+        if not path:
+            return 0
+
+        with self._lock:
+            data = dict(self._entries)
+
+        tmp_path = f"{path}.tmp.{os.getpid()}"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(data, f, separators=(",", ":"))
+        os.replace(tmp_path, path)
+        return len(data)
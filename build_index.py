@@ -0,0 +1,278 @@
+"""
+Build the image index file the solvers load.
+
+Hashes a directory tree or tarball of background images with known slider
+offsets in a process pool, deduplicates near-identical hashes, reports
+conflicting offsets and writes the compact index read by ``image_index``.
+
+Offsets come from a ``--labels`` CSV (``filename,offset``) or, failing that,
+from the file name via ``--offset-pattern`` (default: a leading number, as in
+``231_bg.jpg``).
+
+Usage:
+    python build_index.py backgrounds/ -o data/image_index.bin
+    python build_index.py new_batch.tar.gz -o data/image_index.bin --incremental --workers 8
+"""
+import argparse
+import csv
+import json
+import os
+import re
+import sys
+import tarfile
+import time
+from collections import Counter, defaultdict
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Iterator, List, Optional, Tuple, Union
+
+import numpy as np
+
+from hashing import hash_images
+from image_index import MAX_OFFSET, ImageIndex, popcount64, write_index
+
+IMAGE_EXTENSIONS = (".jpg", ".jpeg", ".png", ".webp", ".bmp")
+DEFAULT_OFFSET_PATTERN = r"^(?P<offset>\d+)[_\-.]"
+
+# (key, path on disk or raw bytes, size, mtime)
+Source = Tuple[str, Union[str, bytes], int, float]
+
+def iter_sources(paths: List[str]) -> Iterator[Source]:
+    """Yield every image found in the given directories, files and tarballs."""
+    for path in paths:
+        if os.path.isdir(path):
+            for root, _, files in os.walk(path):
+                for name in sorted(files):
+                    if not name.lower().endswith(IMAGE_EXTENSIONS):
+                        continue
+                    full = os.path.join(root, name)
+                    stat = os.stat(full)
+                    yield os.path.relpath(full, path), full, stat.st_size, stat.st_mtime
+        elif tarfile.is_tarfile(path):
+            with tarfile.open(path) as tar:
+                for member in tar:
+                    if not member.isfile() or not member.name.lower().endswith(IMAGE_EXTENSIONS):
+                        continue
+                    data = tar.extractfile(member).read()
+                    yield member.name, data, member.size, float(member.mtime)
+        elif os.path.isfile(path):
+            stat = os.stat(path)
+            yield os.path.basename(path), path, stat.st_size, stat.st_mtime
+        else:
+            raise FileNotFoundError(path)
+
+def load_labels(path: str) -> Dict[str, int]:
+    """Read ``filename,offset`` rows; names are matched by basename."""
+    labels = {}
+    with open(path, newline="", encoding="utf-8") as f:
+        for row in csv.reader(f):
+            if len(row) < 2 or not row[1].strip().lstrip("-").isdigit():
+                continue
+            labels[os.path.basename(row[0].strip())] = int(row[1])
+    return labels
+
+def _hash_chunk(chunk: List[Tuple[str, Union[str, bytes]]], draft: bool) -> List[Tuple[str, Optional[int], Optional[str]]]:
+    """Process-pool worker: hash a chunk of images, isolating bad files."""
+    datas, keys, results = [], [], []
+    for key, payload in chunk:
+        try:
+            if isinstance(payload, str):
+                with open(payload, "rb") as f:
+                    payload = f.read()
+            datas.append(payload)
+            keys.append(key)
+        except OSError as e:
+            results.append((key, None, str(e)))
+
+    try:
+        hashes = hash_images(datas, draft=draft)
+        results.extend((key, int(h), None) for key, h in zip(keys, hashes))
+    except Exception:
+        for key, data in zip(keys, datas):
+            try:
+                results.append((key, int(hash_images([data], draft=draft)[0]), None))
+            except Exception as e:
+                results.append((key, None, str(e)))
+    return results
+
+def load_manifest(path: str) -> Dict[str, dict]:
+    if not os.path.exists(path):
+        return {}
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+def save_manifest(path: str, manifest: Dict[str, dict]) -> None:
+    tmp_path = f"{path}.tmp.{os.getpid()}"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, separators=(",", ":"), sort_keys=True)
+    os.replace(tmp_path, path)
+
+def resolve_conflicts(entries: Dict[int, List[int]]) -> Tuple[Dict[int, int], List[Tuple[int, List[int]]]]:
+    """
+    Collapse exact-hash duplicates to one offset.
+
+    The most common offset wins; hashes whose offsets tie are dropped since
+    there is no way to tell which label is right.
+    """
+    resolved, conflicts = {}, []
+    for image_hash, offsets in entries.items():
+        counts = Counter(offsets).most_common()
+        if len(counts) > 1:
+            conflicts.append((image_hash, offsets))
+            if counts[0][1] == counts[1][1]:
+                continue
+        resolved[image_hash] = counts[0][0]
+    return resolved, conflicts
+
+def _bands(max_distance: int) -> List[Tuple[int, int]]:
+    """Split 64 bits into ``max_distance + 1`` (shift, mask) bands of near-equal width."""
+    count = max_distance + 1
+    bands, shift = [], 0
+    for i in range(count):
+        width = 64 // count + (1 if i < 64 % count else 0)
+        bands.append((shift, (1 << width) - 1))
+        shift += width
+    return bands
+
+def dedupe_near(resolved: Dict[int, int], max_distance: int) -> Tuple[Dict[int, int], int, List[Tuple[int, int, int]]]:
+    """
+    Drop hashes within ``max_distance`` bits of a kept hash with the same offset.
+
+    Near neighbours with a different offset are kept but reported: distinct
+    puzzle positions on one background legitimately sit a few bits apart.
+
+    Kept hashes are bucketed by ``max_distance + 1`` bit bands. Two hashes
+    that differ in at most ``max_distance`` bits agree on at least one band,
+    so only hashes sharing a bucket are compared, instead of every pair.
+    """
+    if max_distance <= 0 or not resolved:
+        return resolved, 0, []
+    if max_distance >= 64:
+        raise ValueError("max_distance must be below 64")
+
+    bands = _bands(max_distance)
+    buckets: Dict[Tuple[int, int], List[int]] = defaultdict(list)
+    kept, removed, near_conflicts = {}, 0, []
+
+    for image_hash, offset in sorted(resolved.items()):
+        keys = [(i, (image_hash >> shift) & mask) for i, (shift, mask) in enumerate(bands)]
+        candidates = sorted({other for key in keys for other in buckets.get(key, ())})
+        if candidates:
+            others = np.array(candidates, dtype=np.uint64)
+            distances = popcount64(np.bitwise_xor(others, np.uint64(image_hash)))
+            close = [(other, int(distance)) for other, distance in zip(candidates, distances) if distance <= max_distance]
+            if any(kept[other] == offset for other, _ in close):
+                removed += 1
+                continue
+            near_conflicts.extend((image_hash, other, distance) for other, distance in close)
+
+        kept[image_hash] = offset
+        for key in keys:
+            buckets[key].append(image_hash)
+
+    return kept, removed, near_conflicts
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("sources", nargs="+", help="Image directories, image files or tarballs")
+    # No default: a bare run must not overwrite the index shipped in data/.
+    parser.add_argument("-o", "--output", required=True, help="Index file to write")
+    parser.add_argument("--labels", help="CSV of filename,offset rows")
+    parser.add_argument("--offset-pattern", default=DEFAULT_OFFSET_PATTERN, help="Regex with an 'offset' group matched against file names")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="Hashing processes")
+    parser.add_argument("--chunk-size", type=int, default=64, help="Images per worker job")
+    parser.add_argument("--dedupe-distance", type=int, default=0, help="Hamming radius for near-duplicate removal")
+    parser.add_argument("--incremental", action="store_true", help="Merge into the existing output and only hash new or changed images")
+    parser.add_argument("--draft", action="store_true", help="Use reduced JPEG decoding (faster, not bit-identical)")
+    args = parser.parse_args(argv)
+
+    labels = load_labels(args.labels) if args.labels else {}
+    pattern = re.compile(args.offset_pattern)
+    manifest_path = args.output + ".manifest.json"
+    manifest = load_manifest(manifest_path) if args.incremental else {}
+
+    # In incremental mode the existing index is the base. Entries that came
+    # from manifest images are re-added from the manifest below, so only the
+    # rest (e.g. hand-curated data) is carried over as-is.
+    entries: Dict[int, List[int]] = defaultdict(list)
+    if args.incremental and os.path.exists(args.output):
+        from_manifest = {entry["hash"] for entry in manifest.values() if entry.get("hash")}
+        for hex_hash, offset in ImageIndex.load(args.output).items():
+            if hex_hash not in from_manifest:
+                entries[int(hex_hash, 16)].append(offset)
+    base_entries = len(entries)
+
+    pending: List[Tuple[str, Union[str, bytes]]] = []
+    unlabeled = reused = 0
+    out_of_range: List[Tuple[str, int]] = []
+    new_manifest: Dict[str, dict] = dict(manifest)
+
+    for key, payload, size, mtime in iter_sources(args.sources):
+        name = os.path.basename(key)
+        offset = labels.get(name)
+        if offset is None:
+            match = pattern.search(name)
+            if match is None:
+                unlabeled += 1
+                continue
+            offset = int(match.group("offset"))
+        if not 0 <= offset <= MAX_OFFSET:
+            out_of_range.append((key, offset))
+            new_manifest.pop(key, None)
+            continue
+
+        previous = manifest.get(key)
+        if previous and previous["size"] == size and previous["mtime"] == mtime and previous["offset"] == offset:
+            reused += 1
+            continue
+
+        new_manifest[key] = {"size": size, "mtime": mtime, "offset": offset, "hash": None}
+        pending.append((key, payload))
+
+    chunks = [pending[i:i + args.chunk_size] for i in range(0, len(pending), args.chunk_size)]
+    failures = []
+    start = time.perf_counter()
+    cpu_start = time.process_time()
+
+    with ProcessPoolExecutor(max_workers=args.workers) as pool:
+        for results in pool.map(_hash_chunk, chunks, [args.draft] * len(chunks)):
+            for key, image_hash, error in results:
+                if image_hash is None:
+                    failures.append((key, error))
+                    del new_manifest[key]
+                    continue
+                new_manifest[key]["hash"] = f"{image_hash:016x}"
+
+    elapsed = time.perf_counter() - start
+    hashed = len(pending) - len(failures)
+
+    for entry in new_manifest.values():
+        if entry.get("hash"):
+            entries[int(entry["hash"], 16)].append(entry["offset"])
+
+    resolved, conflicts = resolve_conflicts(entries)
+    kept, near_removed, near_conflicts = dedupe_near(resolved, args.dedupe_distance)
+    written = write_index(args.output, kept.items())
+    save_manifest(manifest_path, new_manifest)
+
+    rate = hashed / elapsed if elapsed else 0.0
+    print(f"Images hashed:        {hashed} ({reused} reused from manifest, {unlabeled} unlabeled skipped)")
+    print(f"Base index entries:   {base_entries}")
+    print(f"Hash failures:        {len(failures)}")
+    print(f"Offsets out of range: {len(out_of_range)} skipped (must be 0-{MAX_OFFSET})")
+    print(f"Exact conflicts:      {len(conflicts)} ({sum(1 for h, _ in conflicts if h not in resolved)} dropped)")
+    print(f"Near duplicates:      {near_removed} removed, {len(near_conflicts)} near neighbours with other offsets")
+    print(f"Entries written:      {written} -> {args.output}")
+    print(f"Throughput:           {rate:.1f} images/sec, {rate / max(args.workers, 1):.1f} images/sec/core "
+          f"({elapsed:.2f}s wall, {time.process_time() - cpu_start:.2f}s parent CPU, {args.workers} workers)")
+
+    for key, error in failures[:10]:
+        print(f"  failed: {key}: {error}", file=sys.stderr)
+    for key, offset in out_of_range[:10]:
+        print(f"  offset out of range: {key}: {offset}", file=sys.stderr)
+    for image_hash, values in conflicts[:10]:
+        print(f"  conflict: {image_hash:016x} labelled {sorted(set(values))}", file=sys.stderr)
+
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,408 @@
+import asyncio
+import itertools
+import json
+import multiprocessing
+import os
+import socket
+import time
+from typing import Any, Dict, Iterable, List, Optional
+
+from async_solver import AsyncGeetestSolver
+from results import GeetestResult
+from tracing import SolveHooks, SolveTrace
+
+# Solver processes talk to the dispatcher over a Unix socketpair, one JSON
+# object per line. Requests carry an ``id`` that the worker echoes back:
+#   {"id": 1, "op": "solve", "sitekey": "...", "deadline": 10.0}
+#   {"id": 2, "op": "reload", "path": "data/image_index.bin"}
+#   {"id": 3, "op": "stats"}
+# Each worker announces itself with {"op": "ready", "pid": ..., "warm_up": ...}
+# once its solver is warm. Lines are capped well above any real message.
+MAX_LINE = 1 << 20
+
+class _TraceCapture(SolveHooks):
+    """Keeps the events and error of each finished solve for the dispatcher."""
+
+    def __init__(self):
+        self.traces: Dict[int, SolveTrace] = {}
+
+    def on_result(self, result: Any, trace: SolveTrace) -> None:
+        self.traces[id(result)] = trace
+
+def _build_solver(options: Dict[str, Any], hooks: Iterable[SolveHooks], slot: int = 0) -> AsyncGeetestSolver:
+    from bg_cache import BackgroundCache
+    from concurrency import AdaptiveLimiter
+    from hashing import HashExecutor
+
+    limiter_options = options.get("limiter")
+    bg_cache_options = dict(options.get("bg_cache", {}))
+    if bg_cache_options.get("path"):
+        # One file per slot, so a restarted process picks up its predecessor's cache.
+        bg_cache_options["path"] = f"{bg_cache_options['path']}.{slot}"
+    record_path = options.get("record_path")
+    if record_path:
+        from recorder import SessionRecorder
+        # One trace per process; the blobs directory is shared.
+        recorder = SessionRecorder(f"{record_path}.{os.getpid()}", blob_dir=f"{record_path}.blobs")
+    else:
+        recorder = None
+    return AsyncGeetestSolver(
+        hash_executor=HashExecutor(**options.get("hashing", {})),
+        bg_cache=BackgroundCache(**bg_cache_options),
+        limiter=AdaptiveLimiter(**limiter_options) if limiter_options is not None else None,
+        hooks=hooks,
+        recorder=recorder,
+        quiet=True,
+        **options.get("solver", {})
+    )
+
+async def _serve(sock: socket.socket, options: Dict[str, Any], slot: int) -> None:
+    """Worker side: solve requests from the dispatcher until it hangs up."""
+    from image_index import reload_index
+
+    capture = _TraceCapture()
+    solver = _build_solver(options, [capture], slot)
+    solver.bg_cache.load()
+    reader, writer = await asyncio.open_unix_connection(sock=sock, limit=MAX_LINE)
+    running = set()
+
+    def reply(message: Dict[str, Any]) -> None:
+        writer.write(json.dumps(message).encode() + b"\n")
+
+    async def solve(request_id: int, sitekey: str, deadline: Optional[float]) -> None:
+        error = None
+        try:
+            result = await solver.solve(sitekey, deadline=deadline)
+        except Exception as e:
+            result = GeetestResult(response=None, status="failure", elapsed_time_seconds=0.0, reason=str(e))
+            error = type(e).__name__
+        trace = capture.traces.pop(id(result), None)
+        result.sitekey = sitekey
+        reply({
+            "id": request_id,
+            "result": result.to_dict(),
+            "events": trace.events if trace is not None else [],
+            "error": trace.error if trace is not None else error
+        })
+
+    try:
+        warm_up = await solver.warm_up()
+        reply({"op": "ready", "pid": os.getpid(), "warm_up": round(warm_up, 3)})
+
+        while True:
+            line = await reader.readline()
+            if not line:
+                break
+            request = json.loads(line)
+            op = request.get("op")
+
+            if op == "solve":
+                task = asyncio.create_task(solve(request["id"], request["sitekey"], request.get("deadline")))
+                running.add(task)
+                task.add_done_callback(running.discard)
+            elif op == "reload":
+                try:
+                    index = reload_index(request.get("path"))
+                    solver.bg_cache.clear()
+                    reply({"id": request["id"], "entries": len(index), "path": index.path})
+                except (OSError, ValueError) as e:
+                    reply({"id": request["id"], "error": str(e)})
+            elif op == "stats":
+                reply({"id": request["id"], "stats": {
+                    "pid": os.getpid(),
+                    "hashing": solver.hash_executor.stats(),
+                    "bg_cache": solver.bg_cache.stats(),
+                    "concurrency": solver.limiter.stats() if solver.limiter is not None else None
+                }})
+            await writer.drain()
+    finally:
+        for task in running:
+            task.cancel()
+        await asyncio.gather(*running, return_exceptions=True)
+        await solver.close()
+        solver.hash_executor.shutdown()
+        solver.bg_cache.save()
+        if solver.recorder is not None:
+            solver.recorder.close()
+        writer.close()
+
+def _worker_main(sock: socket.socket, options: Dict[str, Any], slot: int = 0) -> None:
+    """Entry point of a solver process."""
+    log_level = options.get("log_level")
+    if log_level:
+        from server_logging import start_queue_logging, stop_queue_logging
+        start_queue_logging(log_level)
+    try:
+        asyncio.run(_serve(sock, options, slot))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        if log_level:
+            stop_queue_logging()
+
+class _Worker:
+    """Dispatcher-side handle of one solver process."""
+
+    __slots__ = ("slot", "process", "reader", "writer", "pending", "pid", "solved", "listener")
+
+    def __init__(self, slot: int):
+        self.slot = slot
+        self.process: Optional[multiprocessing.process.BaseProcess] = None
+        self.reader: Optional[asyncio.StreamReader] = None
+        self.writer: Optional[asyncio.StreamWriter] = None
+        # Request id -> future of its reply
+        self.pending: Dict[int, asyncio.Future] = {}
+        self.pid: Optional[int] = None
+        self.solved = 0
+        self.listener: Optional[asyncio.Task] = None
+
+class ClusterSolver:
+    """
+    Spreads solves over ``processes`` solver processes, one core each.
+
+    Every process runs its own ``AsyncGeetestSolver`` (session, hash
+    workers, background cache and, if configured, adaptive limiter) and maps
+    the same read-only image index file, so the index pages are shared
+    through the OS page cache rather than copied. A solve goes to the
+    process with the fewest solves in flight. Solve hooks run here, in the
+    dispatcher, as each result comes back, so metrics cover the whole
+    cluster. A process that dies fails its in-flight solves and is
+    restarted.
+
+    ``options`` holds picklable keyword arguments for the workers:
+    ``solver`` (``AsyncGeetestSolver``), ``hashing`` (``HashExecutor``),
+    ``bg_cache`` (``BackgroundCache``; a ``path`` is suffixed with the
+    worker's slot), ``limiter`` (``AdaptiveLimiter``, None for no limiter),
+    ``record_path`` (a ``SessionRecorder`` trace per worker, suffixed with
+    its pid) and ``log_level`` (queue logging in the workers).
+    Workers are daemon processes unless their ``HashExecutor`` uses
+    processes, since daemon processes cannot have children; either way a
+    worker exits when the dispatcher's socket closes.
+    """
+
+    def __init__(
+        self,
+        processes: Optional[int] = None,
+        options: Optional[Dict[str, Any]] = None,
+        hooks: Iterable[SolveHooks] = (),
+        start_method: str = "spawn",
+        ready_timeout: float = 60.0
+    ):
+        self.processes = max(1, processes or os.cpu_count() or 1)
+        self.options = options or {}
+        self.hooks = tuple(hooks)
+        self.ready_timeout = ready_timeout
+        self._context = multiprocessing.get_context(start_method)
+        self._workers = [_Worker(slot) for slot in range(self.processes)]
+        self._ids = itertools.count(1)
+        self._started = False
+        self._closing = False
+        self.restarts = 0
+
+    async def __aenter__(self) -> "ClusterSolver":
+        await self.start()
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb) -> None:
+        await self.close()
+
+    async def start(self) -> None:
+        """Spawn the solver processes and wait until each has warmed up."""
+        if self._started:
+            return
+        self._started = True
+        self._closing = False
+        await asyncio.gather(*(self._spawn(worker) for worker in self._workers))
+
+    async def warm_up(self) -> float:
+        """
+        Start the cluster; every worker warms its own solver before reporting ready.
+
+        Returns:
+            Seconds taken
+        """
+        started = time.perf_counter()
+        await self.start()
+        return time.perf_counter() - started
+
+    async def _spawn(self, worker: _Worker) -> None:
+        parent, child = socket.socketpair()
+        process = self._context.Process(
+            target=_worker_main,
+            args=(child, self.options, worker.slot),
+            name=f"geetest-solver-{worker.slot}",
+            daemon=self.options.get("hashing", {}).get("kind") != "process"
+        )
+        process.start()
+        child.close()
+
+        reader, writer = await asyncio.open_unix_connection(sock=parent, limit=MAX_LINE)
+        try:
+            line = await asyncio.wait_for(reader.readline(), self.ready_timeout)
+        except asyncio.TimeoutError:
+            line = b""
+        if not line:
+            writer.close()
+            process.kill()
+            raise RuntimeError(f"Solver process {worker.slot} failed to start (exit code {process.exitcode})")
+
+        worker.process = process
+        worker.reader, worker.writer = reader, writer
+        worker.pid = json.loads(line)["pid"]
+        worker.listener = asyncio.create_task(self._listen(worker))
+
+    async def _listen(self, worker: _Worker) -> None:
+        """Resolve replies from one worker; on EOF fail what it held and restart it."""
+        try:
+            while True:
+                line = await worker.reader.readline()
+                if not line:
+                    break
+                message = json.loads(line)
+                future = worker.pending.pop(message.get("id"), None)
+                if future is not None and not future.done():
+                    future.set_result(message)
+        except (ConnectionError, ValueError):
+            pass
+
+        pending, worker.pending = worker.pending, {}
+        for future in pending.values():
+            if not future.done():
+                future.set_exception(ConnectionError(f"Solver process {worker.pid} exited"))
+        worker.writer.close()
+        worker.process.join(0)
+
+        if not self._closing:
+            self.restarts += 1
+            try:
+                await self._spawn(worker)
+            except RuntimeError:
+                pass
+
+    async def _request(self, worker: _Worker, message: Dict[str, Any]) -> Dict[str, Any]:
+        if worker.writer is None or worker.writer.is_closing():
+            raise ConnectionError(f"Solver process {worker.slot} is not running")
+        request_id = next(self._ids)
+        future = asyncio.get_running_loop().create_future()
+        worker.pending[request_id] = future
+        try:
+            worker.writer.write(json.dumps({"id": request_id, **message}).encode() + b"\n")
+            await worker.writer.drain()
+            return await future
+        finally:
+            worker.pending.pop(request_id, None)
+
+    def _pick(self) -> _Worker:
+        """The live worker with the fewest requests in flight."""
+        live = [worker for worker in self._workers if worker.writer is not None and not worker.writer.is_closing()]
+        return min(live or self._workers, key=lambda worker: len(worker.pending))
+
+    async def solve(self, sitekey: str, deadline: Optional[float] = None) -> GeetestResult:
+        """
+        Solve on the least busy worker process.
+
+        Args:
+            sitekey: The Geetest site key
+            deadline: Seconds the whole solve may take; defaults to the
+                workers' ``deadline``
+
+        Returns:
+            GeetestResult as produced by the worker's solver
+        """
+        if not self._started:
+            await self.start()
+
+        worker = self._pick()
+        started = time.perf_counter()
+        try:
+            reply = await self._request(worker, {"op": "solve", "sitekey": sitekey, "deadline": deadline})
+        except ConnectionError as e:
+            result = GeetestResult(
+                response=None,
+                elapsed_time_seconds=round(time.perf_counter() - started, 3),
+                status="failure",
+                reason=str(e),
+                sitekey=sitekey
+            )
+            trace = SolveTrace(sitekey, self.hooks)
+            trace.error = "worker_exit"
+            return trace.finish(result)
+
+        worker.solved += 1
+        result = GeetestResult.from_dict(reply["result"])
+        if self.hooks:
+            # Replay the worker's trace so the hooks see a local solve.
+            trace = SolveTrace(sitekey, self.hooks)
+            for stage, seconds in result.stages.items():
+                for hook in self.hooks:
+                    hook.on_stage(sitekey, stage, seconds)
+            for event in reply["events"]:
+                trace.event(event)
+            trace.stages = dict(result.stages)
+            trace.attempts, trace.misses = result.attempts, result.misses
+            trace.error = None if result.status == "success" else reply["error"]
+            trace.finish(result)
+        return result
+
+    # Only needs ``solve``, so the single-process implementation serves as is.
+    solve_many = AsyncGeetestSolver.solve_many
+
+    async def reload_index(self, path: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Swap the image index in every worker.
+
+        Returns:
+            The reply of the first worker, ``entries`` and ``path`` on
+            success or ``error``; a worker that is not running counts as
+            a failure
+        """
+        replies = await asyncio.gather(
+            *(self._request(worker, {"op": "reload", "path": path}) for worker in self._workers),
+            return_exceptions=True
+        )
+        replies = [{"error": str(reply)} if isinstance(reply, BaseException) else reply for reply in replies]
+        failed = [reply for reply in replies if "error" in reply]
+        reply = failed[0] if failed else replies[0]
+        return {key: value for key, value in reply.items() if key != "id"}
+
+    async def worker_stats(self) -> List[Dict[str, Any]]:
+        """Hashing, background cache and limiter counters of every live worker."""
+        replies = await asyncio.gather(
+            *(self._request(worker, {"op": "stats"}) for worker in self._workers),
+            return_exceptions=True
+        )
+        return [reply["stats"] for reply in replies if isinstance(reply, dict)]
+
+    def stats(self) -> Dict[str, Any]:
+        """Process count, restarts and per-worker load, without asking the workers."""
+        return {
+            "processes": self.processes,
+            "restarts": self.restarts,
+            "workers": [
+                {
+                    "pid": worker.pid,
+                    "alive": worker.process is not None and worker.process.is_alive(),
+                    "in_flight": len(worker.pending),
+                    "solved": worker.solved
+                }
+                for worker in self._workers
+            ]
+        }
+
+    async def close(self) -> None:
+        """Stop every worker process."""
+        self._closing = True
+        self._started = False
+        for worker in self._workers:
+            if worker.writer is not None:
+                worker.writer.close()
+        listeners = [worker.listener for worker in self._workers if worker.listener is not None]
+        await asyncio.gather(*listeners, return_exceptions=True)
+
+        loop = asyncio.get_running_loop()
+        for worker in self._workers:
+            if worker.process is not None:
+                await loop.run_in_executor(None, worker.process.join, 5.0)
+                if worker.process.is_alive():
+                    worker.process.kill()
+            worker.process = worker.listener = worker.reader = worker.writer = None
@@ -0,0 +1,170 @@
+import asyncio
+import time
+from collections import deque
+from typing import Any, Deque, Dict, List, Optional
+
+class _LatencySignal:
+    """Recent average and baseline latency of one kind of request."""
+
+    __slots__ = ("smoothed", "baseline", "window")
+
+    def __init__(self):
+        self.smoothed: Optional[float] = None
+        self.baseline: Optional[float] = None
+        self.window: List[float] = []
+
+    def update(self, latency: float, window: int, tolerance: float) -> bool:
+        """Add a sample; True if recent latency is beyond ``tolerance`` times the baseline."""
+        self.smoothed = latency if self.smoothed is None else self.smoothed + 0.2 * (latency - self.smoothed)
+        self.window.append(latency)
+        if len(self.window) >= window:
+            # The median rather than the minimum, so upstream jitter and a
+            # few freak fast answers do not read as congestion. Drop to a
+            # lower value at once but rise only gradually, so latency
+            # inflated by our own load does not become the baseline.
+            self.window.sort()
+            median = self.window[len(self.window) // 2]
+            self.window = []
+            if self.baseline is None or median < self.baseline:
+                self.baseline = median
+            else:
+                self.baseline += 0.02 * (median - self.baseline)
+        return self.baseline is not None and self.smoothed > tolerance * self.baseline
+
+    def stats(self) -> Dict[str, Optional[float]]:
+        return {
+            "baseline": round(self.baseline, 4) if self.baseline is not None else None,
+            "recent": round(self.smoothed, 4) if self.smoothed is not None else None
+        }
+
+class AdaptiveLimiter:
+    """
+    AIMD concurrency limit for upstream requests.
+
+    Every request holds a slot between ``acquire`` and ``release``. A request
+    that completed while at least half the slots were busy, with the recent
+    average latency within ``tolerance`` times the baseline, raises the
+    limit by ``1 / limit``, i.e. by one per limit's worth of such requests.
+    A failure, or an average latency beyond that, multiplies the limit by
+    ``backoff``, at most once per round-trip. The baseline, kept per request
+    ``kind``, is the median latency of each ``window`` samples: it
+    follows a faster upstream at once and a slower one over several
+    windows. Until the first window fills, only failures lower the limit.
+
+    Not thread-safe: use it from one event loop.
+    """
+
+    def __init__(
+        self,
+        initial: int = 16,
+        min_limit: int = 1,
+        max_limit: int = 256,
+        backoff: float = 0.75,
+        tolerance: float = 1.5,
+        window: int = 200
+    ):
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.backoff = backoff
+        self.tolerance = tolerance
+        self.window = window
+        self._limit = float(min(max(initial, min_limit), max_limit))
+        self._in_flight = 0
+        self._waiters: Deque[asyncio.Future] = deque()
+        self._signals: Dict[str, _LatencySignal] = {}
+        self._last_latency = 0.0
+        self._last_decrease = 0.0
+        self.increases = 0
+        self.decreases = 0
+
+    @property
+    def limit(self) -> int:
+        """Current number of requests allowed in flight."""
+        return int(self._limit)
+
+    @property
+    def in_flight(self) -> int:
+        return self._in_flight
+
+    async def acquire(self) -> None:
+        """Wait for a free slot."""
+        if not self._waiters and self._in_flight < self.limit:
+            self._in_flight += 1
+            return
+
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters.append(waiter)
+        try:
+            await waiter
+        except asyncio.CancelledError:
+            # Granted a slot just as we were cancelled: hand it on.
+            if waiter.done() and not waiter.cancelled():
+                self._in_flight -= 1
+                self._wake()
+            raise
+
+    def release(self, latency: Optional[float] = None, failed: bool = False, kind: str = "default") -> None:
+        """
+        Free a slot and feed back how the request went.
+
+        Args:
+            latency: Seconds the request took; None with ``failed=False``
+                leaves the limit alone (e.g. the caller was cancelled)
+            failed: The upstream errored, timed out or answered with a 5xx/429
+            kind: Request type; each kind gets its own latency baseline, so
+                endpoints of different speed can share one limit
+        """
+        busy = self._in_flight * 2 >= self._limit
+        self._in_flight -= 1
+
+        if failed:
+            if latency is not None:
+                self._last_latency = latency
+            self._decrease()
+        elif latency is not None:
+            self._observe(latency, busy, kind)
+        self._wake()
+
+    def record_failure(self, latency: Optional[float] = None) -> None:
+        """Back off for a failed request that held no slot, e.g. a background download."""
+        if latency is not None:
+            self._last_latency = latency
+        self._decrease()
+
+    def _observe(self, latency: float, busy: bool, kind: str) -> None:
+        self._last_latency = latency
+        signal = self._signals.get(kind)
+        if signal is None:
+            signal = self._signals[kind] = _LatencySignal()
+
+        if signal.update(latency, self.window, self.tolerance):
+            self._decrease()
+        elif busy and self._limit < self.max_limit:
+            self._limit = min(self.max_limit, self._limit + 1.0 / self._limit)
+            self.increases += 1
+
+    def _decrease(self) -> None:
+        now = time.monotonic()
+        if now - self._last_decrease < self._last_latency:
+            return
+        self._last_decrease = now
+        self._limit = max(float(self.min_limit), self._limit * self.backoff)
+        self.decreases += 1
+
+    def _wake(self) -> None:
+        while self._waiters and self._in_flight < self.limit:
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                self._in_flight += 1
+                waiter.set_result(None)
+
+    def stats(self) -> Dict[str, Any]:
+        """Current limit, usage, adjustment counters and latency per request kind."""
+        return {
+            "limit": self.limit,
+            "in_flight": self._in_flight,
+            "waiting": sum(1 for waiter in self._waiters if not waiter.done()),
+            "increases": self.increases,
+            "decreases": self.decreases,
+            "latency": {kind: signal.stats() for kind, signal in self._signals.items()}
+        }
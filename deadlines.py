@@ -0,0 +1,60 @@
+import math
+import time
+from typing import Dict, Optional
+
+# Relative share of the remaining budget each network/CPU stage may use. A
+# stage gets its share of what is left, divided by the shares of the stages
+# still to come, so time saved early (e.g. a background cache hit skipping
+# the download) carries over to later stages.
+STAGE_SHARES: Dict[str, float] = {"load": 0.3, "download": 0.3, "hash": 0.1, "verify": 0.3}
+_STAGE_ORDER = tuple(STAGE_SHARES)
+
+# Per-request cap used when a solve has no deadline, so a stuck upstream
+# connection can never hold a solve forever.
+DEFAULT_REQUEST_TIMEOUT = 15.0
+
+class DeadlineExceeded(Exception):
+    """The solve deadline ran out before ``stage`` could start."""
+
+    def __init__(self, stage: str):
+        super().__init__(f"Deadline exceeded before {stage}")
+        self.stage = stage
+
+class Deadline:
+    """
+    Time budget of one solve, split into per-stage timeouts.
+
+    With ``seconds=None`` there is no overall budget and every stage simply
+    gets ``request_timeout``.
+    """
+
+    __slots__ = ("expires_at", "request_timeout")
+
+    def __init__(self, seconds: Optional[float] = None, request_timeout: float = DEFAULT_REQUEST_TIMEOUT):
+        self.expires_at = time.monotonic() + seconds if seconds else math.inf
+        self.request_timeout = request_timeout
+
+    def remaining(self) -> float:
+        return self.expires_at - time.monotonic()
+
+    def expired(self) -> bool:
+        return self.remaining() <= 0
+
+    def timeout(self, stage: str) -> float:
+        """
+        Seconds ``stage`` may take.
+
+        Raises:
+            DeadlineExceeded: No budget is left
+        """
+        remaining = self.remaining()
+        if remaining <= 0:
+            raise DeadlineExceeded(stage)
+        if math.isinf(remaining):
+            return self.request_timeout
+
+        share = STAGE_SHARES.get(stage)
+        if share is None:
+            return min(remaining, self.request_timeout)
+        later = sum(STAGE_SHARES[name] for name in _STAGE_ORDER[_STAGE_ORDER.index(stage):])
+        return min(remaining * share / later, self.request_timeout)
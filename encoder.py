@@ -0,0 +1,113 @@
+import json
+import os
+import secrets
+from functools import lru_cache
+from typing import Any, Callable, Dict, Tuple, Union
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+GEETEST_RSA_N = int("00C1E3934D1614465B33053E7F48EE4EC87B14B95EF88947713D25EECBFF7E74C7977D02DC1D9451F79DD5D1C10C29ACB6A9B4D6FB7D0A0279B6719E1772565F09AF627715919221AEF91899CAE08C0D686D748B20A3603BE2318CA6BC2B59706592A9219D0BF05C9F65023A21D2330807252AE0066D59CEEFA5F2748EA80BAB81", 16)
+GEETEST_RSA_E = 0x10001
+AES_IV = b"0000000000000000"
+
+_json_encoder = json.JSONEncoder(separators=(",", ":"), ensure_ascii=False)
+
+def dumps(data: Any) -> bytes:
+    """Compact JSON, via orjson when it is installed."""
+    if orjson is not None:
+        return orjson.dumps(data)
+    return _json_encoder.encode(data).encode("utf-8")
+
+def loads(data: Union[str, bytes]) -> Any:
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+def extract_jsonp(text: Union[str, bytes], callback_name: str) -> Dict[str, Any]:
+    """
+    Parse a ``callback({...})`` JSONP body in one pass.
+
+    Slices between the callback's opening parenthesis and the last closing
+    one instead of splitting the whole body.
+
+    Raises:
+        ValueError: The body is not wrapped in ``callback_name(...)``
+    """
+    if isinstance(text, bytes):
+        prefix = callback_name.encode() + b"("
+        close = b")"
+    else:
+        prefix = callback_name + "("
+        close = ")"
+
+    start = text.find(prefix)
+    end = text.rfind(close)
+    if start < 0 or end < start:
+        raise ValueError(f"Response is not a {callback_name}(...) JSONP body")
+    return loads(text[start + len(prefix):end])
+
+class PayloadEncoder:
+    """
+    Builds the encrypted ``w`` parameter of the verify request.
+
+    The key size is computed once and the RSA step is PKCS#1 v1.5 padding
+    plus a built-in ``pow``, so each payload only costs one AES-CBC pass and
+    one modular exponentiation of the 16-character session key.
+    """
+
+    def __init__(self, n: int = GEETEST_RSA_N, e: int = GEETEST_RSA_E):
+        self.n = n
+        self.e = e
+        self.key_size = (n.bit_length() + 7) // 8
+
+    def _pad_random(self, length: int) -> bytes:
+        # PKCS#1 v1.5 type 2 padding must not contain zero bytes.
+        padding = os.urandom(length).replace(b"\x00", b"")
+        while len(padding) < length:
+            padding += os.urandom(length - len(padding)).replace(b"\x00", b"")
+        return padding
+
+    def rsa_encrypt(self, message: bytes) -> bytes:
+        """PKCS#1 v1.5 encrypt ``message`` under the public key."""
+        padding_length = self.key_size - len(message) - 3
+        if padding_length < 8:
+            raise ValueError("Message too long for RSA key")
+        block = b"\x00\x02" + self._pad_random(padding_length) + b"\x00" + message
+        return pow(int.from_bytes(block, "big"), self.e, self.n).to_bytes(self.key_size, "big")
+
+    @staticmethod
+    def guid() -> str:
+        """16 hex characters, used as AES key and in the pow message."""
+        return secrets.token_hex(8)
+
+    def encrypt(self, data: Union[str, bytes]) -> str:
+        """AES-encrypt ``data`` under a fresh key and append the RSA-wrapped key, hex encoded."""
+        if isinstance(data, str):
+            data = data.encode("utf-8")
+        guid = self.guid().encode()
+        AES, pad = _crypto()
+        encrypted = AES.new(guid, AES.MODE_CBC, AES_IV).encrypt(pad(data, AES.block_size))
+        return encrypted.hex() + self.rsa_encrypt(guid).hex()
+
+    def encode_w(self, w_data: Dict[str, Any]) -> str:
+        """Serialize and encrypt the verify payload."""
+        return self.encrypt(dumps(w_data))
+
+@lru_cache(maxsize=None)
+def _crypto() -> Tuple[Any, Callable[[bytes, int], bytes]]:
+    """pycryptodome's AES and PKCS#7 padding, imported on the first encryption."""
+    from Crypto.Cipher import AES
+    from Crypto.Util.Padding import pad
+    return AES, pad
+
+_default_encoder = None
+
+def get_encoder() -> PayloadEncoder:
+    """Process-wide encoder with the Geetest public key."""
+    global _default_encoder
+    if _default_encoder is None:
+        _default_encoder = PayloadEncoder()
+    return _default_encoder
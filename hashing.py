@@ -0,0 +1,250 @@
+import asyncio
+import math
+import os
+import time
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from functools import lru_cache
+from io import BytesIO
+from typing import TYPE_CHECKING, Any, Dict, Iterable, Optional, Tuple
+
+import numpy as np
+from PIL import Image
+
+if TYPE_CHECKING:
+    from image_index import ImageIndex, IndexMatch
+
+EXECUTOR_KINDS = ("thread", "process", "inline")
+
+HASH_SIZE = 8
+IMAGE_SIZE = HASH_SIZE * 4
+
+# Pillow resamples 8-bit images with fixed-point coefficients of this many
+# fractional bits (see libImaging/Resample.c).
+PRECISION_BITS = 32 - 8 - 2
+
+# Size of a Geetest slide background, used to prime the resize weights.
+BACKGROUND_SIZE = (300, 160)
+
+def _dct_basis() -> np.ndarray:
+    """First ``HASH_SIZE`` rows of the unnormalized DCT-II matrix (scipy's default)."""
+    n = np.arange(IMAGE_SIZE)
+    k = np.arange(HASH_SIZE)[:, None]
+    return 2.0 * np.cos(np.pi * k * (2 * n + 1) / (2 * IMAGE_SIZE))
+
+DCT_BASIS = _dct_basis()
+DCT_BASIS_T = np.ascontiguousarray(DCT_BASIS.T)
+
+def _lanczos(x: float) -> float:
+    def sinc(value: float) -> float:
+        if value == 0.0:
+            return 1.0
+        value *= math.pi
+        return math.sin(value) / value
+
+    if -3.0 <= x < 3.0:
+        return sinc(x) * sinc(x / 3.0)
+    return 0.0
+
+@lru_cache(maxsize=32)
+def _lanczos_weights(in_size: int, out_size: int) -> np.ndarray:
+    """
+    Pillow's fixed-point Lanczos coefficients as an ``(out_size, in_size)`` matrix.
+
+    Mirrors ``precompute_coeffs`` and ``normalize_coeffs_8bpc`` step for step,
+    so applying the matrix reproduces ``Image.resize(..., LANCZOS)`` exactly.
+    """
+    scale = in_size / out_size
+    filterscale = max(scale, 1.0)
+    support = 3.0 * filterscale
+    weights = np.zeros((out_size, in_size))
+
+    for xx in range(out_size):
+        center = (xx + 0.5) * scale
+        xmin = max(int(center - support + 0.5), 0)
+        xmax = min(int(center + support + 0.5), in_size)
+        kernel = [_lanczos((x - center + 0.5) / filterscale) for x in range(xmin, xmax)]
+        total = sum(kernel)
+
+        for i, k in enumerate(kernel):
+            if total != 0.0:
+                k /= total
+            k *= 1 << PRECISION_BITS
+            weights[xx, xmin + i] = int(k - 0.5) if k < 0 else int(k + 0.5)
+
+    return weights
+
+def _round_fixed_point(acc: np.ndarray) -> np.ndarray:
+    # Products of 8-bit pixels and 22-bit weights sum exactly in float64,
+    # so BLAS does the accumulation and only the rounding is done in ints.
+    pixels = acc.astype(np.int64) + (1 << (PRECISION_BITS - 1)) >> PRECISION_BITS
+    return np.clip(pixels, 0, 255).astype(np.float64)
+
+def resize_lanczos(pixels: np.ndarray, size: int = IMAGE_SIZE) -> np.ndarray:
+    """Bit-exact NumPy equivalent of Pillow's 8-bit ``resize((size, size), LANCZOS)``."""
+    height, width = pixels.shape
+    out = pixels.astype(np.float64)
+    if width != size:
+        out = _round_fixed_point(out @ _lanczos_weights(width, size).T)
+    if height != size:
+        out = _round_fixed_point(_lanczos_weights(height, size) @ out)
+    return out
+
+def load_pixels(image_data: bytes, draft: bool = False) -> np.ndarray:
+    """
+    Decode an image straight to the 32x32 grayscale grid phash works on.
+
+    Args:
+        image_data: Encoded image bytes
+        draft: Let the JPEG decoder downscale while decoding. Much faster on
+            large backgrounds, but no longer bit-identical to imagehash, so
+            only use it with a non-zero Hamming radius.
+    """
+    image = Image.open(BytesIO(image_data))
+    if draft:
+        image.draft("L", (IMAGE_SIZE, IMAGE_SIZE))
+    return resize_lanczos(np.asarray(image.convert("L")))
+
+def phash_pixels(pixels: np.ndarray) -> np.ndarray:
+    """
+    Perceptual hash of one or more 32x32 grayscale grids.
+
+    Produces the same bits as ``imagehash.phash``: the low-frequency 8x8
+    block of a 2D DCT-II, thresholded at its median and packed row-major,
+    most significant bit first.
+
+    Returns:
+        ``uint64`` array with one hash per input grid
+    """
+    pixels = np.asarray(pixels, dtype=np.float64).reshape(-1, IMAGE_SIZE, IMAGE_SIZE)
+    low = np.matmul(np.matmul(DCT_BASIS, pixels), DCT_BASIS_T).reshape(len(pixels), HASH_SIZE * HASH_SIZE)
+    # scipy's FFT-based DCT yields exact zeros on flat regions where the
+    # matrix product leaves ~1e-12 noise; round it away so ties break alike.
+    low = np.round(low, 6)
+    bits = low > np.median(low, axis=1, keepdims=True)
+    return np.packbits(bits, axis=1).view(">u8").ravel().astype(np.uint64)
+
+def phash_int(image_data: bytes, draft: bool = False) -> int:
+    """Return the 64-bit phash of an encoded image."""
+    return int(phash_pixels(load_pixels(image_data, draft))[0])
+
+def hash_image(image_data: bytes) -> str:
+    """Decode a background image and return its phash hex string."""
+    return f"{phash_int(image_data):016x}"
+
+def hash_images(images: Iterable[bytes], draft: bool = False) -> np.ndarray:
+    """
+    Hash many encoded images with a single vectorized DCT.
+
+    Returns:
+        ``uint64`` array of hashes in input order
+    """
+    grids = [load_pixels(image_data, draft) for image_data in images]
+    if not grids:
+        return np.empty(0, dtype=np.uint64)
+    return phash_pixels(np.stack(grids))
+
+@lru_cache(maxsize=1)
+def warm_up_image() -> bytes:
+    """A flat background-sized JPEG for priming the decode and hash path."""
+    buffer = BytesIO()
+    Image.new("RGB", BACKGROUND_SIZE, (128, 128, 128)).save(buffer, "JPEG")
+    return buffer.getvalue()
+
+def _timed_hash(image_data: bytes) -> Tuple[str, float]:
+    """Hash an image and report the CPU time it took (runs inside the pool)."""
+    start = time.perf_counter()
+    image_hash = hash_image(image_data)
+    return image_hash, time.perf_counter() - start
+
+class HashExecutor:
+    """
+    Runs background decode and phash off the event loop.
+
+    Jobs go to a thread or process pool; at most ``max_pending`` are queued
+    at once, so a burst of solves waits for a slot instead of piling images
+    into memory. ``kind="inline"`` hashes on the loop thread, as before.
+    """
+
+    def __init__(self, kind: str = "thread", workers: Optional[int] = None, max_pending: int = 64):
+        if kind not in EXECUTOR_KINDS:
+            raise ValueError(f"Unknown hash executor kind {kind!r}, expected one of {EXECUTOR_KINDS}")
+
+        self.kind = kind
+        self.workers = workers or min(8, os.cpu_count() or 1)
+        self.max_pending = max_pending
+        self._executor: Optional[Executor] = None
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self.jobs = 0
+        self.offloaded_seconds = 0.0
+        self.inline_seconds = 0.0
+
+    def _get_executor(self) -> Executor:
+        if self._executor is None:
+            if self.kind == "process":
+                self._executor = ProcessPoolExecutor(max_workers=self.workers)
+            else:
+                self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="geetest-hash")
+        return self._executor
+
+    async def hash(self, image_data: bytes) -> str:
+        """Hash a background image without blocking the event loop."""
+        if self.kind == "inline":
+            image_hash, seconds = _timed_hash(image_data)
+            self.jobs += 1
+            self.inline_seconds += seconds
+            return image_hash
+
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.max_pending)
+
+        async with self._semaphore:
+            loop = asyncio.get_running_loop()
+            image_hash, seconds = await loop.run_in_executor(self._get_executor(), _timed_hash, image_data)
+
+        self.jobs += 1
+        self.offloaded_seconds += seconds
+        return image_hash
+
+    async def nearest(self, index: "ImageIndex", image_hash: str, max_distance: Optional[int] = None) -> Optional["IndexMatch"]:
+        """
+        ``index.nearest`` without blocking the event loop.
+
+        A miss scans the whole index, which takes milliseconds on a large
+        one (more with NumPy < 2). The index is mapped in this process, so
+        with ``kind="process"`` the scan runs on the loop's default thread
+        pool instead.
+        """
+        if self.kind == "inline":
+            return index.nearest(image_hash, max_distance)
+
+        loop = asyncio.get_running_loop()
+        executor = self._get_executor() if self.kind == "thread" else None
+        return await loop.run_in_executor(executor, index.nearest, image_hash, max_distance)
+
+    async def warm_up(self) -> None:
+        """Start every worker and hash a blank background on each, outside the counters."""
+        image_data = warm_up_image()
+        if self.kind == "inline":
+            hash_image(image_data)
+            return
+
+        loop = asyncio.get_running_loop()
+        executor = self._get_executor()
+        await asyncio.gather(*(loop.run_in_executor(executor, hash_image, image_data) for _ in range(self.workers)))
+
+    def stats(self) -> Dict[str, Any]:
+        """Hashing counters; ``offloaded_seconds`` is loop-blocking time avoided."""
+        return {
+            "kind": self.kind,
+            "workers": self.workers,
+            "jobs": self.jobs,
+            "offloaded_seconds": round(self.offloaded_seconds, 6),
+            "inline_seconds": round(self.inline_seconds, 6)
+        }
+
+    def shutdown(self) -> None:
+        """Stop the worker pool; it is recreated on the next hash."""
+        if self._executor is not None:
+            self._executor.shutdown(wait=False)
+            self._executor = None
+        self._semaphore = None
@@ -0,0 +1,74 @@
+import asyncio
+import threading
+from collections import deque
+from typing import Awaitable, Callable, Deque, Optional, TypeVar
+
+T = TypeVar("T")
+
+class LatencyTracker:
+    """Rolling window of recent request latencies for picking a hedge delay."""
+
+    def __init__(self, window: int = 256, min_samples: int = 20):
+        self.min_samples = min_samples
+        self._samples: Deque[float] = deque(maxlen=window)
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._samples)
+
+    def observe(self, seconds: float) -> None:
+        with self._lock:
+            self._samples.append(seconds)
+
+    def percentile(self, percentile: float) -> Optional[float]:
+        """
+        Latency at ``percentile`` (0-100) of the window.
+
+        Returns:
+            Seconds, or None until ``min_samples`` latencies have been seen
+        """
+        with self._lock:
+            if len(self._samples) < self.min_samples:
+                return None
+            ordered = sorted(self._samples)
+        index = min(len(ordered) - 1, int(len(ordered) * percentile / 100.0))
+        return ordered[index]
+
+async def hedged(
+    factory: Callable[[], Awaitable[T]],
+    delay: Optional[float],
+    on_hedge: Optional[Callable[[], None]] = None
+) -> T:
+    """
+    Await ``factory()``; if it has not finished after ``delay`` seconds, start
+    a second ``factory()`` and return whichever succeeds first.
+
+    The loser is cancelled. If both attempts fail, the first error is raised.
+    With ``delay=None`` this is a plain ``await factory()``.
+    """
+    if delay is None:
+        return await factory()
+
+    primary = asyncio.ensure_future(factory())
+    pending = {primary}
+    try:
+        done, pending = await asyncio.wait(pending, timeout=delay)
+        if done:
+            return primary.result()
+
+        if on_hedge is not None:
+            on_hedge()
+        pending.add(asyncio.ensure_future(factory()))
+
+        error: Optional[BaseException] = None
+        while pending:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                if task.exception() is None:
+                    return task.result()
+                if error is None:
+                    error = task.exception()
+        raise error
+    finally:
+        for task in pending:
+            task.cancel()
@@ -0,0 +1,206 @@
+import os
+import struct
+import threading
+from typing import Iterable, NamedTuple, Optional, Tuple, Union
+
+import numpy as np
+
+MAGIC = b"GTIX"
+VERSION = 1
+HEADER = struct.Struct("<4sIQ")
+# Offsets are stored as uint16.
+MAX_OFFSET = 0xFFFF
+
+DEFAULT_MAX_DISTANCE = 2
+
+DEFAULT_INDEX_PATH = os.environ.get(
+    "GEETEST_INDEX_PATH",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "image_index.bin")
+)
+
+class IndexMatch(NamedTuple):
+    """Nearest index entry for a background hash."""
+    offset: int
+    distance: int
+    confidence: float
+
+def _popcount64(values: np.ndarray) -> np.ndarray:
+    """Per-element popcount of a ``uint64`` array (SWAR fallback for NumPy < 2)."""
+    x = values - ((values >> np.uint64(1)) & np.uint64(0x5555555555555555))
+    x = (x & np.uint64(0x3333333333333333)) + ((x >> np.uint64(2)) & np.uint64(0x3333333333333333))
+    x = (x + (x >> np.uint64(4))) & np.uint64(0x0F0F0F0F0F0F0F0F)
+    return ((x * np.uint64(0x0101010101010101)) >> np.uint64(56)).astype(np.uint8)
+
+popcount64 = getattr(np, "bitwise_count", _popcount64)
+
+class ImageIndex:
+    """Immutable background hash to slider offset index.
+
+    Hashes are stored as a sorted ``uint64`` array with a parallel ``uint16``
+    offsets array. Both are memory-mapped straight from the index file, so
+    every process on the box shares the same pages.
+    """
+
+    __slots__ = ("hashes", "offsets", "path")
+
+    def __init__(self, hashes: np.ndarray, offsets: np.ndarray, path: Optional[str] = None):
+        if len(hashes) != len(offsets):
+            raise ValueError("hashes and offsets must have the same length")
+        self.hashes = hashes
+        self.offsets = offsets
+        self.path = path
+
+    @classmethod
+    def load(cls, path: str = DEFAULT_INDEX_PATH) -> "ImageIndex":
+        """Memory-map an index file written by ``write_index``."""
+        with open(path, "rb") as f:
+            magic, version, count = HEADER.unpack(f.read(HEADER.size))
+
+        if magic != MAGIC:
+            raise ValueError(f"{path} is not an image index file")
+        if version != VERSION:
+            raise ValueError(f"Unsupported image index version {version} in {path}")
+
+        if count == 0:
+            return cls(np.empty(0, dtype="<u8"), np.empty(0, dtype="<u2"), path)
+
+        hashes = np.memmap(path, dtype="<u8", mode="r", offset=HEADER.size, shape=(count,))
+        offsets = np.memmap(path, dtype="<u2", mode="r", offset=HEADER.size + count * 8, shape=(count,))
+        return cls(hashes, offsets, path)
+
+    @classmethod
+    def from_items(cls, items: Iterable[Tuple[Union[str, int], int]]) -> "ImageIndex":
+        """
+        Build an in-memory index from ``(hash, offset)`` pairs.
+
+        Raises:
+            ValueError: An offset does not fit the file's ``uint16`` column
+        """
+        mapping = {to_int_hash(h): int(offset) for h, offset in items}
+        invalid = [offset for offset in mapping.values() if not 0 <= offset <= MAX_OFFSET]
+        if invalid:
+            raise ValueError(f"{len(invalid)} offset(s) outside 0-{MAX_OFFSET}, e.g. {invalid[0]}")
+        hashes = np.fromiter(mapping.keys(), dtype="<u8", count=len(mapping))
+        offsets = np.fromiter(mapping.values(), dtype="<u2", count=len(mapping))
+        order = np.argsort(hashes, kind="stable")
+        return cls(hashes[order], offsets[order])
+
+    def __len__(self) -> int:
+        return len(self.hashes)
+
+    def __contains__(self, image_hash: Union[str, int]) -> bool:
+        return self.lookup(to_int_hash(image_hash)) is not None
+
+    def lookup(self, image_hash: int) -> Optional[int]:
+        """Return the offset stored for an exact 64-bit hash, if any."""
+        pos = int(np.searchsorted(self.hashes, np.uint64(image_hash)))
+        if pos < len(self.hashes) and int(self.hashes[pos]) == image_hash:
+            return int(self.offsets[pos])
+        return None
+
+    def get(self, image_hash: Union[str, int], default: Optional[int] = None) -> Optional[int]:
+        """Dict-style lookup accepting the hex string form of a phash."""
+        offset = self.lookup(to_int_hash(image_hash))
+        return default if offset is None else offset
+
+    def nearest(self, image_hash: Union[str, int], max_distance: Optional[int] = None) -> Optional[IndexMatch]:
+        """
+        Find the closest indexed background within a Hamming radius.
+
+        Exact hits are resolved by binary search; otherwise every hash is
+        XORed with the query and popcounted in one vectorized pass.
+
+        Args:
+            image_hash: phash as a hex string or 64-bit integer
+            max_distance: Largest Hamming distance accepted as a match
+                (``DEFAULT_MAX_DISTANCE`` if None)
+
+        Returns:
+            IndexMatch with the offset, distance and a confidence in [0, 1],
+            or None when nothing lies within ``max_distance``
+        """
+        if max_distance is None:
+            max_distance = DEFAULT_MAX_DISTANCE
+        value = to_int_hash(image_hash)
+        offset = self.lookup(value)
+        if offset is not None:
+            return IndexMatch(offset, 0, 1.0)
+
+        if max_distance <= 0 or not len(self.hashes):
+            return None
+
+        distances = popcount64(np.bitwise_xor(self.hashes, np.uint64(value)))
+        best = int(distances.min())
+        if best > max_distance:
+            return None
+
+        # Backgrounds differing only by the puzzle hole sit a couple of bits
+        # apart, so several entries can tie; take the most common offset and
+        # scale confidence by how strongly the ties agree.
+        tied = self.offsets[distances == best]
+        candidates, counts = np.unique(tied, return_counts=True)
+        winner = int(counts.argmax())
+        agreement = counts[winner] / len(tied)
+        confidence = (1.0 - best / (max_distance + 1)) * agreement
+        return IndexMatch(int(candidates[winner]), best, round(float(confidence), 3))
+
+    def items(self) -> Iterable[Tuple[str, int]]:
+        """Iterate ``(hex_hash, offset)`` pairs in hash order."""
+        for h, offset in zip(self.hashes.tolist(), self.offsets.tolist()):
+            yield f"{h:016x}", offset
+
+def to_int_hash(image_hash: Union[str, int]) -> int:
+    """Convert a phash hex string (``str(phash(...))``) to its 64-bit integer."""
+    if isinstance(image_hash, str):
+        return int(image_hash, 16)
+    return int(image_hash)
+
+def write_index(path: str, items: Iterable[Tuple[Union[str, int], int]]) -> int:
+    """
+    Write ``(hash, offset)`` pairs to an index file.
+
+    The file is written next to ``path`` and renamed into place, so processes
+    still mapping the previous file keep reading consistent data.
+
+    Returns:
+        Number of entries written
+    """
+    index = ImageIndex.from_items(items)
+    directory = os.path.dirname(os.path.abspath(path))
+    os.makedirs(directory, exist_ok=True)
+    tmp_path = f"{path}.tmp.{os.getpid()}"
+
+    with open(tmp_path, "wb") as f:
+        f.write(HEADER.pack(MAGIC, VERSION, len(index)))
+        f.write(index.hashes.astype("<u8", copy=False).tobytes())
+        f.write(index.offsets.astype("<u2", copy=False).tobytes())
+
+    os.replace(tmp_path, path)
+    return len(index)
+
+_lock = threading.Lock()
+_index: Optional[ImageIndex] = None
+
+def get_index() -> ImageIndex:
+    """Return the process-wide index, loading it on first use."""
+    global _index
+    index = _index
+    if index is None:
+        with _lock:
+            if _index is None:
+                _index = ImageIndex.load(DEFAULT_INDEX_PATH)
+            index = _index
+    return index
+
+def reload_index(path: Optional[str] = None) -> ImageIndex:
+    """
+    Load a new index file and atomically swap it in.
+
+    Solves already holding the previous index finish against it; every later
+    ``get_index()`` call sees the new one.
+    """
+    global _index
+    index = ImageIndex.load(path or DEFAULT_INDEX_PATH)
+    with _lock:
+        _index = index
+    return index
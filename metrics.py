@@ -0,0 +1,224 @@
+"""
+Minimal Prometheus metrics, rendered in the text exposition format.
+
+Only what the API needs: counters, gauges (set directly or read from a
+callback at scrape time) and fixed-bucket histograms, all with positional
+label values. Updates are a dict lookup and an add under a lock, cheap
+enough to leave on for every solve.
+"""
+import bisect
+import math
+import threading
+from abc import ABC, abstractmethod
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from tracing import SolveHooks, SolveTrace
+
+LATENCY_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+STAGE_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(str(value))}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+def _format_value(value: float) -> str:
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    if value == int(value) and abs(value) < 1e15:
+        return str(int(value))
+    return repr(float(value))
+
+class Metric(ABC):
+    kind = "untyped"
+    # Appended to ``name`` in HELP and TYPE, so they name the sample family
+    # (text format 0.0.4 counters are ``<name>_total``).
+    family_suffix = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+
+    @abstractmethod
+    def samples(self) -> Iterable[Tuple[str, str, float]]:
+        """``(suffix, rendered labels, value)`` for every series."""
+
+    def render(self) -> str:
+        family = self.name + self.family_suffix
+        lines = [f"# HELP {family} {self.documentation}", f"# TYPE {family} {self.kind}"]
+        lines.extend(f"{self.name}{suffix}{labels} {_format_value(value)}" for suffix, labels, value in self.samples())
+        return "\n".join(lines)
+
+class Counter(Metric):
+    """Monotonic count, e.g. solves by outcome, or one read from ``function`` on every scrape."""
+
+    kind = "counter"
+    family_suffix = "_total"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        function: Optional[Callable[[], float]] = None
+    ):
+        super().__init__(name, documentation, labelnames)
+        self.function = function
+        self._values: Dict[Tuple[str, ...], float] = {}
+
+    def inc(self, *labels: str, amount: float = 1.0) -> None:
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0.0) + amount
+
+    def get(self, *labels: str) -> float:
+        return self._values.get(labels, 0.0)
+
+    def samples(self) -> Iterable[Tuple[str, str, float]]:
+        if self.function is not None:
+            return [("_total", "", float(self.function()))]
+        with self._lock:
+            values = sorted(self._values.items())
+        return [("_total", _format_labels(self.labelnames, labels), value) for labels, value in values]
+
+class Gauge(Metric):
+    """Current value, set directly or read from ``function`` on every scrape."""
+
+    kind = "gauge"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        function: Optional[Callable[[], float]] = None
+    ):
+        super().__init__(name, documentation, labelnames)
+        self.function = function
+        self._values: Dict[Tuple[str, ...], float] = {}
+
+    def set(self, value: float, *labels: str) -> None:
+        with self._lock:
+            self._values[labels] = value
+
+    def inc(self, *labels: str, amount: float = 1.0) -> None:
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0.0) + amount
+
+    def dec(self, *labels: str, amount: float = 1.0) -> None:
+        self.inc(*labels, amount=-amount)
+
+    def samples(self) -> Iterable[Tuple[str, str, float]]:
+        if self.function is not None:
+            return [("", "", float(self.function()))]
+        with self._lock:
+            values = sorted(self._values.items())
+        return [("", _format_labels(self.labelnames, labels), value) for labels, value in values]
+
+class Histogram(Metric):
+    """Fixed-bucket distribution, e.g. solve latency."""
+
+    kind = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (), buckets: Sequence[float] = LATENCY_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # Per label set: [count per bucket (+Inf last), sum, count]
+        self._series: Dict[Tuple[str, ...], List[Any]] = {}
+
+    def observe(self, value: float, *labels: str) -> None:
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                series = self._series[labels] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            series[0][index] += 1
+            series[1] += value
+            series[2] += 1
+
+    def samples(self) -> Iterable[Tuple[str, str, float]]:
+        with self._lock:
+            series = sorted((labels, (list(counts), total, count)) for labels, (counts, total, count) in self._series.items())
+
+        samples = []
+        for labels, (counts, total, count) in series:
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets + (math.inf,), counts):
+                cumulative += bucket_count
+                le = "+Inf" if math.isinf(bound) else _format_value(bound)
+                samples.append(("_bucket", _format_labels(self.labelnames, labels, f'le="{le}"'), cumulative))
+            samples.append(("_sum", _format_labels(self.labelnames, labels), total))
+            samples.append(("_count", _format_labels(self.labelnames, labels), count))
+        return samples
+
+class MetricsRegistry:
+    """Ordered collection of metrics rendered together for ``/metrics``."""
+
+    def __init__(self):
+        self._metrics: Dict[str, Metric] = {}
+
+    def register(self, metric: Metric) -> Metric:
+        if metric.name in self._metrics:
+            raise ValueError(f"Metric {metric.name} is already registered")
+        self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name: str, documentation: str, labelnames: Sequence[str] = (), function: Optional[Callable[[], float]] = None) -> Counter:
+        return self.register(Counter(name, documentation, labelnames, function))
+
+    def gauge(self, name: str, documentation: str, labelnames: Sequence[str] = (), function: Optional[Callable[[], float]] = None) -> Gauge:
+        return self.register(Gauge(name, documentation, labelnames, function))
+
+    def histogram(self, name: str, documentation: str, labelnames: Sequence[str] = (), buckets: Sequence[float] = LATENCY_BUCKETS) -> Histogram:
+        return self.register(Histogram(name, documentation, labelnames, buckets))
+
+    def render(self) -> str:
+        return "\n".join(metric.render() for metric in self._metrics.values()) + "\n"
+
+class SolverMetrics(SolveHooks):
+    """
+    Solve hooks that feed a registry: latency by outcome, stage latency,
+    failures by reason, background/index lookup results and hedged requests.
+    """
+
+    def __init__(self, registry: MetricsRegistry):
+        self.solve_seconds = registry.histogram(
+            "geetest_solve_duration_seconds", "End-to-end solve latency", ("status",)
+        )
+        self.stage_seconds = registry.histogram(
+            "geetest_solve_stage_duration_seconds", "Latency of each solve stage", ("stage",), STAGE_BUCKETS
+        )
+        self.solves = registry.counter("geetest_solves", "Finished solves by outcome", ("status",))
+        self.failures = registry.counter("geetest_solve_failures", "Failed solves by reason", ("reason",))
+        self.lookups = registry.counter(
+            "geetest_background_lookups", "Background resolution: cache hits and index hits or misses", ("result",)
+        )
+        self.hedges = registry.counter(
+            "geetest_hedged_requests", "Duplicate requests fired because the first was slow", ("stage",)
+        )
+
+    def on_stage(self, sitekey: str, stage: str, seconds: float) -> None:
+        self.stage_seconds.observe(seconds, stage)
+
+    def on_event(self, sitekey: str, event: str) -> None:
+        if event.startswith("hedge_"):
+            self.hedges.inc(event[6:])
+        else:
+            self.lookups.inc(event)
+
+    def on_result(self, result: Any, trace: SolveTrace) -> None:
+        self.solve_seconds.observe(result.elapsed_time_seconds, result.status)
+        self.solves.inc(result.status)
+        if result.status != "success":
+            self.failures.inc(trace.error or "unknown")
+
+    def index_hit_rate(self) -> float:
+        """Share of index lookups that found a match."""
+        hits = self.lookups.get("index_hit")
+        total = hits + self.lookups.get("index_miss") + self.lookups.get("index_low_confidence")
+        return hits / total if total else 0.0
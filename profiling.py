@@ -0,0 +1,260 @@
+"""
+Runtime diagnostics for a live server: a sampling profiler, event-loop lag
+and a record of recent task timings.
+
+All three are cheap enough to leave wired in. The profiler samples only
+while a profile is being taken, from its own thread, via
+``sys._current_frames``; nothing is traced or instrumented. The lag
+monitor is one timer per ``interval`` on the loop.
+"""
+import asyncio
+import heapq
+import os
+import sys
+import threading
+import time
+from collections import Counter, deque
+from typing import Any, Callable, Deque, Dict, List, Optional, Tuple
+
+# Innermost Python frames of a thread that is parked rather than working: the
+# loop's selector, Condition/Event waits, and pool workers blocked on their
+# queue (the blocking get is C, so ``_worker`` is the innermost frame).
+IDLE_FUNCTIONS = frozenset({"select", "poll", "wait", "_worker", "accept"})
+
+class ProfilerBusy(Exception):
+    """A profile is already being taken."""
+
+def _frame_label(code: Any) -> str:
+    return f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+
+class SamplingProfiler:
+    """
+    Statistical profiler over every thread of this process.
+
+    ``sample`` takes a stack snapshot of every thread each ``interval``
+    seconds for ``seconds`` seconds, from a background thread, and
+    aggregates them into collapsed stacks (``thread;outer;...;inner count``
+    lines) that ``flamegraph.pl`` or speedscope read directly. Only one
+    profile runs at a time.
+    """
+
+    def __init__(self, max_seconds: float = 60.0, min_interval: float = 0.001, max_depth: int = 128):
+        self.max_seconds = max_seconds
+        self.min_interval = min_interval
+        self.max_depth = max_depth
+        self._lock = threading.Lock()
+
+    @property
+    def busy(self) -> bool:
+        return self._lock.locked()
+
+    def _collect(self, seconds: float, interval: float, idle: bool) -> Dict[str, Any]:
+        own = threading.get_ident()
+        names = {}
+        stacks: Counter = Counter()
+        samples = 0
+        started = time.perf_counter()
+        deadline = started + seconds
+
+        while True:
+            frames = sys._current_frames()
+            if len(names) != len(frames):
+                names = {thread.ident: thread.name for thread in threading.enumerate()}
+            for ident, frame in frames.items():
+                if ident == own:
+                    continue
+                if not idle and frame.f_code.co_name in IDLE_FUNCTIONS:
+                    continue
+                labels = []
+                while frame is not None and len(labels) < self.max_depth:
+                    labels.append(_frame_label(frame.f_code))
+                    frame = frame.f_back
+                labels.append(names.get(ident, str(ident)))
+                stacks[";".join(reversed(labels))] += 1
+            samples += 1
+            del frames
+
+            now = time.perf_counter()
+            if now >= deadline:
+                break
+            time.sleep(min(interval, deadline - now))
+
+        return {
+            "seconds": round(time.perf_counter() - started, 3),
+            "interval": interval,
+            "samples": samples,
+            "stacks": dict(stacks.most_common())
+        }
+
+    async def sample(self, seconds: float = 5.0, interval: float = 0.01, idle: bool = False) -> Dict[str, Any]:
+        """
+        Profile for ``seconds`` without blocking the event loop.
+
+        Args:
+            seconds: How long to sample, capped at ``max_seconds``
+            interval: Seconds between snapshots, at least ``min_interval``
+            idle: Keep stacks of threads parked in select, a queue or a lock
+
+        Returns:
+            ``seconds``, ``interval``, ``samples`` and ``stacks`` (collapsed
+            stack -> times seen), most frequent first
+
+        Raises:
+            ProfilerBusy: Another profile is in progress
+        """
+        if not self._lock.acquire(blocking=False):
+            raise ProfilerBusy("A profile is already being taken")
+
+        seconds = min(max(seconds, 0.0), self.max_seconds)
+        interval = max(interval, self.min_interval)
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+
+        def resolve(result: Any, error: Optional[BaseException]) -> None:
+            if future.done():
+                return
+            if error is not None:
+                future.set_exception(error)
+            else:
+                future.set_result(result)
+
+        # A thread of its own rather than the default executor, which may be
+        # saturated in exactly the situations worth profiling. It holds the
+        # lock until sampling ends, even if the caller gives up waiting.
+        def run() -> None:
+            try:
+                result, error = self._collect(seconds, interval, idle), None
+            except Exception as e:
+                result, error = None, e
+            finally:
+                self._lock.release()
+            loop.call_soon_threadsafe(resolve, result, error)
+
+        threading.Thread(target=run, name="geetest-profiler", daemon=True).start()
+        return await future
+
+def collapsed(profile: Dict[str, Any]) -> str:
+    """Render a profile's stacks in the collapsed format, one ``stack count`` per line."""
+    return "".join(f"{stack} {count}\n" for stack, count in profile["stacks"].items())
+
+class LoopLagMonitor:
+    """
+    Measures how late the event loop runs a timer, every ``interval`` seconds.
+
+    Lag is time a ready callback waits because something else holds the
+    loop: blocking calls, heavy CPU work or simply too many tasks.
+    ``on_sample`` receives every measurement, e.g. to feed a histogram.
+    """
+
+    def __init__(self, interval: float = 0.25, window: int = 240, on_sample: Optional[Callable[[float], None]] = None):
+        self.interval = interval
+        self.on_sample = on_sample
+        self._samples: Deque[float] = deque(maxlen=window)
+        self._task: Optional[asyncio.Task] = None
+        self.last = 0.0
+        self.max = 0.0
+
+    async def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    async def _run(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            expected = loop.time() + self.interval
+            await asyncio.sleep(self.interval)
+            lag = max(loop.time() - expected, 0.0)
+            self.last = lag
+            self.max = max(self.max, lag)
+            self._samples.append(lag)
+            if self.on_sample is not None:
+                self.on_sample(lag)
+
+    def stats(self) -> Dict[str, Any]:
+        """Latest, mean, p99 and worst lag over the window, and the worst since start, in ms."""
+        ordered = sorted(self._samples)
+        count = len(ordered)
+        return {
+            "interval_ms": round(self.interval * 1000, 1),
+            "samples": count,
+            "last_ms": round(self.last * 1000, 3),
+            "mean_ms": round(sum(ordered) / count * 1000, 3) if count else 0.0,
+            "p99_ms": round(ordered[min(count - 1, int(count * 0.99))] * 1000, 3) if count else 0.0,
+            "window_max_ms": round(ordered[-1] * 1000, 3) if count else 0.0,
+            "max_ms": round(self.max * 1000, 3)
+        }
+
+class TaskTracker:
+    """
+    Tasks being solved right now and the timings of the last ``history`` finished ones.
+
+    Not thread-safe: use it from one event loop.
+    """
+
+    def __init__(self, history: int = 1024):
+        # task_id -> (sitekey, started, queued)
+        self._running: Dict[str, Tuple[str, float, float]] = {}
+        self._finished: Deque[Dict[str, Any]] = deque(maxlen=history)
+
+    @property
+    def in_flight(self) -> int:
+        return len(self._running)
+
+    def start(self, task_id: str, sitekey: str, queued: float = 0.0) -> None:
+        self._running[task_id] = (sitekey, time.monotonic(), queued)
+
+    def finish(self, task_id: str, status: str, stages: Optional[Dict[str, float]] = None, reason: Optional[str] = None) -> None:
+        entry = self._running.pop(task_id, None)
+        if entry is None:
+            return
+        sitekey, started, queued = entry
+        self._finished.append({
+            "taskId": task_id,
+            "sitekey": sitekey,
+            "status": status,
+            "reason": reason,
+            "elapsed": round(time.monotonic() - started, 3),
+            "queued": round(queued, 3),
+            "stages": stages or {},
+            "finished_at": round(time.time(), 3)
+        })
+
+    def oldest(self, limit: int = 10) -> List[Dict[str, Any]]:
+        """Running tasks, longest-running first."""
+        now = time.monotonic()
+        running = heapq.nsmallest(limit, self._running.items(), key=lambda item: item[1][1])
+        return [
+            {"taskId": task_id, "sitekey": sitekey, "running": round(now - started, 3), "queued": round(queued, 3)}
+            for task_id, (sitekey, started, queued) in running
+        ]
+
+    def slowest(self, limit: int = 10, stage: Optional[str] = None) -> List[Dict[str, Any]]:
+        """Recent finished tasks, slowest first by total time or by one ``stage``."""
+        if stage is None:
+            return heapq.nlargest(limit, self._finished, key=lambda task: task["elapsed"])
+        return heapq.nlargest(
+            limit,
+            (task for task in self._finished if stage in task["stages"]),
+            key=lambda task: task["stages"][stage]
+        )
+
+    def stage_summary(self) -> Dict[str, Dict[str, float]]:
+        """Mean and worst time of each stage over the recent tasks, in ms."""
+        totals: Dict[str, List[float]] = {}
+        for task in self._finished:
+            for stage, seconds in task["stages"].items():
+                totals.setdefault(stage, []).append(seconds)
+        return {
+            stage: {
+                "count": len(values),
+                "mean_ms": round(sum(values) / len(values) * 1000, 3),
+                "max_ms": round(max(values) * 1000, 3)
+            }
+            for stage, values in totals.items()
+        }
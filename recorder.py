@@ -0,0 +1,477 @@
+"""
+Record solve sessions to JSONL and replay them without the network.
+
+A ``SessionRecorder`` passed as ``recorder=`` to ``GeetestSolver`` or
+``AsyncGeetestSolver`` writes every upstream exchange of a solve (stage,
+URL, parameters, status, body and latency), followed by a summary of the
+solve, to a JSONL trace. Background images are stored once per content
+digest under a blob directory next to the trace and referenced by name.
+
+``replay`` and ``replay_async`` feed a trace back through a fresh solver
+whose session answers from the recording, at full speed or, with
+``pace=True``, at the recorded latency. Solves replay in recorded order,
+so hashing, index lookups and encoding run on production inputs with no
+upstream in the loop.
+
+Usage:
+    python recorder.py trace.jsonl [--async] [--pace] [--concurrency 8]
+"""
+import argparse
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import sys
+import threading
+import time
+import uuid
+from collections import defaultdict, deque
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from typing import Any, Deque, Dict, List, Optional, Tuple, Union
+
+from bg_cache import BackgroundCache
+from encoder import extract_jsonp
+from tracing import SolveHooks, SolveTrace
+
+class ReplayMiss(LookupError):
+    """The solver made a request the trace has no answer for."""
+
+# Recorded solve being replayed in the current thread or task, so loads and
+# downloads are answered from that solve's own exchanges.
+_replaying: ContextVar[Optional[str]] = ContextVar("replaying", default=None)
+
+def _blob_dir(path: str, blob_dir: Optional[str]) -> str:
+    return blob_dir or f"{path}.blobs"
+
+class SessionRecorder(SolveHooks):
+    """
+    Solve hook that writes each solve's upstream exchanges to a JSONL trace.
+
+    Exchanges are buffered per solve and written together with the solve's
+    summary line when it finishes, so lines of concurrent solves never
+    interleave. Safe to share between threads and solvers.
+    """
+
+    def __init__(self, path: str, blob_dir: Optional[str] = None):
+        self.path = path
+        self.blob_dir = _blob_dir(path, blob_dir)
+        os.makedirs(self.blob_dir, exist_ok=True)
+        self._file = open(path, "a", encoding="utf-8")
+        self._lock = threading.Lock()
+        # id(trace) -> (solve id, buffered exchange records)
+        self._open: Dict[int, Tuple[str, List[Dict[str, Any]]]] = {}
+        self._blobs = set(os.listdir(self.blob_dir))
+        self.solves = 0
+
+    def __enter__(self) -> "SessionRecorder":
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        self.close()
+
+    def _solve_of(self, trace: SolveTrace) -> Tuple[str, List[Dict[str, Any]]]:
+        entry = self._open.get(id(trace))
+        if entry is None:
+            # Unique across processes and runs appending to the same trace.
+            entry = self._open[id(trace)] = (uuid.uuid4().hex[:16], [])
+        return entry
+
+    def _store_blob(self, data: bytes) -> str:
+        name = hashlib.sha1(data).hexdigest()
+        if name not in self._blobs:
+            tmp_path = os.path.join(self.blob_dir, f"{name}.tmp.{os.getpid()}.{threading.get_ident()}")
+            with open(tmp_path, "wb") as f:
+                f.write(data)
+            os.replace(tmp_path, os.path.join(self.blob_dir, name))
+            self._blobs.add(name)
+        return name
+
+    def exchange(
+        self,
+        trace: SolveTrace,
+        stage: str,
+        url: str,
+        params: Optional[Dict[str, Any]],
+        status: int,
+        body: Union[str, bytes],
+        seconds: float
+    ) -> None:
+        """Buffer one request and its response for the solve ``trace`` belongs to."""
+        record = {
+            "type": "exchange",
+            "stage": stage,
+            "url": url,
+            "params": {key: str(value) for key, value in (params or {}).items()},
+            "status": status,
+            "seconds": round(seconds, 6)
+        }
+        if isinstance(body, bytes):
+            record["blob"] = self._store_blob(body)
+            record["size"] = len(body)
+        else:
+            record["body"] = body
+
+        with self._lock:
+            solve, exchanges = self._solve_of(trace)
+            record["solve"] = solve
+            exchanges.append(record)
+
+    def on_result(self, result: Any, trace: SolveTrace) -> None:
+        with self._lock:
+            solve, exchanges = self._solve_of(trace)
+            del self._open[id(trace)]
+            summary = {
+                "type": "solve",
+                "solve": solve,
+                "sitekey": trace.sitekey,
+                "status": result.status,
+                "reason": result.reason,
+                "elapsed": result.elapsed_time_seconds,
+                "stages": result.stages,
+                "attempts": result.attempts,
+                "misses": result.misses,
+                "events": list(trace.events),
+                "recorded_at": round(time.time(), 3)
+            }
+            for record in exchanges + [summary]:
+                self._file.write(json.dumps(record) + "\n")
+            self._file.flush()
+            self.solves += 1
+
+    def close(self) -> None:
+        with self._lock:
+            if not self._file.closed:
+                self._file.close()
+
+def _rewrite_callback(body: str, recorded: Optional[str], callback: Optional[str]) -> str:
+    """Re-wrap a recorded JSONP body in the callback name the replaying solver chose."""
+    if recorded and callback and body.startswith(recorded + "("):
+        return callback + body[len(recorded):]
+    return body
+
+class ReplayStore:
+    """
+    A loaded trace, answering requests by content rather than by order.
+
+    ``/load`` is answered with the next recorded load of the solve being
+    replayed (see ``replaying``), or else the next one for its
+    ``captcha_id``. ``/verify`` gets the recorded verify of its
+    ``lot_number``, and a background download the image the recorded load
+    pointed at. Concurrent replays and re-challenges therefore stay
+    consistent.
+    """
+
+    def __init__(self, path: str, blob_dir: Optional[str] = None):
+        self.path = path
+        self.blob_dir = _blob_dir(path, blob_dir)
+        # Solve summaries in recorded order
+        self.solves: List[Dict[str, Any]] = []
+        # Loads by solve id and by captcha_id
+        self._solve_loads: Dict[str, Deque[Dict[str, Any]]] = defaultdict(deque)
+        self._loads: Dict[str, Deque[Dict[str, Any]]] = defaultdict(deque)
+        # Downloads by (solve id, background path) and by path alone
+        self._solve_downloads: Dict[Tuple[str, str], Dict[str, Any]] = {}
+        self._downloads: Dict[str, Dict[str, Any]] = {}
+        self._verifies: Dict[str, Dict[str, Any]] = {}
+        self._blobs: Dict[str, bytes] = {}
+        self._lock = threading.Lock()
+
+        last_bg: Dict[str, str] = {}
+        with open(path, "r", encoding="utf-8") as f:
+            for line in f:
+                if not line.strip():
+                    continue
+                record = json.loads(line)
+                if record["type"] == "solve":
+                    self.solves.append(record)
+                    continue
+
+                stage, params = record["stage"], record["params"]
+                if stage == "load":
+                    self._solve_loads[record["solve"]].append(record)
+                    self._loads[params.get("captcha_id", "")].append(record)
+                    if record["status"] == 200:
+                        try:
+                            last_bg[record["solve"]] = extract_jsonp(record["body"], params["callback"])["data"]["bg"]
+                        except (KeyError, TypeError, ValueError):
+                            pass
+                elif stage == "download":
+                    bg = last_bg.get(record["solve"])
+                    if bg is not None:
+                        self._solve_downloads[record["solve"], bg] = record
+                        if record["status"] == 200 or bg not in self._downloads:
+                            self._downloads[bg] = record
+                elif stage == "verify":
+                    self._verifies[params.get("lot_number", "")] = record
+
+    def _blob(self, name: str) -> bytes:
+        data = self._blobs.get(name)
+        if data is None:
+            with open(os.path.join(self.blob_dir, name), "rb") as f:
+                data = self._blobs[name] = f.read()
+        return data
+
+    def lookup(self, url: str, params: Optional[Dict[str, Any]] = None) -> Tuple[int, Union[str, bytes], float]:
+        """
+        Recorded answer to a GET.
+
+        Returns:
+            ``(status, body, recorded seconds)``; the body is bytes for a
+            background download and text otherwise
+
+        Raises:
+            ReplayMiss: Nothing in the trace answers this request
+        """
+        params = params or {}
+        path = url.split("?", 1)[0]
+        solve = _replaying.get()
+
+        if path.endswith("/load"):
+            with self._lock:
+                if solve is not None:
+                    loads = self._solve_loads.get(solve)
+                else:
+                    loads = self._loads.get(str(params.get("captcha_id")))
+                record = loads.popleft() if loads else None
+            if record is None:
+                raise ReplayMiss(f"No recorded load left for {params.get('captcha_id')}")
+        elif path.endswith("/verify"):
+            record = self._verifies.get(str(params.get("lot_number")))
+            if record is None:
+                raise ReplayMiss(f"No recorded verify for lot {params.get('lot_number')}")
+        else:
+            # The background path, whatever static base it was fetched from.
+            record = None
+            start = path.find("/")
+            while record is None and start != -1:
+                bg = path[start + 1:]
+                record = self._solve_downloads.get((solve, bg)) or self._downloads.get(bg)
+                start = path.find("/", start + 1)
+            if record is None:
+                raise ReplayMiss(f"No recorded background for {url}")
+            return record["status"], self._blob(record["blob"]), record["seconds"]
+
+        body = _rewrite_callback(record["body"], record["params"].get("callback"), params.get("callback"))
+        return record["status"], body, record["seconds"]
+
+class _ReplayResponse:
+    """Just enough of ``requests.Response`` and ``aiohttp.ClientResponse`` for the solvers."""
+
+    __slots__ = ("status", "body")
+
+    def __init__(self, status: int, body: Union[str, bytes]):
+        self.status = status
+        self.body = body
+
+    @property
+    def status_code(self) -> int:
+        return self.status
+
+    @property
+    def content(self) -> bytes:
+        return self.body if isinstance(self.body, bytes) else self.body.encode()
+
+    @property
+    def text(self) -> str:
+        return self._decode()
+
+    def _decode(self) -> str:
+        return self.body if isinstance(self.body, str) else self.body.decode("utf-8", "replace")
+
+class ReplaySession:
+    """Stand-in for ``requests.Session`` that answers from a ``ReplayStore``."""
+
+    def __init__(self, store: ReplayStore, pace: bool = False):
+        self.store = store
+        self.pace = pace
+
+    def get(self, url: str, params: Optional[Dict[str, Any]] = None, **kwargs: Any) -> _ReplayResponse:
+        status, body, seconds = self.store.lookup(url, params)
+        if self.pace:
+            time.sleep(seconds)
+        return _ReplayResponse(status, body)
+
+    def close(self) -> None:
+        pass
+
+class _AsyncReplayRequest:
+    __slots__ = ("session", "url", "params")
+
+    def __init__(self, session: "AsyncReplaySession", url: str, params: Optional[Dict[str, Any]]):
+        self.session = session
+        self.url = url
+        self.params = params
+
+    async def __aenter__(self) -> "_AsyncReplayResponse":
+        status, body, seconds = self.session.store.lookup(self.url, self.params)
+        if self.session.pace:
+            await asyncio.sleep(seconds)
+        return _AsyncReplayResponse(status, body)
+
+    async def __aexit__(self, exc_type, exc, tb) -> None:
+        pass
+
+class _AsyncReplayResponse(_ReplayResponse):
+    __slots__ = ()
+
+    async def read(self) -> bytes:
+        return self.content
+
+    async def text(self) -> str:
+        return self._decode()
+
+class AsyncReplaySession:
+    """Stand-in for ``aiohttp.ClientSession`` that answers from a ``ReplayStore``."""
+
+    closed = False
+
+    def __init__(self, store: ReplayStore, pace: bool = False):
+        self.store = store
+        self.pace = pace
+
+    def get(self, url: str, params: Optional[Dict[str, Any]] = None, **kwargs: Any) -> _AsyncReplayRequest:
+        return _AsyncReplayRequest(self, url, params)
+
+    async def close(self) -> None:
+        pass
+
+class _EventCapture(SolveHooks):
+    """Keeps the events of each replayed solve, keyed by result."""
+
+    def __init__(self):
+        self.events: Dict[int, List[str]] = {}
+
+    def on_result(self, result: Any, trace: SolveTrace) -> None:
+        self.events[id(result)] = list(trace.events)
+
+@dataclass
+class ReplayOutcome:
+    """A recorded solve next to its replay."""
+    recorded: Dict[str, Any]
+    result: Any
+    events: List[str] = field(default_factory=list)
+
+    @property
+    def matches(self) -> bool:
+        """
+        Same outcome as recorded: status, challenges used and challenges
+        abandoned for want of an index match. These do not depend on the
+        background cache, which replays run without.
+        """
+        return (
+            self.result.status == self.recorded["status"]
+            and self.result.attempts == self.recorded["attempts"]
+            and self.result.misses == self.recorded["misses"]
+        )
+
+def _replay_options(store: ReplayStore, solver_options: Dict[str, Any]) -> Dict[str, Any]:
+    options = {
+        "bg_cache": BackgroundCache(max_entries=0),
+        "max_attempts": max((solve["attempts"] for solve in store.solves), default=1),
+        "quiet": True
+    }
+    options.update(solver_options)
+    return options
+
+def replay(path: str, pace: bool = False, blob_dir: Optional[str] = None, **solver_options: Any) -> List[ReplayOutcome]:
+    """
+    Replay a trace through a ``GeetestSolver``, one solve at a time.
+
+    Args:
+        path: JSONL trace written by ``SessionRecorder``
+        pace: Wait the recorded latency of each exchange instead of answering at once
+        blob_dir: Background blob directory, if not next to the trace
+        solver_options: Extra ``GeetestSolver`` arguments
+
+    Returns:
+        One ``ReplayOutcome`` per recorded solve, in recorded order
+    """
+    from sync_solver import GeetestSolver
+
+    store = ReplayStore(path, blob_dir)
+    capture = _EventCapture()
+    options = _replay_options(store, solver_options)
+    options["hooks"] = (*options.get("hooks", ()), capture)
+    outcomes = []
+    with GeetestSolver(session=ReplaySession(store, pace), **options) as solver:
+        solver.warm_up()
+        for recorded in store.solves:
+            token = _replaying.set(recorded["solve"])
+            try:
+                result = solver.solve(recorded["sitekey"])
+            finally:
+                _replaying.reset(token)
+            outcomes.append(ReplayOutcome(recorded, result, capture.events.pop(id(result), [])))
+    return outcomes
+
+async def replay_async(
+    path: str,
+    pace: bool = False,
+    concurrency: int = 1,
+    blob_dir: Optional[str] = None,
+    **solver_options: Any
+) -> List[ReplayOutcome]:
+    """
+    Replay a trace through an ``AsyncGeetestSolver``, up to ``concurrency`` solves at once.
+
+    Args and returns as for ``replay``.
+    """
+    from async_solver import AsyncGeetestSolver
+
+    store = ReplayStore(path, blob_dir)
+    capture = _EventCapture()
+    options = _replay_options(store, solver_options)
+    options["hooks"] = (*options.get("hooks", ()), capture)
+    semaphore = asyncio.Semaphore(max(1, concurrency))
+
+    async with AsyncGeetestSolver(session=AsyncReplaySession(store, pace), **options) as solver:
+        await solver.warm_up()
+
+        async def run(recorded: Dict[str, Any]) -> ReplayOutcome:
+            async with semaphore:
+                _replaying.set(recorded["solve"])
+                result = await solver.solve(recorded["sitekey"])
+            return ReplayOutcome(recorded, result, capture.events.pop(id(result), []))
+
+        return await asyncio.gather(*(run(recorded) for recorded in store.solves))
+
+def _mean_ms(values: List[float]) -> float:
+    return round(1000 * sum(values) / len(values), 3) if values else 0.0
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("trace", help="JSONL trace written by SessionRecorder")
+    parser.add_argument("--blob-dir", help="Background blob directory (default: <trace>.blobs)")
+    parser.add_argument("--async", dest="use_async", action="store_true", help="Replay through AsyncGeetestSolver")
+    parser.add_argument("--pace", action="store_true", help="Answer at the recorded latency")
+    parser.add_argument("--concurrency", type=int, default=1, help="Solves in flight (async only)")
+    args = parser.parse_args()
+    # Failures are summarized below; keep the per-solve warnings out of the report.
+    logging.getLogger("geetest").setLevel(logging.ERROR)
+
+    started = time.perf_counter()
+    if args.use_async:
+        outcomes = asyncio.run(replay_async(args.trace, args.pace, args.concurrency, args.blob_dir))
+    else:
+        outcomes = replay(args.trace, args.pace, args.blob_dir)
+    wall = time.perf_counter() - started
+
+    mismatches = [outcome for outcome in outcomes if not outcome.matches]
+    print(f"Replayed {len(outcomes)} solves in {wall:.3f}s ({len(outcomes) / wall if wall else 0.0:.1f} solves/s), "
+          f"{len(mismatches)} differ from the recording")
+    for stage in ("load", "download", "hash", "encrypt", "verify"):
+        recorded = [o.recorded["stages"][stage] for o in outcomes if stage in o.recorded["stages"]]
+        replayed = [o.result.stages[stage] for o in outcomes if stage in o.result.stages]
+        print(f"  {stage:<9} recorded {_mean_ms(recorded):>9.3f} ms  replayed {_mean_ms(replayed):>9.3f} ms  "
+              f"({len(replayed)} samples)")
+    for outcome in mismatches[:10]:
+        recorded, result = outcome.recorded, outcome.result
+        print(f"  solve {recorded['solve']}: recorded {recorded['status']} after {recorded['attempts']} "
+              f"challenge(s), {recorded['misses']} missed; replayed {result.status} after {result.attempts}, "
+              f"{result.misses} missed {outcome.events} {result.reason or ''}".rstrip())
+    return 1 if mismatches else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
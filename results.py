@@ -0,0 +1,93 @@
+from typing import Any, Dict, Optional
+
+# Fields of the verify response's ``seccode`` that a site submits with its
+# form; everything else in the verify body is dropped after parsing.
+SOLUTION_FIELDS = ("captcha_id", "lot_number", "pass_token", "gen_time", "captcha_output")
+
+class GeetestResult:
+    """
+    Outcome of one solve.
+
+    Holds the parsed ``seccode`` fields of a successful verify rather than
+    its JSONP body, which is only kept (as ``response``) when the solver
+    was created with ``keep_raw=True``. Slotted, so the many results held
+    by a task store or token pool cost a few pointers each. The positional
+    arguments are those of the original dataclass; the solution fields are
+    keyword-only.
+    """
+
+    __slots__ = (
+        "response", "elapsed_time_seconds", "status", "reason", "sitekey",
+        "stages", "attempts", "misses",
+        "captcha_id", "lot_number", "pass_token", "gen_time", "captcha_output"
+    )
+
+    def __init__(
+        self,
+        response: Optional[str],
+        elapsed_time_seconds: float,
+        status: str,
+        reason: Optional[str] = None,
+        sitekey: Optional[str] = None,
+        stages: Optional[Dict[str, float]] = None,
+        attempts: int = 1,
+        misses: int = 0,
+        *,
+        captcha_id: Optional[str] = None,
+        lot_number: Optional[str] = None,
+        pass_token: Optional[str] = None,
+        gen_time: Optional[str] = None,
+        captcha_output: Optional[str] = None
+    ):
+        self.response = response
+        self.elapsed_time_seconds = elapsed_time_seconds
+        self.status = status
+        self.reason = reason
+        self.sitekey = sitekey
+        self.stages = stages if stages is not None else {}
+        self.attempts = attempts
+        self.misses = misses
+        self.captcha_id = captcha_id
+        self.lot_number = lot_number
+        self.pass_token = pass_token
+        self.gen_time = gen_time
+        self.captcha_output = captcha_output
+
+    @classmethod
+    def from_verify(cls, data: Dict[str, Any], elapsed_time_seconds: float, response: Optional[str] = None) -> Optional["GeetestResult"]:
+        """
+        Successful result from a parsed verify response.
+
+        Returns:
+            None unless the verify passed and carries a ``seccode`` with a
+            ``pass_token``
+        """
+        body = data.get("data") or {}
+        seccode = body.get("seccode")
+        if data.get("status") != "success" or body.get("result") != "success" or not isinstance(seccode, dict):
+            return None
+        if not seccode.get("pass_token"):
+            return None
+        return cls(
+            response,
+            elapsed_time_seconds,
+            "success",
+            **{name: None if seccode.get(name) is None else str(seccode[name]) for name in SOLUTION_FIELDS}
+        )
+
+    def solution(self) -> Dict[str, Optional[str]]:
+        """The ``seccode`` fields to submit with the protected form."""
+        return {name: getattr(self, name) for name in SOLUTION_FIELDS}
+
+    def to_dict(self) -> Dict[str, Any]:
+        """The original dataclass fields, as ``solve_geetest`` has always returned them, then the solution fields."""
+        return {name: getattr(self, name) for name in self.__slots__}
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "GeetestResult":
+        return cls(**{name: data[name] for name in cls.__slots__ if name in data})
+
+    def __repr__(self) -> str:
+        if self.status == "success":
+            return f"GeetestResult(status='success', lot_number={self.lot_number!r}, elapsed_time_seconds={self.elapsed_time_seconds})"
+        return f"GeetestResult(status={self.status!r}, reason={self.reason!r}, elapsed_time_seconds={self.elapsed_time_seconds})"
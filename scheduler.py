@@ -0,0 +1,180 @@
+import asyncio
+import time
+from collections import OrderedDict, deque
+from typing import Any, Awaitable, Callable, Deque, Dict, Optional, Set
+
+from concurrency import AdaptiveLimiter
+
+class QueueFull(Exception):
+    """Raised by ``TaskScheduler.submit`` when the queue is at capacity."""
+
+    def __init__(self, retry_after: float):
+        super().__init__(f"Task queue is full, retry in {retry_after:.1f}s")
+        self.retry_after = retry_after
+
+class Job:
+    """A queued solve request."""
+
+    __slots__ = ("task_id", "sitekey", "priority", "options", "enqueued_at", "started_at")
+
+    def __init__(self, task_id: str, sitekey: str, priority: int = 0, options: Optional[Dict[str, Any]] = None):
+        self.task_id = task_id
+        self.sitekey = sitekey
+        self.priority = priority
+        self.options = options or {}
+        self.enqueued_at = time.monotonic()
+        self.started_at: Optional[float] = None
+
+    @property
+    def queue_wait(self) -> float:
+        """Seconds between submission and a worker picking the job up."""
+        end = self.started_at if self.started_at is not None else time.monotonic()
+        return end - self.enqueued_at
+
+class TaskScheduler:
+    """
+    Bounded queue feeding up to ``workers`` concurrent solves.
+
+    Jobs are grouped by priority, highest first. Within a priority level,
+    sitekeys take turns round-robin so one heavy caller cannot starve the
+    rest. ``submit`` raises ``QueueFull`` instead of growing without bound.
+
+    One dispatcher task starts a task per job as room frees up, so only
+    running jobs cost a task. With a ``limiter``, ``workers`` is only an
+    upper bound: jobs start while fewer than ``limiter.limit`` are running,
+    so the queue absorbs the excess when the upstream slows down.
+    """
+
+    def __init__(
+        self,
+        handler: Callable[[Job], Awaitable[None]],
+        workers: int = 16,
+        max_queue: int = 1000,
+        limiter: Optional[AdaptiveLimiter] = None
+    ):
+        self.handler = handler
+        self.workers = workers
+        self.max_queue = max_queue
+        self.limiter = limiter
+        self._wakeup: Optional[asyncio.Event] = None
+        self._tiers: Dict[int, "OrderedDict[str, Deque[Job]]"] = {}
+        self._depth = 0
+        self._dispatcher: Optional[asyncio.Task] = None
+        self._running: Set[asyncio.Task] = set()
+        self.in_flight = 0
+        self.completed = 0
+        self.rejected = 0
+        # Moving average of solve time, seeded by the first solve.
+        self.avg_solve_time: Optional[float] = None
+
+    @property
+    def concurrency(self) -> int:
+        """Jobs allowed to run at once right now."""
+        if self.limiter is None:
+            return self.workers
+        return max(1, min(self.workers, self.limiter.limit))
+
+    @property
+    def depth(self) -> int:
+        """Jobs waiting for a worker."""
+        return self._depth
+
+    async def start(self) -> None:
+        """Start the dispatcher on the running loop."""
+        if self._dispatcher is not None:
+            return
+        self._wakeup = asyncio.Event()
+        self._dispatcher = asyncio.create_task(self._dispatch())
+
+    async def stop(self) -> None:
+        """Cancel the dispatcher and running jobs; queued jobs are dropped."""
+        tasks = [self._dispatcher, *self._running] if self._dispatcher is not None else list(self._running)
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self._dispatcher = None
+        self._running.clear()
+
+    def retry_after(self) -> float:
+        """Rough seconds until a queue slot frees up; 1 until a solve has been timed."""
+        if self.avg_solve_time is None:
+            return 1.0
+        return max(1.0, self.avg_solve_time * (self._depth - self.max_queue + 1) / self.concurrency)
+
+    def submit(self, task_id: str, sitekey: str, priority: int = 0, **options: Any) -> Job:
+        """
+        Queue a solve.
+
+        Raises:
+            QueueFull: The queue already holds ``max_queue`` jobs
+        """
+        if self._depth >= self.max_queue:
+            self.rejected += 1
+            raise QueueFull(self.retry_after())
+
+        job = Job(task_id, sitekey, priority, options)
+        tier = self._tiers.setdefault(priority, OrderedDict())
+        tier.setdefault(sitekey, deque()).append(job)
+        self._depth += 1
+        if self._wakeup is not None:
+            self._wakeup.set()
+        return job
+
+    def _pop(self) -> Job:
+        priority = max(self._tiers)
+        tier = self._tiers[priority]
+        sitekey, jobs = next(iter(tier.items()))
+        job = jobs.popleft()
+
+        if jobs:
+            tier.move_to_end(sitekey)
+        else:
+            del tier[sitekey]
+        if not tier:
+            del self._tiers[priority]
+
+        self._depth -= 1
+        return job
+
+    async def _dispatch(self) -> None:
+        while True:
+            while self._depth and self.in_flight < self.concurrency:
+                job = self._pop()
+                job.started_at = time.monotonic()
+                self.in_flight += 1
+                task = asyncio.create_task(self._run(job))
+                self._running.add(task)
+                task.add_done_callback(self._running.discard)
+            # Woken by a submit or by a finished job freeing room.
+            self._wakeup.clear()
+            await self._wakeup.wait()
+
+    async def _run(self, job: Job) -> None:
+        try:
+            await self.handler(job)
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            pass
+        finally:
+            self.in_flight -= 1
+            self.completed += 1
+            duration = time.monotonic() - job.started_at
+            if self.avg_solve_time is None:
+                self.avg_solve_time = duration
+            else:
+                self.avg_solve_time += 0.1 * (duration - self.avg_solve_time)
+            self._wakeup.set()
+
+    def stats(self) -> Dict[str, Any]:
+        """Queue depth and worker counters."""
+        return {
+            "workers": self.workers,
+            "concurrency": self.concurrency,
+            "depth": self._depth,
+            "max_queue": self.max_queue,
+            "in_flight": self.in_flight,
+            "completed": self.completed,
+            "rejected": self.rejected,
+            "avg_solve_time": round(self.avg_solve_time, 3) if self.avg_solve_time is not None else None
+        }
@@ -0,0 +1,147 @@
+import json
+import logging
+import logging.handlers
+import queue
+import sys
+from typing import Any, Optional, TextIO, Union
+
+logger = logging.getLogger("geetest")
+
+# LogRecord attributes that are not user-supplied ``extra`` fields.
+_RECORD_FIELDS = set(vars(logging.makeLogRecord({}))) | {"message", "asctime"}
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line: time, level, logger, message and any ``extra`` fields."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "time": round(record.created, 3),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage()
+        }
+        for key, value in vars(record).items():
+            if key not in _RECORD_FIELDS:
+                entry[key] = value
+        if record.exc_info:
+            entry["exc_info"] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str, separators=(",", ":"))
+
+class NullLoader:
+    """Stand-in for the logmagix ``Loader`` when there is no console to animate."""
+
+    __slots__ = ()
+
+    def start(self) -> None:
+        pass
+
+    def stop(self) -> None:
+        pass
+
+NULL_LOADER = NullLoader()
+
+def console_logger() -> Any:
+    """The logmagix console ``Logger``; imported on first use since logmagix pulls in ``requests``."""
+    from logmagix import Logger
+    return Logger()
+
+def console_loader(desc: str, timeout: float = 0.05) -> Any:
+    """A fresh logmagix spinner thread (not started)."""
+    from logmagix import Loader
+    return Loader(desc=desc, timeout=timeout)
+
+class StructuredLogger:
+    """
+    Drop-in for the logmagix ``Logger`` calls the solvers make, writing to the
+    ``geetest`` standard-library logger instead of printing.
+
+    With ``start_queue_logging`` active every call only enqueues a record; a
+    listener thread does the formatting and I/O.
+    """
+
+    def __init__(self, log: logging.Logger = logger):
+        self._log = log
+
+    def debug(self, message: str, start: Optional[float] = None, end: Optional[float] = None) -> None:
+        self._emit(logging.DEBUG, message, start, end)
+
+    def info(self, message: str, start: Optional[float] = None, end: Optional[float] = None) -> None:
+        self._emit(logging.INFO, message, start, end)
+
+    def success(self, message: str, start: Optional[float] = None, end: Optional[float] = None) -> None:
+        self._emit(logging.INFO, message, start, end)
+
+    def failure(self, message: str, start: Optional[float] = None, end: Optional[float] = None) -> None:
+        self._emit(logging.WARNING, message, start, end)
+
+    def message(self, level: str, message: str, start: Optional[float] = None, end: Optional[float] = None) -> None:
+        self._emit(logging.INFO, message, start, end, source=level)
+
+    def _emit(self, level: int, message: str, start: Optional[float], end: Optional[float], **extra: Any) -> None:
+        if not self._log.isEnabledFor(level):
+            return
+        if start is not None and end is not None:
+            extra["duration"] = round(float(end) - float(start), 3)
+        self._log.log(level, message, extra=extra)
+
+    def result(self, sitekey: str, result: Any) -> None:
+        """One structured record per finished solve."""
+        success = result.status == "success"
+        level = logging.INFO if success else logging.WARNING
+        if not self._log.isEnabledFor(level):
+            return
+        self._log.log(level, "solve finished" if success else "solve failed", extra={
+            "sitekey": sitekey,
+            "status": result.status,
+            "reason": result.reason,
+            "elapsed": result.elapsed_time_seconds,
+            "stages": getattr(result, "stages", None)
+        })
+
+class _DroppingQueueHandler(logging.handlers.QueueHandler):
+    dropped = 0
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            _DroppingQueueHandler.dropped += 1
+
+_listener: Optional[logging.handlers.QueueListener] = None
+
+def start_queue_logging(level: Union[int, str] = logging.INFO, stream: Optional[TextIO] = None, max_queue: int = 10000) -> logging.handlers.QueueListener:
+    """
+    Route the ``geetest`` logger through a bounded in-memory queue.
+
+    Solvers only enqueue records; a listener thread formats them as JSON
+    lines and writes them to ``stream`` (stderr by default). If the queue is
+    full, records are dropped rather than blocking a solve.
+    """
+    global _listener
+    stop_queue_logging()
+
+    records: "queue.Queue[logging.LogRecord]" = queue.Queue(max_queue)
+    handler = logging.StreamHandler(stream or sys.stderr)
+    handler.setFormatter(JsonFormatter())
+
+    queue_handler = _DroppingQueueHandler(records)
+    logger.handlers = [queue_handler]
+    logger.setLevel(level)
+    logger.propagate = False
+
+    _listener = logging.handlers.QueueListener(records, handler, respect_handler_level=True)
+    _listener.start()
+    return _listener
+
+def stop_queue_logging() -> None:
+    """Flush pending records and stop the listener thread."""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+        logger.handlers = []
+        logger.propagate = True
+
+def dropped_records() -> int:
+    """Records discarded because the logging queue was full."""
+    return _DroppingQueueHandler.dropped
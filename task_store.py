@@ -0,0 +1,290 @@
+import asyncio
+import os
+import sqlite3
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from typing import Any, Dict, Optional
+
+from encoder import dumps, loads
+
+class TaskStore(ABC):
+    """Where the API keeps task status between /task/create and /task/{id}."""
+
+    @abstractmethod
+    def create(self, task_id: str) -> None:
+        """Register a new task in the ``processing`` state."""
+
+    @abstractmethod
+    def get(self, task_id: str) -> Optional[Dict[str, Any]]:
+        """Return ``{"status", "solution", "error"}`` or None if unknown or expired."""
+
+    def get_body(self, task_id: str) -> Optional[bytes]:
+        """The task as a serialized ``{"status", "solution", "error"}`` JSON body, or None."""
+        task = self.get(task_id)
+        return dumps(task) if task is not None else None
+
+    @abstractmethod
+    def update(self, task_id: str, status: str, solution: Optional[Dict[str, Any]] = None, error: Optional[str] = None) -> None:
+        """Record a task's outcome; its TTL restarts so clients have time to fetch it."""
+
+    @abstractmethod
+    def delete(self, task_id: str) -> None:
+        """Forget a task."""
+
+    @abstractmethod
+    def __len__(self) -> int:
+        """Number of tasks held."""
+
+    def close(self) -> None:
+        pass
+
+PROCESSING_BODY = dumps({"status": "processing", "solution": None, "error": None})
+
+class TaskRecord:
+    """
+    Compact per-task state for ``MemoryTaskStore``.
+
+    A finished task is held only as its serialized response body, encoded
+    once when it finishes: one bytes object instead of a tree of dicts and
+    strings, and nothing left to encode when it is fetched.
+    """
+
+    __slots__ = ("body", "expires_at")
+
+    def __init__(self, expires_at: float):
+        self.body = PROCESSING_BODY
+        self.expires_at = expires_at
+
+    def to_dict(self) -> Dict[str, Any]:
+        if self.body is PROCESSING_BODY:
+            return {"status": "processing", "solution": None, "error": None}
+        return loads(self.body)
+
+class MemoryTaskStore(TaskStore):
+    """
+    In-process task store with TTL expiry and a size cap.
+
+    Records are kept in expiry order (every write moves a record to the back
+    with a fresh deadline), so expired and overflow entries are always at the
+    front and purging is amortized O(1).
+    """
+
+    def __init__(self, ttl: float = 600.0, max_size: int = 100_000):
+        self.ttl = ttl
+        self.max_size = max_size
+        self._records: "OrderedDict[str, TaskRecord]" = OrderedDict()
+
+    def _purge(self, now: float) -> None:
+        records = self._records
+        while records:
+            task_id, record = next(iter(records.items()))
+            if record.expires_at > now and len(records) <= self.max_size:
+                break
+            del records[task_id]
+
+    def create(self, task_id: str) -> None:
+        now = time.monotonic()
+        self._records[task_id] = TaskRecord(now + self.ttl)
+        self._records.move_to_end(task_id)
+        self._purge(now)
+
+    def get(self, task_id: str) -> Optional[Dict[str, Any]]:
+        record = self._records.get(task_id)
+        if record is None:
+            return None
+        if record.expires_at <= time.monotonic():
+            del self._records[task_id]
+            return None
+        return record.to_dict()
+
+    def get_body(self, task_id: str) -> Optional[bytes]:
+        record = self._records.get(task_id)
+        if record is None:
+            return None
+        if record.expires_at <= time.monotonic():
+            del self._records[task_id]
+            return None
+        return record.body
+
+    def update(self, task_id: str, status: str, solution: Optional[Dict[str, Any]] = None, error: Optional[str] = None) -> None:
+        record = self._records.get(task_id)
+        if record is None:
+            return
+        record.body = dumps({"status": status, "solution": solution, "error": error})
+        record.expires_at = time.monotonic() + self.ttl
+        self._records.move_to_end(task_id)
+
+    def delete(self, task_id: str) -> None:
+        self._records.pop(task_id, None)
+
+    def __len__(self) -> int:
+        return len(self._records)
+
+class SQLiteTaskStore(TaskStore):
+    """
+    Task store shared by every worker process on one box.
+
+    Uses SQLite in WAL mode so readers in other ``uvicorn --workers``
+    processes never block the writer. Expired rows are purged every
+    ``purge_every`` creates, and the oldest rows beyond ``max_size`` go too.
+    """
+
+    def __init__(self, path: str, ttl: float = 600.0, max_size: int = 100_000, purge_every: int = 256):
+        self.path = path
+        self.ttl = ttl
+        self.max_size = max_size
+        self.purge_every = purge_every
+        self._creates = 0
+        self._lock = threading.Lock()
+
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        self._conn = sqlite3.connect(path, timeout=5.0, isolation_level=None, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS tasks ("
+            "id TEXT PRIMARY KEY, status TEXT NOT NULL, solution TEXT, error TEXT, expires_at REAL NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS tasks_expires_at ON tasks (expires_at)")
+
+    def _purge(self, now: float) -> None:
+        self._conn.execute("DELETE FROM tasks WHERE expires_at <= ?", (now,))
+        excess = self._conn.execute("SELECT COUNT(*) FROM tasks").fetchone()[0] - self.max_size
+        if excess > 0:
+            self._conn.execute(
+                "DELETE FROM tasks WHERE id IN (SELECT id FROM tasks ORDER BY expires_at LIMIT ?)",
+                (excess,)
+            )
+
+    def create(self, task_id: str) -> None:
+        # Wall-clock time: deadlines are compared across processes.
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO tasks (id, status, solution, error, expires_at) VALUES (?, 'processing', NULL, NULL, ?)",
+                (task_id, now + self.ttl)
+            )
+            self._creates += 1
+            if self._creates % self.purge_every == 0:
+                self._purge(now)
+
+    def get(self, task_id: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT status, solution, error FROM tasks WHERE id = ? AND expires_at > ?",
+                (task_id, time.time())
+            ).fetchone()
+        if row is None:
+            return None
+        return {"status": row[0], "solution": loads(row[1]) if row[1] else None, "error": row[2]}
+
+    def get_body(self, task_id: str) -> Optional[bytes]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT status, solution, error FROM tasks WHERE id = ? AND expires_at > ?",
+                (task_id, time.time())
+            ).fetchone()
+        if row is None:
+            return None
+        # The solution column already holds JSON; splice it in as is.
+        solution = row[1].encode("utf-8") if row[1] else b"null"
+        return b'{"status":' + dumps(row[0]) + b',"solution":' + solution + b',"error":' + dumps(row[2]) + b"}"
+
+    def update(self, task_id: str, status: str, solution: Optional[Dict[str, Any]] = None, error: Optional[str] = None) -> None:
+        with self._lock:
+            self._conn.execute(
+                "UPDATE tasks SET status = ?, solution = ?, error = ?, expires_at = ? WHERE id = ?",
+                (status, dumps(solution).decode("utf-8") if solution is not None else None, error, time.time() + self.ttl, task_id)
+            )
+
+    def delete(self, task_id: str) -> None:
+        with self._lock:
+            self._conn.execute("DELETE FROM tasks WHERE id = ?", (task_id,))
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM tasks WHERE expires_at > ?", (time.time(),)).fetchone()[0]
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+def open_task_store(url: str = "memory", ttl: float = 600.0, max_size: int = 100_000) -> TaskStore:
+    """
+    Create a task store from a URL.
+
+    Args:
+        url: ``memory`` for a per-process store, or ``sqlite:///path/to/tasks.db``
+            for one shared by every worker process on the box
+        ttl: Seconds a task stays readable after its last update
+        max_size: Maximum number of tasks kept
+    """
+    if url == "memory":
+        return MemoryTaskStore(ttl=ttl, max_size=max_size)
+    if url.startswith("sqlite:///"):
+        return SQLiteTaskStore(url[len("sqlite:///"):], ttl=ttl, max_size=max_size)
+    raise ValueError(f"Unsupported task store URL: {url}")
+
+class TaskNotifier:
+    """
+    Wakes waiters the moment a task finishes.
+
+    Tasks created by this process get an ``asyncio.Event`` that ``notify``
+    sets. Tasks solved by another worker process (shared store) have no
+    local event, so waiters fall back to polling the store with backoff.
+    """
+
+    def __init__(self, store: TaskStore, poll_interval: float = 0.05, max_poll_interval: float = 0.5):
+        self.store = store
+        self.poll_interval = poll_interval
+        self.max_poll_interval = max_poll_interval
+        self._events: Dict[str, "asyncio.Event"] = {}
+
+    def register(self, task_id: str) -> None:
+        self._events[task_id] = asyncio.Event()
+
+    def notify(self, task_id: str) -> None:
+        event = self._events.pop(task_id, None)
+        if event is not None:
+            event.set()
+
+    def discard(self, task_id: str) -> None:
+        self._events.pop(task_id, None)
+
+    async def wait(self, task_id: str, timeout: float) -> Optional[Dict[str, Any]]:
+        """
+        Wait up to ``timeout`` seconds for a task to leave ``processing``.
+
+        Returns:
+            The task as stored when it finished or the timeout hit, or None
+            if the task does not exist
+        """
+        # Grab the event before reading the store so a completion between
+        # the two cannot be missed.
+        event = self._events.get(task_id)
+        task = self.store.get(task_id)
+        if task is None or task["status"] != "processing" or timeout <= 0:
+            return task
+
+        if event is not None:
+            try:
+                await asyncio.wait_for(event.wait(), timeout)
+            except asyncio.TimeoutError:
+                pass
+            return self.store.get(task_id)
+
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + timeout
+        interval = self.poll_interval
+        while True:
+            remaining = deadline - loop.time()
+            if remaining <= 0:
+                return task
+            await asyncio.sleep(min(interval, remaining))
+            interval = min(interval * 2, self.max_poll_interval)
+            task = self.store.get(task_id)
+            if task is None or task["status"] != "processing":
+                return task
@@ -0,0 +1,97 @@
+import asyncio
+
+import pytest
+
+from concurrency import AdaptiveLimiter
+
+def test_limit_grows_while_busy_and_fast():
+    async def run():
+        limiter = AdaptiveLimiter(initial=2, max_limit=8)
+        for _ in range(20):
+            await limiter.acquire()
+            await limiter.acquire()
+            limiter.release(0.01)
+            limiter.release(0.01)
+        return limiter
+
+    limiter = asyncio.run(run())
+    assert limiter.limit > 2
+    assert limiter.increases > 0
+    assert limiter.in_flight == 0
+
+def test_limit_stays_below_max():
+    async def run():
+        limiter = AdaptiveLimiter(initial=2, max_limit=3)
+        for _ in range(100):
+            await limiter.acquire()
+            await limiter.acquire()
+            limiter.release(0.01)
+            limiter.release(0.01)
+        return limiter
+
+    assert asyncio.run(run()).limit == 3
+
+def test_failure_backs_off_once_per_round_trip():
+    async def run():
+        limiter = AdaptiveLimiter(initial=16, backoff=0.5)
+        await limiter.acquire()
+        await limiter.acquire()
+        limiter.release(10.0, failed=True)
+        # Within one round-trip of the last decrease: not lowered again.
+        limiter.release(10.0, failed=True)
+        return limiter
+
+    limiter = asyncio.run(run())
+    assert limiter.limit == 8
+    assert limiter.decreases == 1
+
+def test_record_failure_backs_off_without_a_slot():
+    limiter = AdaptiveLimiter(initial=16, backoff=0.5)
+    limiter.record_failure()
+    assert limiter.limit == 8
+    assert limiter.in_flight == 0
+
+def test_cancelled_waiter_does_not_leak_a_slot():
+    async def run():
+        limiter = AdaptiveLimiter(initial=1)
+        await limiter.acquire()
+        waiter = asyncio.create_task(limiter.acquire())
+        await asyncio.sleep(0)
+        waiter.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await waiter
+        limiter.release()
+        assert limiter.in_flight == 0
+        await asyncio.wait_for(limiter.acquire(), 1)
+        assert limiter.in_flight == 1
+
+    asyncio.run(run())
+
+def test_waiter_cancelled_after_grant_hands_the_slot_on():
+    async def run():
+        limiter = AdaptiveLimiter(initial=1)
+        await limiter.acquire()
+        first = asyncio.create_task(limiter.acquire())
+        second = asyncio.create_task(limiter.acquire())
+        await asyncio.sleep(0)
+        # Grants ``first`` its slot, then cancels it before it resumes.
+        limiter.release()
+        first.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await first
+        await asyncio.wait_for(second, 1)
+        assert limiter.in_flight == 1
+
+    asyncio.run(run())
+
+def test_timed_out_acquire_does_not_leak_a_slot():
+    async def run():
+        limiter = AdaptiveLimiter(initial=1)
+        await limiter.acquire()
+        with pytest.raises(asyncio.TimeoutError):
+            await asyncio.wait_for(limiter.acquire(), 0.01)
+        limiter.release()
+        assert limiter.in_flight == 0
+        assert limiter.stats()["waiting"] == 0
+
+    asyncio.run(run())
@@ -0,0 +1,66 @@
+import asyncio
+
+import async_solver
+import sync_solver
+from results import GeetestResult
+
+LEGACY_KEYS = ["response", "elapsed_time_seconds", "status", "reason", "sitekey", "stages", "attempts", "misses"]
+SOLUTION_KEYS = ["captcha_id", "lot_number", "pass_token", "gen_time", "captcha_output"]
+
+VERIFY = {
+    "status": "success",
+    "data": {
+        "result": "success",
+        "seccode": {
+            "captcha_id": "cid",
+            "lot_number": "lot",
+            "pass_token": "token",
+            "gen_time": 1700000000,
+            "captcha_output": "output"
+        }
+    }
+}
+
+def solved() -> GeetestResult:
+    return GeetestResult.from_verify(VERIFY, 1.5, "geetest_1({...})")
+
+def test_positional_arguments_match_the_dataclass():
+    result = GeetestResult("body", 1.5, "failure", "reason")
+    assert (result.response, result.elapsed_time_seconds, result.status, result.reason) == ("body", 1.5, "failure", "reason")
+
+def test_to_dict_shape():
+    data = solved().to_dict()
+    assert list(data) == LEGACY_KEYS + SOLUTION_KEYS
+    assert data["response"] == "geetest_1({...})"
+    assert data["gen_time"] == "1700000000"
+
+def test_from_dict_round_trip():
+    data = solved().to_dict()
+    assert GeetestResult.from_dict(data).to_dict() == data
+
+def test_from_verify_requires_pass_token():
+    seccode = dict(VERIFY["data"]["seccode"], pass_token=None)
+    assert GeetestResult.from_verify({"status": "success", "data": {"result": "success", "seccode": seccode}}, 1.0) is None
+    assert GeetestResult.from_verify({"status": "success", "data": {"result": "fail"}}, 1.0) is None
+
+def test_async_solve_geetest_shape(monkeypatch):
+    async def solve(self, sitekey, deadline=None):
+        assert self.keep_raw
+        return solved()
+
+    monkeypatch.setattr(async_solver.AsyncGeetestSolver, "solve", solve)
+    data = asyncio.run(async_solver.solve_geetest("sitekey"))
+    assert list(data) == LEGACY_KEYS + SOLUTION_KEYS
+    assert data["status"] == "success"
+    assert data["response"] == "geetest_1({...})"
+
+def test_sync_solve_geetest_shape(monkeypatch):
+    def solve(self, sitekey, deadline=None):
+        assert self.keep_raw
+        return solved()
+
+    monkeypatch.setattr(sync_solver.GeetestSolver, "solve", solve)
+    data = sync_solver.solve_geetest("sitekey")
+    assert list(data) == LEGACY_KEYS + SOLUTION_KEYS
+    assert data["status"] == "success"
+    assert data["response"] == "geetest_1({...})"
@@ -0,0 +1,85 @@
+import asyncio
+
+import pytest
+
+from concurrency import AdaptiveLimiter
+from scheduler import QueueFull, TaskScheduler
+
+async def drain(scheduler: TaskScheduler, jobs: int) -> None:
+    while scheduler.completed < jobs:
+        await asyncio.sleep(0.001)
+
+def test_priority_then_round_robin():
+    async def run():
+        order = []
+
+        async def handler(job):
+            order.append(job.sitekey)
+
+        scheduler = TaskScheduler(handler, workers=1)
+        for index, (sitekey, priority) in enumerate((("a", 0), ("a", 0), ("a", 0), ("b", 0), ("b", 0), ("c", 5))):
+            scheduler.submit(str(index), sitekey, priority)
+        await scheduler.start()
+        try:
+            await asyncio.wait_for(drain(scheduler, 6), 5)
+        finally:
+            await scheduler.stop()
+        return order
+
+    assert asyncio.run(run()) == ["c", "a", "b", "a", "b", "a"]
+
+def test_full_queue_rejects():
+    async def handler(job):
+        pass
+
+    scheduler = TaskScheduler(handler, max_queue=2)
+    scheduler.submit("1", "a")
+    scheduler.submit("2", "a")
+    with pytest.raises(QueueFull) as error:
+        scheduler.submit("3", "a")
+    assert error.value.retry_after >= 1.0
+    assert scheduler.rejected == 1
+    assert scheduler.depth == 2
+
+def test_runs_only_as_many_jobs_as_the_limiter_allows():
+    async def run():
+        release = asyncio.Event()
+
+        async def handler(job):
+            await release.wait()
+
+        scheduler = TaskScheduler(handler, workers=128, limiter=AdaptiveLimiter(initial=2))
+        await scheduler.start()
+        try:
+            tasks_before = len(asyncio.all_tasks())
+            for index in range(10):
+                scheduler.submit(str(index), "a")
+            await asyncio.sleep(0.01)
+            assert scheduler.in_flight == 2
+            assert scheduler.depth == 8
+            # A task per running job, not one per possible worker.
+            assert len(asyncio.all_tasks()) == tasks_before + 2
+            release.set()
+            await asyncio.wait_for(drain(scheduler, 10), 5)
+        finally:
+            await scheduler.stop()
+
+    asyncio.run(run())
+
+def test_average_solve_time_starts_at_the_first_solve():
+    async def run():
+        async def handler(job):
+            await asyncio.sleep(0.02)
+
+        scheduler = TaskScheduler(handler, workers=1)
+        assert scheduler.avg_solve_time is None
+        assert scheduler.retry_after() == 1.0
+        await scheduler.start()
+        try:
+            scheduler.submit("1", "a")
+            await asyncio.wait_for(drain(scheduler, 1), 5)
+        finally:
+            await scheduler.stop()
+        return scheduler.avg_solve_time
+
+    assert 0.02 <= asyncio.run(run()) < 1.0
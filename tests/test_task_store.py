@@ -0,0 +1,70 @@
+import json
+import time
+
+import pytest
+
+from task_store import MemoryTaskStore, SQLiteTaskStore, open_task_store
+
+SOLUTION = {"pass_token": "token", "lot_number": "lot"}
+
+@pytest.fixture(params=["memory", "sqlite"])
+def store(request, tmp_path):
+    store = open_task_store("memory" if request.param == "memory" else f"sqlite:///{tmp_path / 'tasks.db'}", ttl=0.3)
+    yield store
+    store.close()
+
+def test_create_update_and_body(store):
+    store.create("a")
+    assert store.get("a") == {"status": "processing", "solution": None, "error": None}
+    store.update("a", "ready", SOLUTION)
+    assert store.get("a") == {"status": "ready", "solution": SOLUTION, "error": None}
+    assert json.loads(store.get_body("a")) == store.get("a")
+    store.delete("a")
+    assert store.get("a") is None
+    assert store.get_body("a") is None
+
+def test_expires_after_ttl(store):
+    store.create("a")
+    store.create("b")
+    time.sleep(0.15)
+    # An update restarts the TTL.
+    store.update("b", "failed", error="boom")
+    time.sleep(0.2)
+    assert store.get("a") is None
+    assert store.get_body("a") is None
+    assert store.get("b")["error"] == "boom"
+    assert len(store) == 1
+
+def test_memory_store_evicts_oldest():
+    store = MemoryTaskStore(max_size=2)
+    for task_id in ("a", "b", "c"):
+        store.create(task_id)
+    assert len(store) == 2
+    assert store.get("a") is None
+    assert store.get("c") is not None
+
+def test_sqlite_store_evicts_oldest(tmp_path):
+    store = SQLiteTaskStore(str(tmp_path / "tasks.db"), max_size=2, purge_every=1)
+    for task_id in ("a", "b", "c"):
+        store.create(task_id)
+        time.sleep(0.001)
+    assert len(store) == 2
+    assert store.get("a") is None
+    assert store.get("c") is not None
+    store.close()
+
+def test_sqlite_store_survives_reopen(tmp_path):
+    path = str(tmp_path / "tasks.db")
+    store = SQLiteTaskStore(path)
+    store.create("a")
+    store.update("a", "ready", SOLUTION)
+    store.close()
+
+    store = SQLiteTaskStore(path)
+    assert store.get("a") == {"status": "ready", "solution": SOLUTION, "error": None}
+    assert json.loads(store.get_body("a"))["solution"] == SOLUTION
+    store.close()
+
+def test_unknown_url():
+    with pytest.raises(ValueError):
+        open_task_store("redis://localhost")
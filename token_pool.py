@@ -0,0 +1,216 @@
+import asyncio
+import time
+from collections import deque
+from typing import Any, Awaitable, Callable, Deque, Dict, List, Optional, Tuple
+
+class _SitekeyPool:
+    """Ready results of one sitekey, oldest first, plus its refill state."""
+
+    __slots__ = ("depth", "entries", "refilling", "failures", "retry_at")
+
+    def __init__(self, depth: int):
+        self.depth = depth
+        # (solved_at, result), solved_at from time.monotonic()
+        self.entries: Deque[Tuple[float, Any]] = deque()
+        self.refilling = 0
+        self.failures = 0
+        self.retry_at = 0.0
+
+class TokenPool:
+    """
+    Warm pool of already-verified results per registered sitekey.
+
+    A background task keeps every registered sitekey topped up to its
+    ``depth`` by calling ``solve``, at most ``refill_concurrency`` solves at
+    a time. A result counts as usable for ``ttl - margin`` seconds after
+    its solve finished; older ones are discarded (and counted as expired)
+    rather than served. ``take`` hands out the oldest usable result first.
+    A sitekey whose refills fail backs off exponentially, up to
+    ``max_retry_delay`` seconds. At most ``max_sitekeys`` sitekeys are
+    pooled at once.
+    """
+
+    def __init__(
+        self,
+        solve: Callable[[str], Awaitable[Any]],
+        depth: int = 4,
+        ttl: float = 60.0,
+        margin: float = 10.0,
+        refill_concurrency: int = 4,
+        max_retry_delay: float = 30.0,
+        max_sitekeys: int = 64
+    ):
+        self.solve = solve
+        self.depth = depth
+        self.ttl = ttl
+        self.margin = margin
+        self.refill_concurrency = refill_concurrency
+        self.max_retry_delay = max_retry_delay
+        self.max_sitekeys = max_sitekeys
+        self._pools: Dict[str, _SitekeyPool] = {}
+        self._refills: List[asyncio.Task] = []
+        self._runner: Optional[asyncio.Task] = None
+        self._wakeup: Optional[asyncio.Event] = None
+        self.hits = 0
+        self.misses = 0
+        self.refilled = 0
+        self.refill_failures = 0
+        self.expired = 0
+
+    @property
+    def usable_for(self) -> float:
+        """Seconds after its solve that a result is still handed out."""
+        return max(self.ttl - self.margin, 0.0)
+
+    def __len__(self) -> int:
+        return sum(len(pool.entries) for pool in self._pools.values())
+
+    @property
+    def sitekeys(self) -> List[str]:
+        return list(self._pools)
+
+    def register(self, sitekey: str, depth: Optional[int] = None) -> bool:
+        """
+        Keep ``depth`` (default: the pool's ``depth``) ready results for ``sitekey``.
+
+        Returns:
+            False if ``sitekey`` is new and ``max_sitekeys`` are already pooled
+        """
+        pool = self._pools.get(sitekey)
+        if pool is None:
+            if len(self._pools) >= self.max_sitekeys:
+                return False
+            self._pools[sitekey] = _SitekeyPool(self.depth if depth is None else depth)
+        elif depth is not None:
+            pool.depth = depth
+        self._wake()
+        return True
+
+    def unregister(self, sitekey: str) -> bool:
+        """Stop refilling ``sitekey`` and drop its ready results."""
+        return self._pools.pop(sitekey, None) is not None
+
+    def take(self, sitekey: str) -> Optional[Tuple[Any, float]]:
+        """
+        Pop the oldest usable result for ``sitekey``.
+
+        Returns:
+            ``(result, age in seconds)``, or None if the sitekey is not
+            registered or has nothing ready
+        """
+        pool = self._pools.get(sitekey)
+        if pool is None:
+            return None
+
+        self._purge(pool, time.monotonic())
+        if not pool.entries:
+            self.misses += 1
+            self._wake()
+            return None
+
+        solved_at, result = pool.entries.popleft()
+        self.hits += 1
+        self._wake()
+        return result, time.monotonic() - solved_at
+
+    def _purge(self, pool: _SitekeyPool, now: float) -> None:
+        cutoff = now - self.usable_for
+        while pool.entries and pool.entries[0][0] <= cutoff:
+            pool.entries.popleft()
+            self.expired += 1
+
+    def _wake(self) -> None:
+        if self._wakeup is not None:
+            self._wakeup.set()
+
+    async def start(self) -> None:
+        """Start the background refill task on the running loop."""
+        if self._runner is not None:
+            return
+        self._wakeup = asyncio.Event()
+        self._runner = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        """Cancel the refill task and any refills in flight."""
+        tasks = self._refills + ([self._runner] if self._runner is not None else [])
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self._refills = []
+        self._runner = None
+
+    async def _run(self) -> None:
+        while True:
+            now = time.monotonic()
+            for pool in self._pools.values():
+                self._purge(pool, now)
+            self._launch(now)
+
+            self._wakeup.clear()
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), self._next_check(now))
+            except asyncio.TimeoutError:
+                pass
+
+    def _launch(self, now: float) -> None:
+        # Emptiest pools first, so one sitekey cannot hog every refill slot.
+        needy = sorted(
+            (item for item in self._pools.items() if item[1].retry_at <= now),
+            key=lambda item: len(item[1].entries) + item[1].refilling - item[1].depth
+        )
+        for sitekey, pool in needy:
+            while len(self._refills) < self.refill_concurrency and len(pool.entries) + pool.refilling < pool.depth:
+                pool.refilling += 1
+                task = asyncio.create_task(self._refill(sitekey, pool))
+                self._refills.append(task)
+                task.add_done_callback(self._refills.remove)
+
+    def _next_check(self, now: float) -> float:
+        """Seconds until the oldest ready result expires or a backoff ends."""
+        deadline = now + 1.0
+        for pool in self._pools.values():
+            if pool.entries:
+                deadline = min(deadline, pool.entries[0][0] + self.usable_for)
+            if pool.retry_at > now:
+                deadline = min(deadline, pool.retry_at)
+        return max(deadline - now, 0.01)
+
+    async def _refill(self, sitekey: str, pool: _SitekeyPool) -> None:
+        try:
+            result = await self.solve(sitekey)
+            ok = getattr(result, "status", None) == "success"
+        except Exception:
+            ok = False
+        finally:
+            pool.refilling -= 1
+
+        if ok:
+            self.refilled += 1
+            pool.failures = 0
+            if self._pools.get(sitekey) is pool:
+                pool.entries.append((time.monotonic(), result))
+        else:
+            self.refill_failures += 1
+            pool.failures += 1
+            pool.retry_at = time.monotonic() + min(self.max_retry_delay, 0.5 * 2 ** pool.failures)
+        self._wake()
+
+    def hit_rate(self) -> float:
+        """Share of ``take`` calls served from the pool."""
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+    def stats(self) -> Dict[str, Any]:
+        """Counters and the ready and refilling count per sitekey."""
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hit_rate(), 4),
+            "refilled": self.refilled,
+            "refill_failures": self.refill_failures,
+            "expired": self.expired,
+            "sitekeys": {
+                sitekey: {"depth": pool.depth, "ready": len(pool.entries), "refilling": pool.refilling}
+                for sitekey, pool in self._pools.items()
+            }
+        }
@@ -0,0 +1,76 @@
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List, Optional, Sequence
+
+# Stages timed inside ``solve``, in the order they run. Stages skipped by a
+# background cache hit are simply absent from a trace.
+STAGES = ("load", "download", "hash", "encrypt", "verify")
+
+class SolveHooks:
+    """
+    Instrumentation callbacks for solves; subclass and override what you need.
+
+    Hooks run inline on the solving thread or event loop, so they must be
+    cheap and must not block or raise.
+    """
+
+    def on_stage(self, sitekey: str, stage: str, seconds: float) -> None:
+        """A stage of a solve finished after ``seconds``."""
+
+    def on_event(self, sitekey: str, event: str) -> None:
+        """Something notable happened, e.g. ``index_hit`` or ``bg_path_hit``."""
+
+    def on_result(self, result: Any, trace: "SolveTrace") -> None:
+        """A solve returned ``result``; ``trace`` holds its stages and events."""
+
+class SolveTrace:
+    """Stage durations and events of one solve, forwarded to every hook as they happen."""
+
+    __slots__ = ("sitekey", "stages", "events", "error", "attempts", "misses", "active", "_hooks")
+
+    def __init__(self, sitekey: str, hooks: Sequence[SolveHooks] = ()):
+        self.sitekey = sitekey
+        self.stages: Dict[str, float] = {}
+        self.events: List[str] = []
+        # Short, low-cardinality failure category, e.g. ``load_status`` or
+        # an exception class name; None on success.
+        self.error: Optional[str] = None
+        # Challenges fetched, and those abandoned without a verify because
+        # the background had no confident index match.
+        self.attempts = 0
+        self.misses = 0
+        # Stage most recently entered, to say where a timeout hit.
+        self.active: Optional[str] = None
+        self._hooks = hooks
+
+    def record(self, stage: str, started: float) -> float:
+        """Close a stage that began at ``started`` (a ``time.perf_counter()`` value)."""
+        seconds = time.perf_counter() - started
+        self.stages[stage] = self.stages.get(stage, 0.0) + seconds
+        for hook in self._hooks:
+            hook.on_stage(self.sitekey, stage, seconds)
+        return seconds
+
+    @contextmanager
+    def stage(self, stage: str) -> Iterator[None]:
+        """Time the enclosed block as ``stage``."""
+        self.active = stage
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(stage, started)
+
+    def event(self, event: str) -> None:
+        self.events.append(event)
+        for hook in self._hooks:
+            hook.on_event(self.sitekey, event)
+
+    def finish(self, result: Any) -> Any:
+        """Attach the stage timings and attempt counts to ``result`` and hand it to the hooks."""
+        result.stages = {stage: round(seconds, 6) for stage, seconds in self.stages.items()}
+        result.attempts = max(self.attempts, 1)
+        result.misses = self.misses
+        for hook in self._hooks:
+            hook.on_result(result, self)
+        return result